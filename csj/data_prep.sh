@@ -13,6 +13,7 @@ HCOPY_PATH='/home/lab5/inaguma/htk-3.4/bin/HCopy'
 TOOL='htk'
 # TOOL='python_speech_features'
 # TOOL='librosa'
+# TOOL='numpy'
 # TOOL='kaldi'  # under implementation
 
 ### Configuration (Set by yourself)
@@ -30,9 +31,16 @@ NORMALIZE='speaker'
 
 SAVE_FORMAT='numpy'
 # SAVE_FORMAT='htk'
+# SAVE_FORMAT='archive'
 # SAVE_FORMAT='wav'
 # NOTE: normalization will not be conducted in case of wav
 
+# the number of processes to extract features
+NUM_WORKERS=1
+
+# if 1, read only samples of utterances from audio files (only for numpy)
+WINDOW_LIMITED=0
+
 ### Data size
 # subset (about 240h)
 subset=1
@@ -129,6 +137,8 @@ python main.py \
     --deltadelta $DELTADELTA \
     --normalize $NORMALIZE \
     --save_format $SAVE_FORMAT \
+    --num_workers $NUM_WORKERS \
+    --window_limited $WINDOW_LIMITED \
     --subset $subset \
     --fullset $fullset
 
@@ -8,21 +8,30 @@ from __future__ import division
 from __future__ import print_function
 
 from os.path import join, basename
+from functools import partial
 import numpy as np
 import pickle
 from tqdm import tqdm
 
-from utils.util import mkdir_join
-from utils.inputs.segmentation import segment
-from utils.inputs.htk import read, write
+from utils.parallel import imap_parallel
+from utils.inputs.segmentation import segment_block
+from utils.inputs.htk import read_header
+from utils.inputs.feature_io import feature_path, save_feature
+from utils.inputs.feature_io import normalize_feature, normalize_params
+from utils.inputs.feature_io import normalize_in_place, normalize_utterances
+from utils.inputs.statistics import Statistics
+from utils.inputs.archive import ArchiveWriter, ArchiveReader
 
 
 def read_audio(audio_paths, speaker_dict, tool, config, normalize, is_training,
                save_path=None, save_format='numpy',
                global_mean_male=None, global_mean_female=None,
                global_std_male=None, global_std_female=None,
-               dtype=np.float32):
+               dtype=np.float32, num_workers=1, window_limited=False):
     """Read HTK or WAV files.
+       Each audio file is decoded only once. When the statistics over the
+       training set are required, raw features are saved in the first pass
+       and normalized in place in the second pass.
     Args:
         audio_paths (list): paths to HTK or WAV files
         speaker_dict (dict): dictionary of speakers
@@ -31,7 +40,7 @@ def read_audio(audio_paths, speaker_dict, tool, config, normalize, is_training,
                 key => utterance index
                 value => [start_frame, end_frame, trans_kana, trans_kanji]
         tool (string): the tool to extract features,
-            htk or librosa or python_speech_features
+            htk or librosa or python_speech_features or numpy
         config (dict): a configuration for feature extraction
         normalize (string):
             no => normalization will be not conducted
@@ -42,7 +51,7 @@ def read_audio(audio_paths, speaker_dict, tool, config, normalize, is_training,
                          data by mean & std per utterance
         is_training (bool, optional): training or not
         save_path (string): path to save npy files
-        save_format (string, optional): numpy or htk
+        save_format (string, optional): numpy or htk or archive
         global_mean_male (np.ndarray, optional): global mean of male over the
             training set
         global_std_male (np.ndarray, optional): global standard deviation of
@@ -52,6 +61,10 @@ def read_audio(audio_paths, speaker_dict, tool, config, normalize, is_training,
         global_std_female (np.ndarray, optional): global standard deviation of
             female over the training set
         dtype (optional): the type of data, default is np.float32
+        num_workers (int, optional): the number of processes to extract
+            features in parallel
+        window_limited (bool, optional): if True, only samples of
+            utterances are read from WAV files (numpy only)
     Returns:
         global_mean_male (np.ndarray): global mean of male over the
             training set
@@ -71,175 +84,106 @@ def read_audio(audio_paths, speaker_dict, tool, config, normalize, is_training,
     if normalize not in ['global', 'speaker', 'utterance', 'no']:
         raise ValueError(
             'normalize must be "utterance" or "speaker" or "global" or "no".')
-    if tool not in ['htk', 'python_speech_features', 'librosa']:
+    if tool not in ['htk', 'python_speech_features', 'librosa', 'numpy']:
         raise TypeError(
             'tool must be "htk" or "python_speech_features"' +
-            ' or "librosa".')
+            ' or "librosa" or "numpy".')
+    if save_path is not None and save_format not in ['numpy', 'htk', 'archive']:
+        raise ValueError('save_format is numpy or htk or archive.')
 
-    audio_path_list_male, audio_path_list_female = [], []
-    total_frame_num_male, total_frame_num_female = 0, 0
-    total_frame_num_dict = {}
-    speaker_mean_dict = {}
+    # NOTE: When the statistics over the training set are necessary for
+    # normalization, raw features are saved in the first pass and normalized
+    # in the second pass. Otherwise, features are normalized & saved at once.
+    two_pass = is_training and normalize in ['global', 'speaker']
 
     # NOTE: 講演ごとに異なるspeakerとみなす
+    task_list = []
+    for audio_path in audio_paths:
+        speaker = basename(audio_path).split('.')[0]
+        gender = speaker[3]  # M or F
+        if gender not in ['M', 'F']:
+            raise ValueError('gender is M or F.')
+        task_list.append((audio_path, speaker, speaker_dict[speaker]))
 
-    # Loop 1: Computing global mean and statistics
-    if is_training and normalize != 'no':
-        print('=====> Reading audio files...')
-        for i, audio_path in enumerate(tqdm(audio_paths)):
-            speaker = basename(audio_path).split('.')[0]
-
-            # Divide each audio file into utterances
-            _, input_utt_sum, speaker_mean, _, total_frame_num_speaker = segment(
-                audio_path,
-                speaker,
-                speaker_dict[speaker],
-                is_training=True,
-                sil_duration=0,
-                tool=tool,
-                config=config)
-
-            if i == 0:
-                # Initialize global statistics
-                feature_dim = input_utt_sum.shape[0]
-                global_mean_male = np.zeros((feature_dim,), dtype=dtype)
-                global_mean_female = np.zeros(
-                    (feature_dim,), dtype=dtype)
-                global_std_male = np.zeros((feature_dim,), dtype=dtype)
-                global_std_female = np.zeros((feature_dim,), dtype=dtype)
-
-            # For computing global mean
-            if speaker[3] == 'M':
-                audio_path_list_male.append(audio_path)
-                global_mean_male += input_utt_sum
-                total_frame_num_male += total_frame_num_speaker
-            elif speaker[3] == 'F':
-                audio_path_list_female.append(audio_path)
-                global_mean_female += input_utt_sum
-                total_frame_num_female += total_frame_num_speaker
-            else:
-                raise ValueError
+    # Loop 1: Divide each audio file into utterances & accumulate statistics
+    print('=====> Reading audio files...')
+    func = partial(_read_session,
+                   tool=tool,
+                   config=config,
+                   normalize=normalize,
+                   is_training=is_training,
+                   two_pass=two_pass,
+                   save_path=save_path,
+                   save_format=save_format,
+                   global_mean_std={'M': (global_mean_male, global_std_male),
+                                    'F': (global_mean_female, global_std_female)},
+                   dtype=dtype,
+                   window_limited=window_limited)
+    utt_list = []
+    frame_num_dict = {}
+    if save_path is not None and save_format == 'archive':
+        archive_writer = ArchiveWriter(save_path)
+    gender_stats, speaker_stats = Statistics(), Statistics()
+    for (_, speaker, _), (frame_num_dict_speaker, gender_stats_speaker, speaker_stats_speaker, archive_list) in zip(
+            task_list, tqdm(imap_parallel(func, task_list, num_workers),
+                            total=len(task_list))):
+        for utt_name in sorted(frame_num_dict_speaker.keys()):
+            utt_list.append((speaker, utt_name))
+        frame_num_dict.update(frame_num_dict_speaker)
+        gender_stats.merge(gender_stats_speaker)
+        speaker_stats.merge(speaker_stats_speaker)
+        for archive_args in archive_list:
+            archive_writer.write(*archive_args)
 
-            # For computing speaker stddev
-            if normalize == 'speaker':
-                speaker_mean_dict[speaker] = speaker_mean
-                total_frame_num_dict[speaker] = total_frame_num_speaker
-                # NOTE: speaker mean is already computed
-
-        print('=====> Computing global mean & stddev...')
-        # Compute global mean per gender
-        global_mean_male /= total_frame_num_male
-        global_mean_female /= total_frame_num_female
-
-        for audio_path in tqdm(audio_paths):
-            speaker = basename(audio_path).split('.')[0]
-
-            # Divide each audio into utterances
-            input_data_dict_speaker, _, _, _, _ = segment(
-                audio_path,
-                speaker,
-                speaker_dict[speaker],
-                is_training=True,
-                sil_duration=0,
-                tool=tool,
-                config=config)
-
-            # For computing global stddev
-            if speaker[3] == 'M':
-                for input_utt in input_data_dict_speaker.values():
-                    global_std_male += np.sum(
-                        np.abs(input_utt - global_mean_male) ** 2, axis=0)
-            elif speaker[3] == 'F':
-                for input_utt in input_data_dict_speaker.values():
-                    global_std_female += np.sum(
-                        np.abs(input_utt - global_mean_female) ** 2, axis=0)
-            else:
-                raise ValueError
+    if save_path is not None and save_format == 'archive':
+        archive_writer.close()
 
-        # Compute global stddev per gender
-        global_std_male = np.sqrt(
-            global_std_male / (total_frame_num_male - 1))
-        global_std_female = np.sqrt(
-            global_std_female / (total_frame_num_female - 1))
+    if is_training and normalize != 'no':
+        # Compute global mean & stddev per gender
+        global_mean_male = gender_stats.mean('M', dtype=dtype)
+        global_std_male = gender_stats.std('M', dtype=dtype)
+        global_mean_female = gender_stats.mean('F', dtype=dtype)
+        global_std_female = gender_stats.std('F', dtype=dtype)
 
         if save_path is not None:
             # Save global mean & std per gender
-            np.save(join(save_path, 'global_mean_male.npy'),
-                    global_mean_male)
-            np.save(join(save_path, 'global_mean_female.npy'),
-                    global_mean_female)
-            np.save(join(save_path, 'global_std_male.npy'),
-                    global_std_male)
-            np.save(join(save_path, 'global_std_female.npy'),
-                    global_std_female)
-
-    # Loop 2: Normalization and Saving
-    print('=====> Normalization...')
-    frame_num_dict = {}
-    sampPeriod, parmKind = None, None
-    for audio_path in tqdm(audio_paths):
-        speaker = basename(audio_path).split('.')[0]
+            # NOTE: a gender absent in the subset has no statistics
+            for name, value in [
+                    ('global_mean_male', global_mean_male),
+                    ('global_mean_female', global_mean_female),
+                    ('global_std_male', global_std_male),
+                    ('global_std_female', global_std_female)]:
+                if value is not None:
+                    np.save(join(save_path, name + '.npy'), value)
+            gender_stats.save(join(save_path, 'statistics.npz'))
 
-        if normalize == 'speaker' and is_training:
-            speaker_mean = speaker_mean_dict[speaker]
-        else:
-            speaker_mean = None
-
-        # Divide each audio into utterances
-        input_data_dict_speaker, _, speaker_mean, speaker_std, _ = segment(
-            audio_path,
-            speaker,
-            speaker_dict[speaker],
-            is_training=is_training,
-            sil_duration=0,
-            tool=tool,
-            config=config,
-            mean=speaker_mean)  # for compute speaker sttdev
-        # NOTE: input_data_dict_speaker have been not normalized yet
-
-        for utt_index, input_utt in input_data_dict_speaker.items():
-
-            if normalize == 'no':
-                pass
-            elif normalize == 'global' or not is_training:
-                # Normalize by mean & std over the training set per gender
-                if speaker[3] == 'M':
-                    input_utt -= global_mean_male
-                    input_utt /= global_std_male
-                elif speaker[3] == 'F':
-                    input_utt -= global_mean_female
-                    input_utt /= global_std_female
-                else:
-                    raise ValueError
-            elif normalize == 'speaker':
-                # Normalize by mean & std per speaker
-                input_utt = (input_utt - speaker_mean) / speaker_std
-            elif normalize == 'utterance':
-                # Normalize by mean & std per utterance
-                utt_mean = np.mean(input_utt, axis=0, dtype=dtype)
-                utt_std = np.std(input_utt, axis=0, dtype=dtype)
-                input_utt = (input_utt - utt_mean) / utt_std
+    # Loop 2: Normalize the saved features in place
+    if two_pass and save_path is not None:
+        print('=====> Normalization...')
+        if save_format == 'archive':
+            with ArchiveReader(save_path) as archive_reader:
+                specifier_dict = dict(
+                    (utt_name, archive_reader.specifier(utt_name))
+                    for utt_name in archive_reader.keys())
+        normalize_task_list = []
+        for speaker, utt_name in utt_list:
+            if normalize == 'speaker':
+                mean = speaker_stats.mean(speaker, dtype=dtype)
+                std = speaker_stats.std(speaker, dtype=dtype)
+            elif speaker[3] == 'M':
+                mean, std = global_mean_male, global_std_male
             else:
-                raise ValueError
-
-            frame_num_dict[speaker + '_' + utt_index] = input_utt.shape[0]
-
-            if save_path is not None:
-                # Save input features
-                if save_format == 'numpy':
-                    input_data_save_path = mkdir_join(
-                        save_path, speaker, speaker + '_' + utt_index + '.npy')
-                    np.save(input_data_save_path, input_utt)
-                elif save_format == 'htk':
-                    if sampPeriod is None:
-                        _, sampPeriod, parmKind = read(audio_path)
-                    write(input_utt,
-                          htk_path=mkdir_join(
-                              save_path, speaker, speaker + '_' + utt_index + '.htk'),
-                          sampPeriod=sampPeriod,
-                          parmKind=parmKind)
-                else:
-                    raise ValueError('save_format is numpy or htk.')
+                mean, std = global_mean_female, global_std_female
+            if save_format == 'archive':
+                input_path = specifier_dict[utt_name]
+            else:
+                input_path = feature_path(
+                    save_path, speaker, utt_name, save_format)
+            normalize_task_list.append((input_path, save_format, mean, std))
+        for _ in tqdm(imap_parallel(normalize_feature, normalize_task_list,
+                                    num_workers),
+                      total=len(normalize_task_list)):
+            pass
 
     if save_path is not None:
         # Save the frame number dictionary
@@ -248,3 +192,89 @@ def read_audio(audio_paths, speaker_dict, tool, config, normalize, is_training,
 
     return (global_mean_male, global_mean_female,
             global_std_male, global_std_female, frame_num_dict)
+
+
+def _read_session(args, tool, config, normalize, is_training, two_pass,
+                  save_path, save_format, global_mean_std, dtype,
+                  window_limited):
+    """Divide an audio file into utterances, and normalize & save them.
+       This is called in worker processes.
+    Args:
+        args (tuple): (audio_path, speaker, utterance_dict)
+        tool (string): htk or python_speech_features or librosa or numpy
+        config (dict): a configuration for feature extraction
+        normalize (string): global or speaker or utterance or no
+        is_training (bool): training or not
+        two_pass (bool): if True, save features without normalization
+        save_path (string): path to save files
+        save_format (string): numpy or htk or archive
+        global_mean_std (dict):
+            key (string) => gender
+            value (tuple) => (global mean, global std)
+        dtype: the type of data
+        window_limited (bool): if True, read only samples of utterances
+    Returns:
+        frame_num_dict (dict):
+            key => utterance name
+            value => the number of frames
+        gender_stats (Statistics): statistics of the speaker per gender
+        speaker_stats (Statistics): statistics of the speaker
+        archive_list (list): list of (utt_name, input_utt, sampPeriod, parmKind)
+            to be appended to shards in case of archive
+    """
+    audio_path, speaker, utterance_dict = args
+    gender = speaker[3]
+    gender_stats, speaker_stats = Statistics(), Statistics()
+
+    sampPeriod, parmKind = None, None
+    if save_format == 'htk':
+        _, sampPeriod, _, parmKind = read_header(audio_path)
+
+    # Divide each audio file into utterances
+    keys, input_data_block, offsets = segment_block(
+        audio_path,
+        speaker,
+        utterance_dict,
+        sil_duration=0,
+        tool=tool,
+        config=config,
+        dtype=dtype,
+        window_limited=window_limited)
+    # NOTE: utterances of the speaker are stored in a contiguous block, which
+    # has been not normalized yet
+
+    if is_training and normalize != 'no':
+        # For computing global mean & stddev per gender
+        gender_stats.add(gender, input_data_block)
+
+        # For computing speaker mean & stddev
+        if normalize == 'speaker':
+            speaker_stats.add(speaker, input_data_block)
+
+    if not two_pass:
+        if normalize == 'global' or (not is_training and normalize != 'no'):
+            # Normalize by mean & std over the training set per gender
+            global_mean, global_std = global_mean_std[gender]
+            normalize_in_place(input_data_block, *normalize_params(
+                global_mean, global_std, dtype=dtype))
+        elif normalize == 'utterance':
+            # Normalize by mean & std per utterance
+            normalize_utterances(input_data_block, offsets)
+
+    frame_num_dict = {}
+    archive_list = []
+    for i, utt_index in enumerate(keys):
+        utt_name = speaker + '_' + utt_index
+        input_utt = input_data_block[offsets[i]:offsets[i + 1]]
+        frame_num_dict[utt_name] = input_utt.shape[0]
+
+        if save_path is not None:
+            if save_format == 'archive':
+                # NOTE: appended to shards in the main process
+                archive_list.append((utt_name, input_utt, sampPeriod, parmKind))
+            else:
+                # Save input features (not normalized yet in case of two_pass)
+                save_feature(input_utt, save_path, speaker, utt_name,
+                             save_format, sampPeriod, parmKind)
+
+    return frame_num_dict, gender_stats, speaker_stats, archive_list
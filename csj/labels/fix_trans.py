@@ -7,22 +7,7 @@ from __future__ import print_function
 
 import re
 
-from csj.labels.regular_expression import remove_pause
-from csj.labels.regular_expression import remove_question_which
-from csj.labels.regular_expression import remove_question
-from csj.labels.regular_expression import remove_Btag
-from csj.labels.regular_expression import remove_disfluency
-from csj.labels.regular_expression import remove_filler
-from csj.labels.regular_expression import remove_Xtag
-from csj.labels.regular_expression import remove_Atag
-from csj.labels.regular_expression import remove_Ktag
-from csj.labels.regular_expression import remove_cry
-from csj.labels.regular_expression import remove_cough
-from csj.labels.regular_expression import remove_which
-from csj.labels.regular_expression import remove_Ltag
-from csj.labels.regular_expression import remove_laughing
-from csj.labels.regular_expression import remove_Otag
-from csj.labels.regular_expression import remove_Mtag
+from csj.labels.regular_expression import remove_tags
 
 NOISES = ['<雑音>', '<息>', '<笑>', '<咳>', '<泣>', '<拍手>', '<フロア発話>',
           '<フロア笑>', '<ベル>', '<デモ>', '<朗読間違い>']
@@ -44,25 +29,7 @@ def fix_transcript(transcript):
     # NOTE: 先に完全に消さない
 
     # Decompose hierarchical structure
-    for _ in range(transcript.count('(') + transcript.count('<')):
-        transcript = remove_pause(transcript)
-        transcript = remove_question(transcript)
-        transcript = remove_which(transcript)
-        transcript = remove_question_which(transcript)
-
-        transcript = remove_cry(transcript)
-        transcript = remove_cough(transcript)
-        transcript = remove_laughing(transcript)
-        transcript = remove_filler(transcript)
-        transcript = remove_disfluency(transcript)
-
-        transcript = remove_Atag(transcript)
-        transcript = remove_Btag(transcript)
-        transcript = remove_Ktag(transcript)
-        transcript = remove_Ltag(transcript)
-        transcript = remove_Mtag(transcript)
-        transcript = remove_Otag(transcript)
-        transcript = remove_Xtag(transcript)
+    transcript = remove_tags(transcript)
 
     # Remove
     transcript = re.sub(r'<H>', '', transcript)  # extended voise
@@ -207,3 +207,91 @@ def remove_Mtag(transcript):
         transcript = Mtag.group(1) + Mtag.group(2) + Mtag.group(3)
         Mtag = re.match(expr, transcript)
     return transcript
+
+
+PAUSE_EXPR = re.compile(r'<P:\d{5}\.\d{3}-\d{5}\.\d{3}>')
+
+# NOTE: patterns of the contents of tags, in the order of the above functions
+# applied in each pass of fix_transcript(). Tags of "?" are resolved by either
+# remove_question or remove_question_which depending on when they are exposed.
+TAG_RULES = [
+    (re.compile(r'\?[\s]+([^()]+)\Z'), lambda m: m.group(1).split(',')[0]),
+    (re.compile(r'W[\s]+([^()]+);([^()]+)\Z'), lambda m: m.group(2)),
+    (re.compile(r'\?[\s]+([^()]+),([^()]+)\Z'), lambda m: m.group(1)),
+    (re.compile(r'泣[\s]+([^()]+)\Z'), lambda m: m.group(1)),
+    (re.compile(r'咳[\s]+([^()]+)\Z'), lambda m: m.group(1)),
+    (re.compile(r'笑[\s]+([^()]+)\Z'), lambda m: m.group(1)),
+    (re.compile(r'F[\s]+([^()]+)\Z'), lambda m: m.group(1)),
+    (re.compile(r'D[\d]*[\s]+([^()]+)\Z'), lambda m: m.group(1)),
+    (re.compile(r'A[\s]+([^()]+);([^()]+)\Z'), lambda m: m.group(2)),
+    (re.compile(r'B[\s]+([^()]+);([^()]+)\Z'), lambda m: m.group(1)),
+    (re.compile(r'K[\s]+([^()]+);([^()]+)\Z'), lambda m: m.group(2)),
+    (re.compile(r'L[\s]+([^()]+)\Z'), lambda m: m.group(1)),
+    (re.compile(r'M[\s]+([^()]+)\Z'), lambda m: m.group(1)),
+    (re.compile(r'O[\s]+([^()]+)\Z'), lambda m: m.group(1)),
+    (re.compile(r'X[\s]+([^()]+)\Z'), lambda m: m.group(1)),
+]
+
+
+def remove_tags(transcript):
+    """Decompose hierarchical structure in a single pass with a stack. This
+       gives the same result as applying the above functions repeatedly.
+    Args:
+        transcript (string): a transcript with tags
+    Returns:
+        transcript (string): a transcript without pauses and resolvable tags
+    """
+    transcript = PAUSE_EXPR.sub('', transcript)
+
+    chunks = []
+    # NOTE: each open bracket has the position in chunks, the latest
+    # (pass, rule) when its inner tags are resolved, and whether all of its
+    # inner tags are resolved
+    stack = []
+    pos = 0
+    for bracket in re.finditer(r'[()]', transcript):
+        chunks.append(transcript[pos:bracket.start()])
+        pos = bracket.end()
+        if bracket.group() == '(':
+            stack.append([len(chunks), (1, 0), True])
+            chunks.append('(')
+            continue
+        if len(stack) == 0:
+            chunks.append(')')
+            continue
+
+        start, inner_time, resolvable = stack.pop()
+        content = ''.join(chunks[start + 1:])
+        del chunks[start:]
+        resolved = _resolve_tag(content, inner_time) if resolvable else None
+        if resolved is None:
+            chunks.append('(' + content + ')')
+            if len(stack) > 0:
+                stack[-1][2] = False
+        else:
+            chunks.append(resolved[0])
+            if len(stack) > 0:
+                stack[-1][1] = max(stack[-1][1], resolved[1])
+    chunks.append(transcript[pos:])
+    return ''.join(chunks)
+
+
+def _resolve_tag(content, inner_time):
+    """
+    Args:
+        content (string): the content between brackets without inner tags
+        inner_time (tuple): (pass, rule) when the inner tags are resolved
+    Returns:
+        tuple of (string, tuple) of the resolved content and (pass, rule) of
+            the first rule which matches. None if no rule matches.
+    """
+    pass_index, rule_index = inner_time
+    resolved = None
+    for i, (expr, select) in enumerate(TAG_RULES, 1):
+        match = expr.match(content)
+        if match is None:
+            continue
+        time = (pass_index, i) if rule_index <= i else (pass_index + 1, i)
+        if resolved is None or time < resolved[1]:
+            resolved = (select(match), time)
+    return resolved
@@ -0,0 +1,37 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Read morpheme information in SDB files (CSJ corpus)."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import io
+
+# NOTE: indices of tab-separated fields
+TIME = 3  # Time information for segment
+WORD = 5  # Word
+PRON = 10  # Pronunciation for lexicon
+POS = 11  # Part Of Speech
+
+
+def read_sdb_lines(sdb_path):
+    """Read a SDB file line by line, and yield only fields for transcripts.
+    Args:
+        sdb_path (string): path to a SDB file (Shift-JIS)
+    Returns:
+        generator of tuples of (time, word, pos, pron)
+            time (string): `utterance index start time-end time`
+            word (string): a word
+            pos (string): part of speech. '' if not given.
+            pron (string): pronunciation (katakana)
+    """
+    with io.open(sdb_path, 'r', encoding='shift_jis') as f:
+        for line in f:
+            line = line.rstrip('\r\n')
+            if line == '':
+                continue
+            fields = line.split('\t')
+            pos = fields[POS] if len(fields) > POS else ''
+            yield fields[TIME], fields[WORD], pos, fields[PRON]
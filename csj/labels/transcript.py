@@ -9,17 +9,21 @@ from __future__ import print_function
 
 from os.path import join, basename
 import re
-import pandas as pd
+import numpy as np
 from tqdm import tqdm
 import jaconv
 from collections import OrderedDict
+from functools import partial
 
 from utils.labels.phone import Phone2idx
 from utils.labels.character import Char2idx
 from utils.labels.word import Word2idx
+from utils.labels.vocabulary import VocabularyBuilder
 from utils.util import mkdir_join
+from utils.parallel import imap_parallel
 from csj.labels.fix_trans import fix_transcript
 from csj.labels.fix_trans import is_hiragana, is_katakana
+from csj.labels.sdb import read_sdb_lines
 
 SPACE = '_'
 SIL = 'sil'
@@ -27,7 +31,7 @@ OOV = 'OOV'
 
 
 def read_sdb(label_paths, data_size, vocab_file_save_path, is_test=False,
-             save_vocab_file=False, data_type=None):
+             save_vocab_file=False, data_type=None, num_workers=1):
     """Read transcripts (.sdb) & save files (.npy).
     Args:
         label_paths (list): list of paths to label files
@@ -36,6 +40,8 @@ def read_sdb(label_paths, data_size, vocab_file_save_path, is_test=False,
         is_test (bool, optional): Set True if save as the test set
         save_vocab_file (bool, optional): if True, save vocabulary files
         data_type (string, optional): eval1 or eval2 or eval3
+        num_workers (int, optional): the number of processes to read SDB
+            files in parallel
     Returns:
         speaker_dict (dict): the dictionary of utterances of each speaker
             key (string) => speaker
@@ -65,150 +71,15 @@ def read_sdb(label_paths, data_size, vocab_file_save_path, is_test=False,
     print('=====> Reading target labels...')
     speaker_dict = OrderedDict()
     char_set = set([])
-    word_count_dict = {}
-    vocab_set = set([])
-    for label_path in tqdm(label_paths):
-        col_names = [j for j in range(25)]
-        df = pd.read_csv(label_path, names=col_names,
-                         encoding='SHIFT-JIS', delimiter='\t', header=None)
-
-        utt_dict = OrderedDict()
-        utt_index_pre = 1
-        start_frame_pre, end_frame_pre = None, None
-        trans_kana, trans_kanji, trans_pos = '', '', ''
-        speaker = basename(label_path).split('.')[0]
-        for key, row in df.iterrows():
-
-            # From kaldi
-            time = row[3]  # Time information for segment
-            word = row[5]  # Word
-            # num = row[9]  # Number and point
-            # About morpheme
-            if isinstance(row[11], str):
-                pos = row[11]  # Part Of Speech
-            else:
-                pos = ''
-            # acf = row[12]  # A Conjugated Form
-            # kacf = row[13]  # Kind of A Conjugated Form
-            # kav = row[14]  # Kind of Aulxiliary Verb
-            # ec = row[15]  # Euphonic Change
-            # other = row[16]  # Other information
-            pron = row[10]  # Pronunciation for lexicon
-
-            utt_index = int(time.split(' ')[0])
-            segment = time.split(' ')[1].split('-')
-            start_frame = int(float(segment[0]) * 100 + 0.5)
-            end_frame = int(float(segment[1]) * 100 + 0.5)
-            if start_frame_pre is None:
-                start_frame_pre = start_frame
-            if end_frame_pre is None:
-                end_frame_pre = end_frame
-
-            # Stack word in the same utterance
-            if utt_index == utt_index_pre:
-                trans_kanji += word + ' '
-                trans_kana += pron + ' '
-                if pos != '':
-                    trans_pos += pos + ' '
-                utt_index_pre = utt_index
-                end_frame_pre = end_frame
-                continue
-
-            # Count the number of brackets
-            if trans_kanji.count('(') != trans_kanji.count(')'):
-                trans_kanji += word + ' '
-                trans_kana += pron + ' '
-                if pos != '':
-                    trans_pos += pos + ' '
-                utt_index_pre = utt_index
-                end_frame_pre = end_frame
-                continue
-
-            if trans_kana.count('(') != trans_kana.count(')'):
-                trans_kanji += word + ' '
-                trans_kana += pron + ' '
-                if pos != '':
-                    trans_pos += pos + ' '
-                utt_index_pre = utt_index
-                end_frame_pre = end_frame
-                continue
-
-            # if '<P:' in trans_kana:
-            #     print(label_path)
-            #     print(trans_kanji)
-            #     print(trans_kana)
-
-            # Clean transcript
-            trans_kanji = fix_transcript(trans_kanji)
-            trans_kana = fix_transcript(trans_kana)
-
-            # Remove double space
-            while '  ' in trans_kanji:
-                trans_kanji = re.sub(r'[\s]+', ' ', trans_kanji)
-            while '  ' in trans_kana:
-                trans_kana = re.sub(r'[\s]+', ' ', trans_kana)
-            while '  ' in trans_pos:
-                trans_pos = re.sub(r'[\s]+', ' ', trans_pos)
-
-            # Skip silence only utterance
-            if trans_kanji.replace(' ', '') != '' and len(trans_pos) > 0:
-
-                # Remove the first and last space
-                if len(trans_kanji) > 0 and trans_kanji[0] == ' ':
-                    trans_kanji = trans_kanji[1:]
-                if len(trans_kana) > 0 and trans_kana[0] == ' ':
-                    trans_kana = trans_kana[1:]
-                if len(trans_kanji) > 0 and trans_kanji[-1] == ' ':
-                    trans_kanji = trans_kanji[:-1]
-                if len(trans_kana) > 0 and trans_kana[-1] == ' ':
-                    trans_kana = trans_kana[:-1]
-
-                # Convert space to "_"
-                trans_kanji = re.sub(r'\s', SPACE, trans_kanji)
-                trans_kana = re.sub(r'\s', SPACE, trans_kana)
-
-                # For exception
-                if trans_kana[0:2] == 'Z_':
-                    trans_kana = trans_kana[2:]
-
-                for c in list(trans_kanji):
-                    char_set.add(c)
-
-                # Count words
-                word_list = trans_kanji.split(SPACE)
-                for w in word_list:
-                    vocab_set.add(w)
-                    if w not in word_count_dict.keys():
-                        word_count_dict[w] = 0
-                    word_count_dict[w] += 1
-
-                # Convert kana character to phone
-                trans_phone = ' '.join(
-                    kana2phone(trans_kana, kana2phone_dict))
-
-                utt_dict[str(utt_index - 1).zfill(4)] = [
-                    start_frame_pre, end_frame_pre,
-                    trans_kanji, trans_kana, trans_phone]
-
-                # for debug
-                # print(trans_kanji)
-                # print(trans_kana)
-                # print(trans_phone)
-                # print('-----')
-
-            # Initialization
-            trans_kanji = word + ' '
-            trans_kana = pron + ' '
-            if pos == '':
-                trans_pos = ''
-            else:
-                trans_pos = pos + ' '
-            utt_index_pre = utt_index
-            start_frame_pre = start_frame
-            end_frame_pre = end_frame
-
-        # Register all utterances of each speaker
+    vocab_builder = VocabularyBuilder()
+    func = partial(_read_speaker, kana2phone_dict=kana2phone_dict)
+    label_paths = list(label_paths)
+    for speaker, utt_dict, char_set_speaker, vocab_builder_speaker in tqdm(
+            imap_parallel(func, label_paths, num_workers),
+            total=len(label_paths)):
         speaker_dict[speaker] = utt_dict
+        char_set |= char_set_speaker
+        vocab_builder.merge(vocab_builder_speaker)
 
     # Make vocabulary files
     kanji_vocab_file_path = mkdir_join(
@@ -231,6 +102,8 @@ def read_sdb(label_paths, data_size, vocab_file_save_path, is_test=False,
         vocab_file_save_path, 'word_freq10_' + data_size + '.txt')
     word_freq15_vocab_file_path = mkdir_join(
         vocab_file_save_path, 'word_freq15_' + data_size + '.txt')
+    word_count_file_path = mkdir_join(
+        vocab_file_save_path, 'word_count_' + data_size + '.txt')
 
     # Reserve some indices
     char_set.discard(SPACE)
@@ -270,60 +143,33 @@ def read_sdb(label_paths, data_size, vocab_file_save_path, is_test=False,
             for phone in phone_list + [SIL]:
                 f_div.write('%s\n' % phone)
 
-        # word-level (threshold == 1)
-        with open(word_freq1_vocab_file_path, 'w') as f:
-            vocab_list = sorted(list(vocab_set)) + [OOV]
-            for word in vocab_list:
-                f.write('%s\n' % word)
-
-        # word-level (threshold == 5)
-        with open(word_freq5_vocab_file_path, 'w') as f:
-            vocab_list = sorted([word for word, freq in list(word_count_dict.items())
-                                 if freq >= 5]) + [OOV]
-            for word in vocab_list:
-                f.write('%s\n' % word)
-
-        # word-level (threshold == 10)
-        with open(word_freq10_vocab_file_path, 'w') as f:
-            vocab_list = sorted([word for word, freq in list(word_count_dict.items())
-                                 if freq >= 10]) + [OOV]
-            for word in vocab_list:
-                f.write('%s\n' % word)
-
-        # word-level (threshold == 15)
-        with open(word_freq15_vocab_file_path, 'w') as f:
-            vocab_list = sorted([word for word, freq in list(word_count_dict.items())
-                                 if freq >= 15]) + [OOV]
-            for word in vocab_list:
-                f.write('%s\n' % word)
+        # word-level (threshold == 1, 5, 10, 15)
+        vocab_builder.save(OrderedDict([
+            (1, word_freq1_vocab_file_path),
+            (5, word_freq5_vocab_file_path),
+            (10, word_freq10_vocab_file_path),
+            (15, word_freq15_vocab_file_path)]), oov=OOV)
+        vocab_builder.save_counts(word_count_file_path)
 
     # Compute OOV rate
     if is_test:
+        # NOTE: vocabulary files are used if word counts have been not saved
+        vocab_builder_train = VocabularyBuilder.load_counts(
+            word_count_file_path, OrderedDict([
+                (1, word_freq1_vocab_file_path),
+                (5, word_freq5_vocab_file_path),
+                (10, word_freq10_vocab_file_path),
+                (15, word_freq15_vocab_file_path)]))
         with open(join(vocab_file_save_path, '../oov_rate_' + data_type + '_' + data_size + '.txt'), 'w') as f:
 
-            # word-level (threshold == 1)
-            oov_rate = compute_oov_rate(
-                speaker_dict, word_freq1_vocab_file_path)
-            f.write('Word (freq1):\n')
-            f.write('  OOV rate (test): %f %%\n' % oov_rate)
-
-            # word-level (threshold == 5)
-            oov_rate = compute_oov_rate(
-                speaker_dict, word_freq5_vocab_file_path)
-            f.write('Word (freq5):\n')
-            f.write('  OOV rate (test): %f %%\n' % oov_rate)
-
-            # word-level (threshold == 10)
-            oov_rate = compute_oov_rate(
-                speaker_dict, word_freq10_vocab_file_path)
-            f.write('Word (freq10):\n')
-            f.write('  OOV rate (test): %f %%\n' % oov_rate)
-
-            # word-level (threshold == 15)
-            oov_rate = compute_oov_rate(
-                speaker_dict, word_freq15_vocab_file_path)
-            f.write('Word (freq15):\n')
-            f.write('  OOV rate (test): %f %%\n' % oov_rate)
+            # word-level (threshold == 1, 5, 10, 15)
+            oov_rate_dict = vocab_builder_train.oov_rates(
+                (utt_info[2].split(SPACE) for utt_dict in speaker_dict.values()
+                 for utt_info in utt_dict.values()),
+                [1, 5, 10, 15])
+            for threshold, oov_rate in oov_rate_dict.items():
+                f.write('Word (freq%d):\n' % threshold)
+                f.write('  OOV rate (test): %f %%\n' % oov_rate)
 
     # Tokenize
     print('=====> Tokenize...')
@@ -337,6 +183,23 @@ def read_sdb(label_paths, data_size, vocab_file_save_path, is_test=False,
     word2idx_freq5 = Word2idx(word_freq5_vocab_file_path)
     word2idx_freq10 = Word2idx(word_freq10_vocab_file_path)
     word2idx_freq15 = Word2idx(word_freq15_vocab_file_path)
+    if not is_test:
+        # Convert characters of all utterances at once
+        trans_kanji_list, trans_kana_list = [], []
+        for utt_dict in speaker_dict.values():
+            for utt_info in utt_dict.values():
+                trans_kanji_list.append(utt_info[2])
+                trans_kana_list.append(utt_info[3])
+        indices_iter_list = []
+        for char2idx, trans_list, remove_space in [
+                (kanji2idx, trans_kanji_list, True),
+                (kanji2idx_div, trans_kanji_list, False),
+                (kana2idx, trans_kana_list, True),
+                (kana2idx_div, trans_kana_list, False)]:
+            if remove_space:
+                trans_list = [trans.replace(SPACE, '') for trans in trans_list]
+            values, offsets = char2idx.tokenize_batch(trans_list)
+            indices_iter_list.append(iter(np.split(values, offsets[1:-1])))
     for speaker, utt_dict in tqdm(speaker_dict.items()):
         for utt_index, utt_info in utt_dict.items():
             start_frame, end_frame, trans_kanji, trans_kana, trans_phone = utt_info
@@ -349,10 +212,8 @@ def read_sdb(label_paths, data_size, vocab_file_save_path, is_test=False,
                         '  ', ' '), trans_phone,
                     trans_kanji, trans_kanji, trans_kanji, trans_kanji]
             else:
-                kanji_indices = kanji2idx(trans_kanji.replace(SPACE, ''))
-                kanji_div_indices = kanji2idx_div(trans_kanji)
-                kana_indices = kana2idx(trans_kana.replace(SPACE, ''))
-                kana_div_indices = kana2idx_div(trans_kana)
+                kanji_indices, kanji_div_indices, kana_indices, kana_div_indices = [
+                    next(indices_iter) for indices_iter in indices_iter_list]
                 phone_indices = phone2idx(
                     trans_phone.replace(SIL, '').replace('  ', ' '))
                 phone_div_indices = phone2idx_div(trans_phone)
@@ -361,17 +222,6 @@ def read_sdb(label_paths, data_size, vocab_file_save_path, is_test=False,
                 word_freq10_indices = word2idx_freq10(trans_kanji)
                 word_freq15_indices = word2idx_freq15(trans_kanji)
 
-                kanji_indices = int2str(kanji_indices)
-                kanji_div_indices = int2str(kanji_div_indices)
-                kana_indices = int2str(kana_indices)
-                kana_div_indices = int2str(kana_div_indices)
-                phone_indices = int2str(phone_indices)
-                phone_div_indices = int2str(phone_div_indices)
-                word_freq1_indices = int2str(word_freq1_indices)
-                word_freq5_indices = int2str(word_freq5_indices)
-                word_freq10_indices = int2str(word_freq10_indices)
-                word_freq15_indices = int2str(word_freq15_indices)
-
                 utt_dict[utt_index] = [
                     start_frame, end_frame,
                     kanji_indices, kanji_div_indices,
@@ -385,8 +235,137 @@ def read_sdb(label_paths, data_size, vocab_file_save_path, is_test=False,
     return speaker_dict
 
 
-def int2str(indices):
-    return' '.join(list(map(str, indices.tolist())))
+def _read_speaker(label_path, kana2phone_dict):
+    """Read utterances in a SDB file of a speaker.
+    Args:
+        label_path (string): path to a SDB file
+        kana2phone_dict (dict): mapping dictionary from kana to phone
+    Returns:
+        speaker (string): speaker name
+        utt_dict (OrderedDict): the dictionary of utterance information
+            key (string) => utterance index
+            value (list) => [start_frame, end_frame,
+                            trans_kanji, trans_kana, trans_phone]
+        char_set (set): characters in kanji transcripts
+        vocab_builder (VocabularyBuilder): word counts
+    """
+    char_set = set([])
+    vocab_builder = VocabularyBuilder()
+    utt_dict = OrderedDict()
+    utt_index_pre = 1
+    start_frame_pre, end_frame_pre = None, None
+    trans_kana, trans_kanji, trans_pos = '', '', ''
+    speaker = basename(label_path).split('.')[0]
+    for time, word, pos, pron in read_sdb_lines(label_path):
+
+        utt_index = int(time.split(' ')[0])
+        segment = time.split(' ')[1].split('-')
+        start_frame = int(float(segment[0]) * 100 + 0.5)
+        end_frame = int(float(segment[1]) * 100 + 0.5)
+        if start_frame_pre is None:
+            start_frame_pre = start_frame
+        if end_frame_pre is None:
+            end_frame_pre = end_frame
+
+        # Stack word in the same utterance
+        if utt_index == utt_index_pre:
+            trans_kanji += word + ' '
+            trans_kana += pron + ' '
+            if pos != '':
+                trans_pos += pos + ' '
+            utt_index_pre = utt_index
+            end_frame_pre = end_frame
+            continue
+
+        # Count the number of brackets
+        if trans_kanji.count('(') != trans_kanji.count(')'):
+            trans_kanji += word + ' '
+            trans_kana += pron + ' '
+            if pos != '':
+                trans_pos += pos + ' '
+            utt_index_pre = utt_index
+            end_frame_pre = end_frame
+            continue
+
+        if trans_kana.count('(') != trans_kana.count(')'):
+            trans_kanji += word + ' '
+            trans_kana += pron + ' '
+            if pos != '':
+                trans_pos += pos + ' '
+            utt_index_pre = utt_index
+            end_frame_pre = end_frame
+            continue
+
+        # if '<P:' in trans_kana:
+        #     print(label_path)
+        #     print(trans_kanji)
+        #     print(trans_kana)
+
+        # Clean transcript
+        trans_kanji = fix_transcript(trans_kanji)
+        trans_kana = fix_transcript(trans_kana)
+
+        # Remove double space
+        while '  ' in trans_kanji:
+            trans_kanji = re.sub(r'[\s]+', ' ', trans_kanji)
+        while '  ' in trans_kana:
+            trans_kana = re.sub(r'[\s]+', ' ', trans_kana)
+        while '  ' in trans_pos:
+            trans_pos = re.sub(r'[\s]+', ' ', trans_pos)
+
+        # Skip silence only utterance
+        if trans_kanji.replace(' ', '') != '' and len(trans_pos) > 0:
+
+            # Remove the first and last space
+            if len(trans_kanji) > 0 and trans_kanji[0] == ' ':
+                trans_kanji = trans_kanji[1:]
+            if len(trans_kana) > 0 and trans_kana[0] == ' ':
+                trans_kana = trans_kana[1:]
+            if len(trans_kanji) > 0 and trans_kanji[-1] == ' ':
+                trans_kanji = trans_kanji[:-1]
+            if len(trans_kana) > 0 and trans_kana[-1] == ' ':
+                trans_kana = trans_kana[:-1]
+
+            # Convert space to "_"
+            trans_kanji = re.sub(r'\s', SPACE, trans_kanji)
+            trans_kana = re.sub(r'\s', SPACE, trans_kana)
+
+            # For exception
+            if trans_kana[0:2] == 'Z_':
+                trans_kana = trans_kana[2:]
+
+            for c in list(trans_kanji):
+                char_set.add(c)
+
+            # Count words
+            vocab_builder.add(trans_kanji.split(SPACE))
+
+            # Convert kana character to phone
+            trans_phone = ' '.join(
+                kana2phone(trans_kana, kana2phone_dict))
+
+            utt_dict[str(utt_index - 1).zfill(4)] = [
+                start_frame_pre, end_frame_pre,
+                trans_kanji, trans_kana, trans_phone]
+
+            # for debug
+            # print(trans_kanji)
+            # print(trans_kana)
+            # print(trans_phone)
+            # print('-----')
+
+        # Initialization
+        trans_kanji = word + ' '
+        trans_kana = pron + ' '
+        if pos == '':
+            trans_pos = ''
+        else:
+            trans_pos = pos + ' '
+        utt_index_pre = utt_index
+        start_frame_pre = start_frame
+        end_frame_pre = end_frame
+
+    return speaker, utt_dict, char_set, vocab_builder
 
 
 def kana2phone(trans_kana, kana2phone_dict):
@@ -420,27 +399,3 @@ def kana2phone(trans_kana, kana2phone_dict):
 
     return trans_phone_list
 
-
-def compute_oov_rate(speaker_dict, vocab_file_path):
-
-    with open(vocab_file_path, 'r') as f:
-        vocab_set = set([])
-        for line in f:
-            word = line.strip()
-            vocab_set.add(word)
-
-    oov_count = 0
-    word_num = 0
-    for speaker_dict, utt_dict in speaker_dict.items():
-        for utt_name, utt_info in utt_dict.items():
-            trans_kanji = utt_info[2]
-            word_list = trans_kanji.split(SPACE)
-            word_num += len(word_list)
-
-            for word in word_list:
-                if word not in vocab_set:
-                    oov_count += 1
-
-    oov_rate = oov_count * 100 / word_num
-
-    return oov_rate
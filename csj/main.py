@@ -12,9 +12,9 @@ from __future__ import print_function
 from os.path import join, isfile
 import sys
 import argparse
+from collections import OrderedDict
 from tqdm import tqdm
 import numpy as np
-import pandas as pd
 import pickle
 
 sys.path.append('../')
@@ -22,8 +22,9 @@ from csj.path import Path
 from csj.input_data import read_audio
 from csj.labels.transcript import read_sdb
 from utils.util import mkdir_join
+from utils.inputs.archive import ArchiveReader
 from utils.inputs.wav_split import split_wav
-from utils.dataset import add_element
+from utils.dataset import MultiLabelManifest
 
 parser = argparse.ArgumentParser()
 parser.add_argument('--data_path', type=str, help='path to CSJ dataset')
@@ -34,11 +35,13 @@ parser.add_argument('--feature_save_path', type=str,
 parser.add_argument('--wav_save_path', type=str,
                     help='path to save wav files (per utterance)')
 parser.add_argument('--tool', type=str,
-                    choices=['htk', 'python_speech_features', 'librosa'])
+                    choices=['htk', 'python_speech_features', 'librosa',
+                             'numpy'])
 parser.add_argument('--htk_save_path', type=str, help='path to save features')
 parser.add_argument('--normalize', type=str,
                     choices=['global', 'speaker', 'utterance', 'no'])
-parser.add_argument('--save_format', type=str, choices=['numpy', 'htk', 'wav'])
+parser.add_argument('--save_format', type=str,
+                    choices=['numpy', 'htk', 'archive', 'wav'])
 
 parser.add_argument('--feature_type', type=str, choices=['fbank', 'mfcc'])
 parser.add_argument('--channels', type=int,
@@ -54,6 +57,11 @@ parser.add_argument('--subset', type=int,
                     help='If True, create small dataset.')
 parser.add_argument('--fullset', type=int,
                     help='If True, create full-size dataset.')
+parser.add_argument('--num_workers', type=int, default=1,
+                    help='the number of processes to extract features')
+parser.add_argument('--window_limited', type=int, default=0,
+                    help='if 1, read only samples of utterances from audio '
+                    'files (only for numpy).')
 
 args = parser.parse_args()
 path = Path(data_path=args.data_path,
@@ -100,7 +108,8 @@ def main(data_size):
             vocab_file_save_path=mkdir_join('./config', 'vocab_files'),
             save_vocab_file=save_vocab_file,
             is_test=is_test,
-            data_type=data_type)
+            data_type=data_type,
+            num_workers=args.num_workers)
 
         ########################################
         # inputs
@@ -126,7 +135,7 @@ def main(data_size):
                 # NOTE: ex.) save_path:
                 # csj/feature/save_format/data_size/data_type/speaker/utt_name.npy
 
-            elif args.save_format in ['numpy', 'htk']:
+            elif args.save_format in ['numpy', 'htk', 'archive']:
                 if data_type == 'train':
                     if args.tool == 'htk':
                         audio_paths = path.htk(data_type='train_' + data_size)
@@ -162,7 +171,9 @@ def main(data_size):
                            global_mean_male=global_mean_male,
                            global_std_male=global_std_male,
                            global_mean_female=global_mean_female,
-                           global_std_female=global_std_female)
+                           global_std_female=global_std_female,
+                           num_workers=args.num_workers,
+                           window_limited=bool(args.window_limited))
                 # NOTE: ex.) save_path:
                 # csj/feature/save_format/data_size/data_type/speaker/*.npy
 
@@ -178,27 +189,20 @@ def main(data_size):
         dataset_save_path = mkdir_join(
             args.dataset_save_path, args.save_format, data_size, data_type)
 
-        df_columns = ['frame_num', 'input_path', 'transcript']
-        df_kanji = pd.DataFrame([], columns=df_columns)
-        df_kanji_divide = pd.DataFrame([], columns=df_columns)
-        df_kana = pd.DataFrame([], columns=df_columns)
-        df_kana_divide = pd.DataFrame([], columns=df_columns)
-        df_phone = pd.DataFrame([], columns=df_columns)
-        df_phone_divide = pd.DataFrame([], columns=df_columns)
-        df_word_freq1 = pd.DataFrame([], columns=df_columns)
-        df_word_freq5 = pd.DataFrame([], columns=df_columns)
-        df_word_freq10 = pd.DataFrame([], columns=df_columns)
-        df_word_freq15 = pd.DataFrame([], columns=df_columns)
+        label_types = ['kanji', 'kanji_divide', 'kana', 'kana_divide',
+                       'phone', 'phone_divide', 'word_freq1', 'word_freq5',
+                       'word_freq10', 'word_freq15']
+        manifest = MultiLabelManifest(OrderedDict(
+            [(label_type, join(dataset_save_path, label_type + '.csv'))
+             for label_type in label_types]),
+            binary_save_path=join(dataset_save_path, 'dataset.npz'))
 
         with open(join(input_save_path, data_type, 'frame_num.pickle'), 'rb') as f:
             frame_num_dict = pickle.load(f)
 
-        utt_count = 0
-        df_kanji_list, df_kanji_divide_list = [], []
-        df_kana_list,  df_kana_divide_list = [], []
-        df_phone_list, df_phone_divide_list = [], []
-        df_word_freq1_list, df_word_freq5_list = [], []
-        df_word_freq10_list, df_word_freq15_list = [], []
+        if args.save_format == 'archive':
+            archive_reader = ArchiveReader(join(input_save_path, data_type))
+
         speaker_dict = speaker_dict_dict[data_type]
         for speaker, utt_dict in tqdm(speaker_dict.items()):
             for utt_index, utt_info in utt_dict.items():
@@ -214,116 +218,25 @@ def main(data_size):
                 elif args.save_format == 'htk':
                     input_utt_save_path = join(
                         input_save_path, data_type, speaker, speaker + '_' + utt_index + '.htk')
+                elif args.save_format == 'archive':
+                    input_utt_save_path = archive_reader.specifier(speaker + '_' + utt_index)
                 elif args.save_format == 'wav':
                     input_utt_save_path = path.utt2wav(utt_index)
                 else:
-                    raise ValueError('save_format is numpy or htk or wav.')
+                    raise ValueError('save_format is numpy or htk or archive or wav.')
 
-                assert isfile(input_utt_save_path)
+                if args.save_format != 'archive':
+                    assert isfile(input_utt_save_path)
                 frame_num = frame_num_dict[speaker + '_' + utt_index]
 
-                df_kanji = add_element(
-                    df_kanji, [frame_num, input_utt_save_path, kanji_indices])
-                df_kanji_divide = add_element(
-                    df_kanji_divide, [frame_num, input_utt_save_path, kanji_divide_indices])
-                df_kana = add_element(
-                    df_kana, [frame_num, input_utt_save_path, kana_indices])
-                df_kana_divide = add_element(
-                    df_kana_divide, [frame_num, input_utt_save_path, kana_divide_indices])
-                df_phone = add_element(
-                    df_phone, [frame_num, input_utt_save_path, phone_indices])
-                df_phone_divide = add_element(
-                    df_phone_divide, [frame_num, input_utt_save_path, phone_divide_indices])
-                df_word_freq1 = add_element(
-                    df_word_freq1, [frame_num, input_utt_save_path, word_freq1_indices])
-                df_word_freq5 = add_element(
-                    df_word_freq5, [frame_num, input_utt_save_path, word_freq5_indices])
-                df_word_freq10 = add_element(
-                    df_word_freq10, [frame_num, input_utt_save_path, word_freq10_indices])
-                df_word_freq15 = add_element(
-                    df_word_freq15, [frame_num, input_utt_save_path, word_freq15_indices])
-                utt_count += 1
-
-                # Reset
-                if utt_count == 10000:
-                    df_kanji_list.append(df_kanji)
-                    df_kanji_divide_list.append(df_kanji_divide)
-                    df_kana_list.append(df_kana)
-                    df_kana_divide_list.append(df_kana_divide)
-                    df_phone_list.append(df_phone)
-                    df_phone_divide_list.append(df_phone_divide)
-                    df_word_freq1_list.append(df_word_freq1)
-                    df_word_freq5_list.append(df_word_freq5)
-                    df_word_freq10_list.append(df_word_freq10)
-                    df_word_freq15_list.append(df_word_freq15)
-
-                    df_kanji = pd.DataFrame([], columns=df_columns)
-                    df_kanji_divide = pd.DataFrame([], columns=df_columns)
-                    df_kana = pd.DataFrame([], columns=df_columns)
-                    df_kana_divide = pd.DataFrame([], columns=df_columns)
-                    df_phone = pd.DataFrame([], columns=df_columns)
-                    df_phone_divide = pd.DataFrame([], columns=df_columns)
-                    df_word_freq1 = pd.DataFrame([], columns=df_columns)
-                    df_word_freq5 = pd.DataFrame([], columns=df_columns)
-                    df_word_freq10 = pd.DataFrame([], columns=df_columns)
-                    df_word_freq15 = pd.DataFrame([], columns=df_columns)
-                    utt_count = 0
-
-        # Last dataframe
-        df_kanji_list.append(df_kanji)
-        df_kanji_divide_list.append(df_kanji_divide)
-        df_kana_list.append(df_kana)
-        df_kana_divide_list.append(df_kana_divide)
-        df_phone_list.append(df_phone)
-        df_phone_divide_list.append(df_phone_divide)
-        df_word_freq1_list.append(df_word_freq1)
-        df_word_freq5_list.append(df_word_freq5)
-        df_word_freq10_list.append(df_word_freq10)
-        df_word_freq15_list.append(df_word_freq15)
-
-        # Concatenate all dataframes
-        df_kanji = df_kanji_list[0]
-        df_kanji_divide = df_kanji_divide_list[0]
-        df_kana = df_kana_list[0]
-        df_kana_divide = df_kana_divide_list[0]
-        df_phone = df_phone_list[0]
-        df_phone_divide = df_phone_divide_list[0]
-        df_word_freq1 = df_word_freq1_list[0]
-        df_word_freq5 = df_word_freq5_list[0]
-        df_word_freq10 = df_word_freq10_list[0]
-        df_word_freq15 = df_word_freq15_list[0]
-
-        for df_i in df_kanji_list[1:]:
-            df_kanji = pd.concat([df_kanji, df_i], axis=0)
-        for df_i in df_kanji_divide_list[1:]:
-            df_kanji_divide = pd.concat([df_kanji_divide, df_i], axis=0)
-        for df_i in df_kana_list[1:]:
-            df_kana = pd.concat([df_kana, df_i], axis=0)
-        for df_i in df_kana_divide_list[1:]:
-            df_kana_divide = pd.concat([df_kana_divide, df_i], axis=0)
-        for df_i in df_phone_list[1:]:
-            df_phone = pd.concat([df_phone, df_i], axis=0)
-        for df_i in df_phone_divide_list[1:]:
-            df_phone_divide = pd.concat([df_phone_divide, df_i], axis=0)
-        for df_i in df_word_freq1_list[1:]:
-            df_word_freq1 = pd.concat([df_word_freq1, df_i], axis=0)
-        for df_i in df_word_freq5_list[1:]:
-            df_word_freq5 = pd.concat([df_word_freq5, df_i], axis=0)
-        for df_i in df_word_freq10_list[1:]:
-            df_word_freq10 = pd.concat([df_word_freq10, df_i], axis=0)
-        for df_i in df_word_freq15_list[1:]:
-            df_word_freq15 = pd.concat([df_word_freq15, df_i], axis=0)
-
-        df_kanji.to_csv(join(dataset_save_path, 'kanji.csv'))
-        df_kanji_divide.to_csv(join(dataset_save_path, 'kanji_divide.csv'))
-        df_kana.to_csv(join(dataset_save_path, 'kana.csv'))
-        df_kana_divide.to_csv(join(dataset_save_path, 'kana_divide.csv'))
-        df_phone.to_csv(join(dataset_save_path, 'phone.csv'))
-        df_phone_divide.to_csv(join(dataset_save_path, 'phone_divide.csv'))
-        df_word_freq1.to_csv(join(dataset_save_path, 'word_freq1.csv'))
-        df_word_freq5.to_csv(join(dataset_save_path, 'word_freq5.csv'))
-        df_word_freq10.to_csv(join(dataset_save_path, 'word_freq10.csv'))
-        df_word_freq15.to_csv(join(dataset_save_path, 'word_freq15.csv'))
+                manifest.add(frame_num, input_utt_save_path,
+                             [kanji_indices, kanji_divide_indices,
+                              kana_indices, kana_divide_indices,
+                              phone_indices, phone_divide_indices,
+                              word_freq1_indices, word_freq5_indices,
+                              word_freq10_indices, word_freq15_indices])
+
+        manifest.save()
 
 
 if __name__ == '__main__':
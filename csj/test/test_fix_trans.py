@@ -0,0 +1,131 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import sys
+import re
+import random
+import unittest
+from os.path import isdir
+
+sys.path.append('../../')
+from csj.path import Path
+from csj.labels.sdb import read_sdb_lines
+from csj.labels.fix_trans import fix_transcript
+from csj.labels.regular_expression import remove_tags
+from csj.labels.regular_expression import remove_pause
+from csj.labels.regular_expression import remove_question_which
+from csj.labels.regular_expression import remove_question
+from csj.labels.regular_expression import remove_Btag
+from csj.labels.regular_expression import remove_disfluency
+from csj.labels.regular_expression import remove_filler
+from csj.labels.regular_expression import remove_Xtag
+from csj.labels.regular_expression import remove_Atag
+from csj.labels.regular_expression import remove_Ktag
+from csj.labels.regular_expression import remove_cry
+from csj.labels.regular_expression import remove_cough
+from csj.labels.regular_expression import remove_which
+from csj.labels.regular_expression import remove_Ltag
+from csj.labels.regular_expression import remove_laughing
+from csj.labels.regular_expression import remove_Otag
+from csj.labels.regular_expression import remove_Mtag
+
+DATA_PATH = '/n/sd8/inaguma/corpus/csj/data'
+
+SAMPLES = [
+    '(F えー) 今日 は <P:00012.345-00013.000> (D こ) 今年 の',
+    '(F エー) キョー ワ <P:00012.345-00013.000> (D コ) コトシ ノ',
+    '(D2 の) (? 等,十,当) (? えっと) ?',
+    '(W ワタシ;ワタクシ) (B ジュンイツ;ジュンイチ) (A エービーシー;ＡＢＣ)',
+    '(K キ;キイ) (L 独り言) (M あ) (O ハロー) (X 間違い) <H> <Q> <>',
+    '(泣 (F あの)) (咳 (D え)) (笑 (W ソー;ソウ)) (F (D え))',
+    '(? (W ア;アノ),エ,エー) (? (F (W ア;アノ)),エ) (? (A a;b),c)',
+    '(? (D (W ア;アノ)),エ,エー) (F  ) (D2  ;) (B  ;x) (? ,a) (? a,b,)',
+    '(J 不明) ((F F) a) (W ア) (F a (F b) c) ) (F',
+]
+
+
+def fix_transcript_loop(transcript):
+    """Decompose hierarchical structure as fix_transcript() did before."""
+    for _ in range(transcript.count('(') + transcript.count('<')):
+        transcript = remove_pause(transcript)
+        transcript = remove_question(transcript)
+        transcript = remove_which(transcript)
+        transcript = remove_question_which(transcript)
+
+        transcript = remove_cry(transcript)
+        transcript = remove_cough(transcript)
+        transcript = remove_laughing(transcript)
+        transcript = remove_filler(transcript)
+        transcript = remove_disfluency(transcript)
+
+        transcript = remove_Atag(transcript)
+        transcript = remove_Btag(transcript)
+        transcript = remove_Ktag(transcript)
+        transcript = remove_Ltag(transcript)
+        transcript = remove_Mtag(transcript)
+        transcript = remove_Otag(transcript)
+        transcript = remove_Xtag(transcript)
+    return transcript
+
+
+def random_transcript(depth=0):
+    tokens = []
+    for _ in range(random.randint(1, 4)):
+        r = random.random()
+        if r < 0.4 and depth < 4:
+            tag = random.choice(['F', 'D', 'D2', '?', 'W', 'A', 'B', 'K',
+                                 'L', 'M', 'O', 'X', '泣', '咳', '笑', 'J'])
+            tokens.append('(' + tag + random.choice([' ', '  ']) +
+                          random_transcript(depth + 1) + ')')
+        elif r < 0.5:
+            tokens.append('<P:00001.000-00002.500>')
+        else:
+            tokens.append(random.choice(
+                ['あ', 'えー', 'ア', ',', ';', 'a;b', 'a,b', ' ', '<H>']))
+    return random.choice([' ', '']).join(tokens)
+
+
+class TestFixTrans(unittest.TestCase):
+
+    def test(self):
+
+        for transcript in SAMPLES:
+            self.assertEqual(remove_tags(transcript),
+                             fix_transcript_loop(transcript))
+
+        random.seed(1)
+        for _ in range(3000):
+            transcript = random_transcript()
+            self.assertEqual(remove_tags(transcript),
+                             fix_transcript_loop(transcript))
+
+    @unittest.skipUnless(isdir(DATA_PATH), 'CSJ corpus is not found.')
+    def test_sdb(self):
+
+        path = Path(data_path=DATA_PATH, config_path='../config')
+        for data_type in ['train_fullset', 'eval1', 'eval2', 'eval3']:
+            for label_path in path.trans(data_type=data_type):
+                trans_dict = {}
+                for time, word, pos, pron in read_sdb_lines(label_path):
+                    utt_index = time.split(' ')[0]
+                    trans_dict.setdefault((utt_index, 'kanji'), []).append(word)
+                    trans_dict.setdefault((utt_index, 'kana'), []).append(pron)
+                for word_list in trans_dict.values():
+                    transcript = ' '.join(word_list)
+                    transcript = re.sub(r'\(\?\)', '?', transcript)
+                    self.assertEqual(remove_tags(transcript),
+                                     fix_transcript_loop(transcript))
+
+    def test_fix_transcript(self):
+
+        self.assertEqual(fix_transcript('(F えー) (? 等,十,当) <FV>'),
+                         'えー 等 ')
+        self.assertEqual(fix_transcript('(R ×××)'), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
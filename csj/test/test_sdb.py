@@ -0,0 +1,47 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import sys
+import io
+import unittest
+import tempfile
+from os.path import join
+import pandas as pd
+
+sys.path.append('../../')
+from csj.labels.sdb import read_sdb_lines
+
+
+class TestSDB(unittest.TestCase):
+
+    def test(self):
+
+        sdb_path = join(tempfile.mkdtemp(), 'A01M0001.sdb')
+        rows = [('0001 00000.000-00000.300', '今日', 'キョウ', '名詞'),
+                ('0001 00000.300-00000.600', '(F えー)', '(F エー)', ''),
+                ('0002 00001.000-00001.400', '天気', 'テンキ', '名詞')]
+        with io.open(sdb_path, 'w', encoding='shift_jis') as f:
+            for time, word, pron, pos in rows:
+                fields = [''] * 25
+                fields[3], fields[5], fields[10], fields[11] = \
+                    time, word, pron, pos
+                f.write('\t'.join(fields) + '\n')
+
+        # Compare with pandas
+        df = pd.read_csv(sdb_path, names=list(range(25)),
+                         encoding='SHIFT-JIS', delimiter='\t', header=None)
+        result = list(read_sdb_lines(sdb_path))
+        self.assertEqual(len(result), len(df))
+        for (time, word, pos, pron), (_, row) in zip(result, df.iterrows()):
+            self.assertEqual(time, row[3])
+            self.assertEqual(word, row[5])
+            self.assertEqual(pron, row[10])
+            self.assertEqual(pos, row[11] if isinstance(row[11], str) else '')
+
+
+if __name__ == '__main__':
+    unittest.main()
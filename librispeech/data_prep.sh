@@ -12,6 +12,7 @@ HCOPY_PATH='/home/lab5/inaguma/htk-3.4/bin/HCopy'
 TOOL='htk'
 # TOOL='python_speech_features'
 # TOOL='librosa'
+# TOOL='numpy'
 # TOOL='kaldi'  # under implementation
 
 ### Configuration (Set by yourself)
@@ -30,9 +31,13 @@ NORMALIZE='speaker'
 
 SAVE_FORMAT='numpy'
 # SAVE_FORMAT='htk'
+# SAVE_FORMAT='archive'
 # SAVE_FORMAT='wav'
 # NOTE: normalization will not be conducted in case of wav
 
+# the number of processes to extract features
+NUM_WORKERS=1
+
 ### data size to create
 # NOTE: 100h (train-clean-100) will be created by default
 # 460h (train-clean-100 + train-clean-360)
@@ -242,6 +247,7 @@ python main.py \
   --deltadelta $DELTADELTA \
   --normalize $NORMALIZE \
   --save_format $SAVE_FORMAT \
+  --num_workers $NUM_WORKERS \
   --medium $medium \
   --large $large
 
@@ -8,26 +8,34 @@ from __future__ import division
 from __future__ import print_function
 
 from os.path import join, basename
+from functools import partial
 import numpy as np
 import pickle
 from tqdm import tqdm
 
-from utils.util import mkdir_join
-from utils.inputs.htk import read, write
-from utils.inputs.wav2feature_python_speech_features import wav2feature as w2f_psf
-from utils.inputs.wav2feature_librosa import wav2feature as w2f_librosa
+from utils.parallel import imap_parallel
+from utils.inputs.feature_io import extract_feature, feature_path
+from utils.inputs.feature_io import save_feature, normalize_feature
+from utils.inputs.statistics import Statistics
+from utils.inputs.archive import ArchiveWriter, ArchiveReader
 
 
 def read_audio(audio_paths, tool, config, normalize, is_training,
                speaker_gender_dict, save_path=None, save_format=None,
                global_mean_male=None, global_mean_female=None,
                global_std_male=None, global_std_female=None,
-               dtype=np.float32):
+               dtype=np.float32, num_workers=1):
     """Read audio files.
+       Each audio file is decoded only once. When the statistics over the
+       training set are required, raw features are saved to save_path in the
+       first pass together with running statistics per gender and speaker
+       (see utils.inputs.statistics), and they are normalized in place in the
+       second pass. Memory usage does not depend on the size of the training
+       set.
     Args:
         audio_paths (list): paths to HTK or WAV files
         tool (string): the tool to extract features,
-            htk or librosa or python_speech_features
+            htk or librosa or python_speech_features or numpy
         config (dict): a configuration for feature extraction
         normalize (string):
             no => normalization will be not conducted
@@ -41,7 +49,7 @@ def read_audio(audio_paths, tool, config, normalize, is_training,
             key (string) => speaker
             value (string) => F or M
         save_path (string): path to save npy files
-        save_format (string, optional): numpy as htk
+        save_format (string, optional): numpy or htk or archive
         global_mean_male (np.ndarray, optional): global mean of male over
             the training set
         global_std_male (np.ndarray, optional): global standard deviation
@@ -51,6 +59,8 @@ def read_audio(audio_paths, tool, config, normalize, is_training,
         global_std_female (np.ndarray, optional): global standard
             deviation of female over the training set
         dtype (optional): the type of data, default is np.float32
+        num_workers (int, optional): the number of processes to extract
+            features in parallel
     Returns:
         global_mean_male (np.ndarray): global mean of male over the
             training set
@@ -70,236 +80,178 @@ def read_audio(audio_paths, tool, config, normalize, is_training,
     if normalize not in ['global', 'speaker', 'utterance', 'no']:
         raise ValueError(
             'normalize must be "utterance" or "speaker" or "global" or "no".')
-    if tool not in ['htk', 'python_speech_features', 'librosa']:
+    if tool not in ['htk', 'python_speech_features', 'librosa', 'numpy']:
         raise TypeError(
             'tool must be "htk" or "python_speech_features"' +
-            ' or "librosa".')
+            ' or "librosa" or "numpy".')
+    if save_path is not None and save_format not in ['numpy', 'htk', 'archive']:
+        raise ValueError('save_format is numpy or htk or archive.')
 
-    audio_path_dict = {}
-    audio_path_list_male, audio_path_list_female = [], []
-    total_frame_num_male, total_frame_num_female = 0, 0
-    total_frame_num_dict = {}
-    speaker_mean_dict, speaker_std_dict = {}, {}
+    # NOTE: When the statistics over the training set are necessary for
+    # normalization, raw features are saved in the first pass and normalized
+    # in the second pass. Otherwise, features are normalized & saved at once.
+    two_pass = is_training and normalize in ['global', 'speaker']
 
-    # Loop 1: Divide all audio paths into speakers
-    print('=====> Reading audio files...')
-    for i, audio_path in enumerate(tqdm(audio_paths)):
+    audio_path_dict = {}
+    task_list = []
+    for audio_path in audio_paths:
         # ex.) audio_path: speaker-book-utt_index.***
-        speaker = basename(audio_path).split('.')[0].split('-')[0]
+        input_name = basename(audio_path).split('.')[0]
+        speaker = input_name.split('-')[0]
         if speaker not in audio_path_dict.keys():
             audio_path_dict[speaker] = []
-        audio_path_dict[speaker].append(audio_path)
+        audio_path_dict[speaker].append(input_name)
 
-        if is_training:
-            # Read each audio file
-            if tool == 'htk':
-                input_utt, sampPeriod, parmKind = read(audio_path)
-            elif tool == 'python_speech_features':
-                input_utt = w2f_psf(
-                    audio_path,
-                    feature_type=config['feature_type'],
-                    feature_dim=config['channels'],
-                    use_energy=config['energy'],
-                    use_delta1=config['delta'],
-                    use_delta2=config['deltadelta'],
-                    window=config['window'],
-                    slide=config['slide'])
-            elif tool == 'librosa':
-                input_utt = w2f_librosa(
-                    audio_path,
-                    feature_type=config['feature_type'],
-                    feature_dim=config['channels'],
-                    use_energy=config['energy'],
-                    use_delta1=config['delta'],
-                    use_delta2=config['deltadelta'],
-                    window=config['window'],
-                    slide=config['slide'])
+        gender = speaker_gender_dict[speaker]
+        if gender not in ['M', 'F']:
+            raise ValueError('gender is M or F.')
+        task_list.append((audio_path, input_name, speaker, gender))
 
-            input_utt_sum = np.sum(input_utt, axis=0)
-
-            if i == 0:
-                # Initialize global statistics
-                feature_dim = input_utt.shape[1]
-                global_mean_male = np.zeros((feature_dim,), dtype=dtype)
-                global_mean_female = np.zeros(
-                    (feature_dim,), dtype=dtype)
-                global_std_male = np.zeros((feature_dim,), dtype=dtype)
-                global_std_female = np.zeros((feature_dim,), dtype=dtype)
+    # Loop 1: Extract features & accumulate statistics
+    print('=====> Reading audio files...')
+    func = partial(_read_utterance,
+                   tool=tool,
+                   config=config,
+                   normalize=normalize,
+                   is_training=is_training,
+                   two_pass=two_pass,
+                   save_path=save_path,
+                   save_format=save_format,
+                   global_mean_std={'M': (global_mean_male, global_std_male),
+                                    'F': (global_mean_female, global_std_female)},
+                   dtype=dtype)
+    frame_num_dict = {}
+    if save_path is not None and save_format == 'archive':
+        archive_writer = ArchiveWriter(save_path)
+    gender_stats, speaker_stats = Statistics(), Statistics()
+    for (_, input_name, _, _), (frame_num, gender_stats_utt, speaker_stats_utt, archive_list) in zip(
+            task_list, tqdm(imap_parallel(func, task_list, num_workers),
+                            total=len(task_list))):
+        frame_num_dict[input_name] = frame_num
+        gender_stats.merge(gender_stats_utt)
+        speaker_stats.merge(speaker_stats_utt)
+        for archive_args in archive_list:
+            archive_writer.write(*archive_args)
 
-            # For computing global mean
-            if speaker_gender_dict[speaker] == 'M':
-                audio_path_list_male.append(input_utt)
-                global_mean_male += input_utt_sum
-                total_frame_num_male += input_utt.shape[0]
-            elif speaker_gender_dict[speaker] == 'F':
-                audio_path_list_female.append(input_utt)
-                global_mean_female += input_utt_sum
-                total_frame_num_female += input_utt.shape[0]
-            else:
-                raise ValueError('gender is M or F.')
+    if save_path is not None and save_format == 'archive':
+        archive_writer.close()
 
-            # For computing speaker mean
-            if normalize == 'speaker':
-                if speaker not in total_frame_num_dict.keys():
-                    total_frame_num_dict[speaker] = 0
-                    # Initialize speaker statistics
-                    speaker_mean_dict[speaker] = np.zeros(
-                        (feature_dim,), dtype=dtype)
-                    speaker_std_dict[speaker] = np.zeros(
-                        (feature_dim,), dtype=dtype)
-                speaker_mean_dict[speaker] += input_utt_sum
-                total_frame_num_dict[speaker] += input_utt.shape[0]
+    if is_training:
+        # Compute global mean & stddev per gender
+        global_mean_male = gender_stats.mean('M', dtype=dtype)
+        global_std_male = gender_stats.std('M', dtype=dtype)
+        global_mean_female = gender_stats.mean('F', dtype=dtype)
+        global_std_female = gender_stats.std('F', dtype=dtype)
 
-    # Loop 2: Computing global mean and sttdev
-    if is_training and normalize != 'no':
-        print('=====> Computing global mean & stddev...')
-        # Compute global mean per gender
-        global_mean_male /= total_frame_num_male
-        global_mean_female /= total_frame_num_female
+        if save_path is not None and normalize != 'no':
+            # Save global mean & std per gender
+            # NOTE: a gender absent in the subset has no statistics
+            for name, value in [
+                    ('global_mean_male', global_mean_male),
+                    ('global_mean_female', global_mean_female),
+                    ('global_std_male', global_std_male),
+                    ('global_std_female', global_std_female)]:
+                if value is not None:
+                    np.save(join(save_path, name + '.npy'), value)
+            gender_stats.save(join(save_path, 'statistics.npz'))
 
-        for speaker, audio_paths_speaker in tqdm(audio_path_dict.items()):
+    # Loop 2: Normalize the saved features in place
+    if two_pass and save_path is not None:
+        print('=====> Normalization...')
+        if save_format == 'archive':
+            with ArchiveReader(save_path) as archive_reader:
+                specifier_dict = dict(
+                    (utt_name, archive_reader.specifier(utt_name))
+                    for utt_name in archive_reader.keys())
+        task_list = []
+        for speaker, input_names_speaker in audio_path_dict.items():
             if normalize == 'speaker':
-                # Compute speaker mean
-                speaker_mean_dict[speaker] /= total_frame_num_dict[speaker]
-
-            for audio_path in audio_paths_speaker:
-                # Read each audio file
-                if tool == 'htk':
-                    input_utt, sampPeriod, parmKind = read(audio_path)
-                elif tool == 'python_speech_features':
-                    input_utt = w2f_psf(
-                        audio_path,
-                        feature_type=config['feature_type'],
-                        feature_dim=config['channels'],
-                        use_energy=config['energy'],
-                        use_delta1=config['delta'],
-                        use_delta2=config['deltadelta'],
-                        window=config['window'],
-                        slide=config['slide'])
-                elif tool == 'librosa':
-                    input_utt = w2f_librosa(
-                        audio_path,
-                        feature_type=config['feature_type'],
-                        feature_dim=config['channels'],
-                        use_energy=config['energy'],
-                        use_delta1=config['delta'],
-                        use_delta2=config['deltadelta'],
-                        window=config['window'],
-                        slide=config['slide'])
+                mean = speaker_stats.mean(speaker, dtype=dtype)
+                std = speaker_stats.std(speaker, dtype=dtype)
+            elif speaker_gender_dict[speaker] == 'M':
+                mean, std = global_mean_male, global_std_male
+            else:
+                mean, std = global_mean_female, global_std_female
 
-                # For computing global stddev
-                if speaker_gender_dict[speaker] == 'M':
-                    global_std_male += np.sum(
-                        np.abs(input_utt - global_mean_male) ** 2, axis=0)
-                elif speaker_gender_dict[speaker] == 'F':
-                    global_std_female += np.sum(
-                        np.abs(input_utt - global_mean_female) ** 2, axis=0)
+            for input_name in input_names_speaker:
+                if save_format == 'archive':
+                    input_path = specifier_dict[input_name]
                 else:
-                    raise ValueError('gender is M or F.')
+                    input_path = feature_path(
+                        save_path, speaker, input_name, save_format)
+                task_list.append((input_path, save_format, mean, std))
+        for _ in tqdm(imap_parallel(normalize_feature, task_list, num_workers),
+                      total=len(task_list)):
+            pass
 
-                if normalize == 'speaker':
-                    # For computing speaker stddev
-                    speaker_std_dict[speaker] += np.sum(
-                        np.abs(input_utt - speaker_mean_dict[speaker]) ** 2, axis=0)
+    if save_path is not None:
+        # Save the frame number dictionary
+        with open(join(save_path, 'frame_num.pickle'), 'wb') as f:
+            pickle.dump(frame_num_dict, f)
 
-            if normalize == 'speaker':
-                # Compute speaker stddev
-                speaker_std_dict[speaker] = np.sqrt(
-                    speaker_std_dict[speaker] / (total_frame_num_dict[speaker] - 1))
+    return (global_mean_male, global_mean_female,
+            global_std_male, global_std_female, frame_num_dict)
 
-        # Compute global stddev per gender
-        global_std_male = np.sqrt(
-            global_std_male / (total_frame_num_male - 1))
-        global_std_female = np.sqrt(
-            global_std_female / (total_frame_num_female - 1))
 
-        if save_path is not None:
-            # Save global mean & std per gender
-            np.save(join(save_path, 'global_mean_male.npy'),
-                    global_mean_male)
-            np.save(join(save_path, 'global_mean_female.npy'),
-                    global_mean_female)
-            np.save(join(save_path, 'global_std_male.npy'),
-                    global_std_male)
-            np.save(join(save_path, 'global_std_female.npy'),
-                    global_std_female)
+def _read_utterance(args, tool, config, normalize, is_training, two_pass,
+                    save_path, save_format, global_mean_std, dtype):
+    """Extract, normalize & save input features of an utterance.
+       This is called in worker processes.
+    Args:
+        args (tuple): (audio_path, input_name, speaker, gender)
+        tool (string): htk or python_speech_features or librosa or numpy
+        config (dict): a configuration for feature extraction
+        normalize (string): global or speaker or utterance or no
+        is_training (bool): Set True if save as training set
+        two_pass (bool): if True, save features without normalization
+        save_path (string): path to save files
+        save_format (string): numpy or htk or archive
+        global_mean_std (dict):
+            key (string) => gender
+            value (tuple) => (global mean, global std)
+        dtype: the type of data
+    Returns:
+        frame_num (int): the number of frames
+        gender_stats (Statistics): statistics of the utterance per gender
+        speaker_stats (Statistics): statistics of the utterance per speaker
+        archive_list (list): list of (input_name, input_utt, sampPeriod, parmKind)
+            to be appended to shards in case of archive
+    """
+    audio_path, input_name, speaker, gender = args
+    gender_stats, speaker_stats = Statistics(), Statistics()
 
-    # Loop 3: Normalization and Saving
-    print('=====> Normalization...')
-    frame_num_dict = {}
-    for speaker, audio_paths_speaker in tqdm(audio_path_dict.items()):
-        for audio_path in audio_paths_speaker:
-            # Read each audio file
-            if tool == 'htk':
-                input_utt, sampPeriod, parmKind = read(audio_path)
-            elif tool == 'python_speech_features':
-                input_utt = w2f_psf(
-                    audio_path,
-                    feature_type=config['feature_type'],
-                    feature_dim=config['channels'],
-                    use_energy=config['energy'],
-                    use_delta1=config['delta'],
-                    use_delta2=config['deltadelta'],
-                    window=config['window'],
-                    slide=config['slide'])
-            elif tool == 'librosa':
-                input_utt = w2f_librosa(
-                    audio_path,
-                    feature_type=config['feature_type'],
-                    feature_dim=config['channels'],
-                    use_energy=config['energy'],
-                    use_delta1=config['delta'],
-                    use_delta2=config['deltadelta'],
-                    window=config['window'],
-                    slide=config['slide'])
+    # Read each audio file
+    input_utt, sampPeriod, parmKind = extract_feature(
+        audio_path, tool, config, dtype)
 
-            if normalize == 'no':
-                pass
-            elif normalize == 'global' or not is_training:
-                # Normalize by mean & std over the training set per gender
-                if speaker_gender_dict[speaker] == 'M':
-                    input_utt -= global_mean_male
-                    input_utt /= global_std_male
-                elif speaker_gender_dict[speaker] == 'F':
-                    input_utt -= global_mean_female
-                    input_utt /= global_std_female
-                else:
-                    raise ValueError('gender is M or F.')
-            elif normalize == 'speaker':
-                # Normalize by mean & std per speaker
-                input_utt -= speaker_mean_dict[speaker]
-                input_utt /= speaker_std_dict[speaker]
-            elif normalize == 'utterance':
-                # Normalize by mean & std per utterance
-                utt_mean = np.mean(input_utt, axis=0, dtype=dtype)
-                utt_std = np.std(input_utt, axis=0, dtype=dtype)
-                input_utt = (input_utt - utt_mean) / utt_std
-            else:
-                raise ValueError
+    if is_training:
+        # For computing global mean & stddev per gender
+        gender_stats.add(gender, input_utt)
 
-            frame_num_dict[basename(audio_path).split('.')[
-                0]] = input_utt.shape[0]
+        # For computing speaker mean & stddev
+        if normalize == 'speaker':
+            speaker_stats.add(speaker, input_utt)
 
-            if save_path is not None:
-                # Save input features
-                input_name = basename(audio_path).split('.')[0]
-                if save_format == 'numpy':
-                    input_data_save_path = mkdir_join(
-                        save_path, speaker, input_name + '.npy')
-                    np.save(input_data_save_path, input_utt)
-                elif save_format == 'htk':
-                    write(input_utt,
-                          htk_path=mkdir_join(
-                              save_path, speaker, input_name + '.htk'),
-                          sampPeriod=sampPeriod,
-                          parmKind=parmKind)
-                else:
-                    raise ValueError('save_format is numpy or htk.')
+    if not two_pass:
+        if normalize == 'global' or (not is_training and normalize != 'no'):
+            # Normalize by mean & std over the training set per gender
+            global_mean, global_std = global_mean_std[gender]
+            input_utt -= global_mean
+            input_utt /= global_std
+        elif normalize == 'utterance':
+            # Normalize by mean & std per utterance
+            utt_mean = np.mean(input_utt, axis=0, dtype=dtype)
+            utt_std = np.std(input_utt, axis=0, dtype=dtype)
+            input_utt = (input_utt - utt_mean) / utt_std
 
+    archive_list = []
     if save_path is not None:
-        # Save the frame number dictionary
-        with open(join(save_path, 'frame_num.pickle'), 'wb') as f:
-            pickle.dump(frame_num_dict, f)
+        if save_format == 'archive':
+            # NOTE: appended to shards in the main process
+            archive_list.append((input_name, input_utt, sampPeriod, parmKind))
+        else:
+            # Save input features (not normalized yet in case of two_pass)
+            save_feature(input_utt, save_path, speaker, input_name,
+                         save_format, sampPeriod, parmKind)
 
-    return (global_mean_male, global_mean_female,
-            global_std_male, global_std_female, frame_num_dict)
+    return input_utt.shape[0], gender_stats, speaker_stats, archive_list
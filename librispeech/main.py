@@ -10,9 +10,9 @@ from __future__ import print_function
 from os.path import join, isfile
 import sys
 import argparse
+from collections import OrderedDict
 from tqdm import tqdm
 import numpy as np
-import pandas as pd
 import pickle
 
 sys.path.append('../')
@@ -20,7 +20,8 @@ from librispeech.path import Path
 from librispeech.input_data import read_audio
 from librispeech.transcript import read_trans
 from utils.util import mkdir_join
-from utils.dataset import add_element
+from utils.inputs.archive import ArchiveReader
+from utils.dataset import MultiLabelManifest
 
 parser = argparse.ArgumentParser()
 parser.add_argument('--data_path', type=str,
@@ -30,11 +31,13 @@ parser.add_argument('--dataset_save_path', type=str,
 parser.add_argument('--feature_save_path', type=str,
                     help='path to save input features')
 parser.add_argument('--tool', type=str,
-                    choices=['htk', 'python_speech_features', 'librosa'])
+                    choices=['htk', 'python_speech_features', 'librosa',
+                             'numpy'])
 parser.add_argument('--htk_save_path', type=str, help='path to save features')
 parser.add_argument('--normalize', type=str,
                     choices=['global', 'speaker', 'utterance', 'no'])
-parser.add_argument('--save_format', type=str, choices=['numpy', 'htk', 'wav'])
+parser.add_argument('--save_format', type=str,
+                    choices=['numpy', 'htk', 'archive', 'wav'])
 
 parser.add_argument('--feature_type', type=str, choices=['fbank', 'mfcc'])
 parser.add_argument('--channels', type=int,
@@ -50,6 +53,8 @@ parser.add_argument('--medium', type=int,
                     help='If True, create medium-size dataset (460h).')
 parser.add_argument('--large', type=int,
                     help='If True, create large-size dataset (960h).')
+parser.add_argument('--num_workers', type=int, default=1,
+                    help='the number of processes to extract features')
 
 args = parser.parse_args()
 path = Path(data_path=args.data_path,
@@ -81,7 +86,7 @@ def main(data_size):
         # inputs
         ########################################
         print('=> Processing input data...')
-        if args.save_format in ['numpy', 'htk']:
+        if args.save_format in ['numpy', 'htk', 'archive']:
             input_save_path = mkdir_join(
                 args.feature_save_path, args.save_format, data_size)
             if isfile(join(input_save_path, data_type, 'complete.txt')):
@@ -122,7 +127,8 @@ def main(data_size):
                            global_mean_male=global_mean_male,
                            global_mean_female=global_mean_female,
                            global_std_male=global_std_male,
-                           global_std_female=global_std_female)
+                           global_std_female=global_std_female,
+                           num_workers=args.num_workers)
                 # NOTE: ex.) save_path:
                 # librispeech/feature/save_format/data_size/data_type/speaker/*.npy
 
@@ -156,21 +162,19 @@ def main(data_size):
         print('\n=> Saving dataset files...')
         dataset_save_path = mkdir_join(
             args.dataset_save_path, args.save_format, data_size, data_type)
-        df_columns = ['frame_num', 'input_path', 'transcript']
-        df_char = pd.DataFrame([], columns=df_columns)
-        df_char_capital = pd.DataFrame([], columns=df_columns)
-        df_word_freq1 = pd.DataFrame([], columns=df_columns)
-        df_word_freq5 = pd.DataFrame([], columns=df_columns)
-        df_word_freq10 = pd.DataFrame([], columns=df_columns)
-        df_word_freq15 = pd.DataFrame([], columns=df_columns)
+        label_types = ['character', 'character_capital_divide', 'word_freq1',
+                       'word_freq5', 'word_freq10', 'word_freq15']
+        manifest = MultiLabelManifest(OrderedDict(
+            [(label_type, join(dataset_save_path, label_type + '.csv'))
+             for label_type in label_types]),
+            binary_save_path=join(dataset_save_path, 'dataset.npz'))
 
         with open(join(input_save_path, data_type, 'frame_num.pickle'), 'rb') as f:
             frame_num_dict = pickle.load(f)
 
-        utt_count = 0
-        df_char_list, df_char_capital_list = [], []
-        df_word_freq1_list, df_word_freq5_list = [], []
-        df_word_freq10_list, df_word_freq15_list = [], []
+        if args.save_format == 'archive':
+            archive_reader = ArchiveReader(join(input_save_path, data_type))
+
         for speaker, utt_dict in tqdm(speaker_dict.items()):
             for utt_name, indices_list in utt_dict.items():
                 if args.save_format == 'numpy':
@@ -179,85 +183,27 @@ def main(data_size):
                 elif args.save_format == 'htk':
                     input_utt_save_path = join(
                         input_save_path, data_type, speaker, utt_name + '.htk')
+                elif args.save_format == 'archive':
+                    input_utt_save_path = archive_reader.specifier(utt_name)
                 elif args.save_format == 'wav':
                     input_utt_save_path = path.utt2wav(utt_name)
                 else:
-                    raise ValueError('save_format is numpy or htk or wav.')
+                    raise ValueError('save_format is numpy or htk or archive or wav.')
 
-                assert isfile(input_utt_save_path)
+                if args.save_format != 'archive':
+                    assert isfile(input_utt_save_path)
                 frame_num = frame_num_dict[utt_name]
 
                 char_indices, char_indices_capital, word_freq1_indices = indices_list[:3]
                 word_freq5_indices, word_freq10_indices, word_freq15_indices = indices_list[
                     3:6]
 
-                df_char = add_element(
-                    df_char, [frame_num, input_utt_save_path, char_indices])
-                df_char_capital = add_element(
-                    df_char_capital, [frame_num, input_utt_save_path, char_indices_capital])
-                df_word_freq1 = add_element(
-                    df_word_freq1, [frame_num, input_utt_save_path, word_freq1_indices])
-                df_word_freq5 = add_element(
-                    df_word_freq5, [frame_num, input_utt_save_path, word_freq5_indices])
-                df_word_freq10 = add_element(
-                    df_word_freq10, [frame_num, input_utt_save_path, word_freq10_indices])
-                df_word_freq15 = add_element(
-                    df_word_freq15, [frame_num, input_utt_save_path, word_freq15_indices])
-                utt_count += 1
-
-                # Reset
-                if utt_count == 50000:
-                    df_char_list.append(df_char)
-                    df_char_capital_list.append(df_char_capital)
-                    df_word_freq1_list.append(df_word_freq1)
-                    df_word_freq5_list.append(df_word_freq5)
-                    df_word_freq10_list.append(df_word_freq10)
-                    df_word_freq15_list.append(df_word_freq15)
-
-                    df_char = pd.DataFrame([], columns=df_columns)
-                    df_char_capital = pd.DataFrame([], columns=df_columns)
-                    df_word_freq1 = pd.DataFrame([], columns=df_columns)
-                    df_word_freq5 = pd.DataFrame([], columns=df_columns)
-                    df_word_freq10 = pd.DataFrame([], columns=df_columns)
-                    df_word_freq15 = pd.DataFrame([], columns=df_columns)
-                    utt_count = 0
-
-        # Last dataframe
-        df_char_list.append(df_char)
-        df_char_capital_list.append(df_char_capital)
-        df_word_freq1_list.append(df_word_freq1)
-        df_word_freq5_list.append(df_word_freq5)
-        df_word_freq10_list.append(df_word_freq10)
-        df_word_freq15_list.append(df_word_freq15)
-
-        # Concatenate all dataframes
-        df_char = df_char_list[0]
-        df_char_capital = df_char_capital_list[0]
-        df_word_freq1 = df_word_freq1_list[0]
-        df_word_freq5 = df_word_freq5_list[0]
-        df_word_freq10 = df_word_freq10_list[0]
-        df_word_freq15 = df_word_freq15_list[0]
-
-        for df_i in df_char_list[1:]:
-            df_char = pd.concat([df_char, df_i], axis=0)
-        for df_i in df_char_list[1:]:
-            df_char_capital = pd.concat([df_char_capital, df_i], axis=0)
-        for df_i in df_word_freq1_list[1:]:
-            df_word_freq1 = pd.concat([df_word_freq1, df_i], axis=0)
-        for df_i in df_word_freq5_list[1:]:
-            df_word_freq5 = pd.concat([df_word_freq5, df_i], axis=0)
-        for df_i in df_word_freq10_list[1:]:
-            df_word_freq10 = pd.concat([df_word_freq10, df_i], axis=0)
-        for df_i in df_word_freq15_list[1:]:
-            df_word_freq15 = pd.concat([df_word_freq15, df_i], axis=0)
+                manifest.add(frame_num, input_utt_save_path,
+                             [char_indices, char_indices_capital,
+                              word_freq1_indices, word_freq5_indices,
+                              word_freq10_indices, word_freq15_indices])
 
-        df_char.to_csv(join(dataset_save_path, 'character.csv'))
-        df_char_capital.to_csv(
-            join(dataset_save_path, 'character_capital_divide.csv'))
-        df_word_freq1.to_csv(join(dataset_save_path, 'word_freq1.csv'))
-        df_word_freq5.to_csv(join(dataset_save_path, 'word_freq5.csv'))
-        df_word_freq10.to_csv(join(dataset_save_path, 'word_freq10.csv'))
-        df_word_freq15.to_csv(join(dataset_save_path, 'word_freq15.csv'))
+        manifest.save()
 
 
 if __name__ == '__main__':
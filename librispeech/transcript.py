@@ -9,10 +9,13 @@ from __future__ import print_function
 
 from os.path import join
 import re
+from collections import OrderedDict
+import numpy as np
 from tqdm import tqdm
 
 from utils.labels.character import Char2idx
 from utils.labels.word import Word2idx
+from utils.labels.vocabulary import VocabularyBuilder
 from utils.util import mkdir_join
 
 # NOTE:
@@ -74,8 +77,7 @@ def read_trans(label_paths, data_size, vocab_file_save_path, is_test=False,
     print('=====> Reading target labels...')
     speaker_dict = {}
     char_set, char_capital_set = set([]), set([])
-    word_count_dict = {}
-    vocab_set = set([])
+    vocab_builder = VocabularyBuilder()
     for label_path in tqdm(label_paths):
         speaker = label_path.split('/')[-3]
         if speaker not in speaker_dict.keys():
@@ -88,11 +90,7 @@ def read_trans(label_paths, data_size, vocab_file_save_path, is_test=False,
                 word_list = line[1:]
 
                 # Count words
-                for word in word_list:
-                    vocab_set.add(word)
-                    if word not in word_count_dict.keys():
-                        word_count_dict[word] = 0
-                    word_count_dict[word] += 1
+                vocab_builder.add(word_list)
 
                 # Capital-divided
                 for word in transcript.split(' '):
@@ -147,6 +145,8 @@ def read_trans(label_paths, data_size, vocab_file_save_path, is_test=False,
         vocab_file_save_path, 'word_freq10_' + data_size + '.txt')
     word_freq15_vocab_file_path = mkdir_join(
         vocab_file_save_path, 'word_freq15_' + data_size + '.txt')
+    word_count_file_path = mkdir_join(
+        vocab_file_save_path, 'word_count_' + data_size + '.txt')
 
     # Reserve some indices
     char_set.discard(SPACE)
@@ -170,60 +170,33 @@ def read_trans(label_paths, data_size, vocab_file_save_path, is_test=False,
             for char in char_list:
                 f.write('%s\n' % char)
 
-        # word-level (threshold == 1)
-        with open(word_freq1_vocab_file_path, 'w') as f:
-            vocab_list = sorted(list(vocab_set)) + [OOV]
-            for word in vocab_list:
-                f.write('%s\n' % word)
-
-        # word-level (threshold == 5)
-        with open(word_freq5_vocab_file_path, 'w') as f:
-            vocab_list = sorted([word for word, freq in list(word_count_dict.items())
-                                 if freq >= 5]) + [OOV]
-            for word in vocab_list:
-                f.write('%s\n' % word)
-
-        # word-level (threshold == 10)
-        with open(word_freq10_vocab_file_path, 'w') as f:
-            vocab_list = sorted([word for word, freq in list(word_count_dict.items())
-                                 if freq >= 10]) + [OOV]
-            for word in vocab_list:
-                f.write('%s\n' % word)
-
-        # word-level (threshold == 15)
-        with open(word_freq15_vocab_file_path, 'w') as f:
-            vocab_list = sorted([word for word, freq in list(word_count_dict.items())
-                                 if freq >= 15]) + [OOV]
-            for word in vocab_list:
-                f.write('%s\n' % word)
+        # word-level (threshold == 1, 5, 10, 15)
+        vocab_builder.save(OrderedDict([
+            (1, word_freq1_vocab_file_path),
+            (5, word_freq5_vocab_file_path),
+            (10, word_freq10_vocab_file_path),
+            (15, word_freq15_vocab_file_path)]), oov=OOV)
+        vocab_builder.save_counts(word_count_file_path)
 
     # Compute OOV rate
     if is_test:
+        # NOTE: vocabulary files are used if word counts have been not saved
+        vocab_builder_train = VocabularyBuilder.load_counts(
+            word_count_file_path, OrderedDict([
+                (1, word_freq1_vocab_file_path),
+                (5, word_freq5_vocab_file_path),
+                (10, word_freq10_vocab_file_path),
+                (15, word_freq15_vocab_file_path)]))
         with open(join(vocab_file_save_path, '../oov_rate_' + data_type + '_' + data_size + '.txt'), 'w') as f:
 
-            # word-level (threshold == 1)
-            oov_rate = compute_oov_rate(
-                speaker_dict, word_freq1_vocab_file_path)
-            f.write('Word (freq1):\n')
-            f.write('  OOV rate (test): %f %%\n' % oov_rate)
-
-            # word-level (threshold == 5)
-            oov_rate = compute_oov_rate(
-                speaker_dict, word_freq5_vocab_file_path)
-            f.write('Word (freq5):\n')
-            f.write('  OOV rate (test): %f %%\n' % oov_rate)
-
-            # word-level (threshold == 10)
-            oov_rate = compute_oov_rate(
-                speaker_dict, word_freq10_vocab_file_path)
-            f.write('Word (freq10):\n')
-            f.write('  OOV rate (test): %f %%\n' % oov_rate)
-
-            # word-level (threshold == 15)
-            oov_rate = compute_oov_rate(
-                speaker_dict, word_freq15_vocab_file_path)
-            f.write('Word (freq15):\n')
-            f.write('  OOV rate (test): %f %%\n' % oov_rate)
+            # word-level (threshold == 1, 5, 10, 15)
+            oov_rate_dict = vocab_builder_train.oov_rates(
+                (transcript.split(SPACE) for utt_dict in speaker_dict.values()
+                 for transcript in utt_dict.values()),
+                [1, 5, 10, 15])
+            for threshold, oov_rate in oov_rate_dict.items():
+                f.write('Word (freq%d):\n' % threshold)
+                f.write('  OOV rate (test): %f %%\n' % oov_rate)
 
     # Tokenize
     print('=====> Tokenize...')
@@ -234,57 +207,29 @@ def read_trans(label_paths, data_size, vocab_file_save_path, is_test=False,
     word2idx_freq5 = Word2idx(word_freq5_vocab_file_path)
     word2idx_freq10 = Word2idx(word_freq10_vocab_file_path)
     word2idx_freq15 = Word2idx(word_freq15_vocab_file_path)
+    if not is_test:
+        # Convert characters of all utterances at once
+        transcripts = [transcript for utt_dict in speaker_dict.values()
+                       for transcript in utt_dict.values()]
+        values, offsets = char2idx.tokenize_batch(transcripts)
+        char_indices_iter = iter(np.split(values, offsets[1:-1]))
+        values, offsets = char2idx_capital.tokenize_batch(transcripts)
+        char_indices_capital_iter = iter(np.split(values, offsets[1:-1]))
     for speaker, utt_dict in tqdm(speaker_dict.items()):
         for utt_name, transcript in utt_dict.items():
             if is_test:
                 utt_dict[utt_name] = [transcript] * 6
             else:
-                char_indices = char2idx(transcript)
-                char_indices_capital = char2idx_capital(transcript)
+                char_indices = next(char_indices_iter)
+                char_indices_capital = next(char_indices_capital_iter)
                 word_freq1_indices = word2idx_freq1(transcript)
                 word_freq5_indices = word2idx_freq5(transcript)
                 word_freq10_indices = word2idx_freq10(transcript)
                 word_freq15_indices = word2idx_freq15(transcript)
 
-                char_indices = ' '.join(list(map(str, char_indices.tolist())))
-                char_indices_capital = ' '.join(
-                    list(map(str, char_indices_capital.tolist())))
-                word_freq1_indices = ' '.join(
-                    list(map(str, word_freq1_indices.tolist())))
-                word_freq5_indices = ' '.join(
-                    list(map(str, word_freq5_indices.tolist())))
-                word_freq10_indices = ' '.join(
-                    list(map(str, word_freq10_indices.tolist())))
-                word_freq15_indices = ' '.join(
-                    list(map(str, word_freq15_indices.tolist())))
-
                 utt_dict[utt_name] = [char_indices, char_indices_capital,
                                       word_freq1_indices, word_freq5_indices,
                                       word_freq10_indices, word_freq15_indices]
         speaker_dict[speaker] = utt_dict
 
     return speaker_dict
-
-
-def compute_oov_rate(speaker_dict, vocab_file_path):
-
-    with open(vocab_file_path, 'r') as f:
-        vocab_set = set([])
-        for line in f:
-            word = line.strip()
-            vocab_set.add(word)
-
-    oov_count = 0
-    word_num = 0
-    for speaker_dict, utt_dict in speaker_dict.items():
-        for utt_name, transcript in utt_dict.items():
-            word_list = transcript.split(SPACE)
-            word_num += len(word_list)
-
-            for word in word_list:
-                if word not in vocab_set:
-                    oov_count += 1
-
-    oov_rate = oov_count * 100 / word_num
-
-    return oov_rate
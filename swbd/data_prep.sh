@@ -18,6 +18,7 @@ FISHER_PATH='/n/sd8/inaguma/corpus/swbd/data/fisher'
 TOOL='htk'
 # TOOL='python_speech_features'  # under implementation
 # TOOL='librosa'  # under implementation
+# TOOL='numpy'
 # TOOL='kaldi'  # under implementation
 
 ### Configuration (Set by yourself)
@@ -36,9 +37,21 @@ NORMALIZE='speaker'
 
 SAVE_FORMAT='numpy'
 # SAVE_FORMAT='htk'
+# SAVE_FORMAT='archive'
 # SAVE_FORMAT='wav'
 # NOTE: normalization will not be conducted in case of wav
 
+# the number of processes to extract features
+NUM_WORKERS=1
+
+# if 1, extract features from sph files of Fisher directly without converting
+# them to wav files (not for htk & wav). Switchboard & eval2000 are always
+# converted by sph2pipe because they are shorten-compressed.
+READ_SPH=0
+
+# if 1, read only samples of utterances from audio files (only for numpy)
+WINDOW_LIMITED=0
+
 ### Data size
 # SWBD + Fisher (about 2000h)
 fisher=1
@@ -214,7 +227,10 @@ fi
 ##############################
 # Fisher
 ##############################
-if [ ! $FISHER_PATH = '' ]; then
+# NOTE: only Fisher is read from sph files directly in case of READ_SPH=1,
+# because sph files of LDC97S62 & eval2000 are shorten-compressed
+if [ ! $FISHER_PATH = '' ] && \
+  { [ $READ_SPH -eq 0 ] || [ $TOOL = 'htk' ] || [ $SAVE_FORMAT = 'wav' ]; }; then
   fisher_wav_paths=$(find $WAV_SAVE_PATH/fisher/ -iname '*.wav')
   fisher_wav_file_num=$(find $WAV_SAVE_PATH/fisher/ -iname '*.wav' | wc -l)
 
@@ -330,6 +346,9 @@ python main.py \
   --deltadelta $DELTADELTA \
   --normalize $NORMALIZE \
   --save_format $SAVE_FORMAT \
+  --num_workers $NUM_WORKERS \
+  --read_sph $READ_SPH \
+  --window_limited $WINDOW_LIMITED \
   --fisher $fisher
 
 
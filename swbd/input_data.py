@@ -8,28 +8,41 @@ from __future__ import division
 from __future__ import print_function
 
 from os.path import join, basename
+from functools import partial
 import numpy as np
 import pickle
 from tqdm import tqdm
 
-from utils.util import mkdir_join
-from utils.inputs.segmentation import segment
-from utils.inputs.htk import read, write
+from utils.parallel import imap_parallel
+from utils.inputs.segmentation import segment_block
+from utils.inputs.htk import read_header
+from utils.inputs.feature_io import feature_path, save_feature
+from utils.inputs.feature_io import extract_feature_channels
+from utils.inputs.feature_io import normalize_feature, normalize_params
+from utils.inputs.feature_io import normalize_in_place, normalize_utterances
+from utils.inputs.statistics import Statistics
+from utils.inputs.archive import ArchiveWriter, ArchiveReader
 
 
 def read_audio(audio_paths, speaker_dict, tool, config, normalize, is_training,
                save_path=None, save_format=None, global_mean=None, global_std=None,
-               dtype=np.float32):
-    """Read HTK or WAV files.
+               dtype=np.float32, num_workers=1, window_limited=False):
+    """Read HTK or WAV files (or SPHERE files directly).
+       Each audio file is decoded only once. When the statistics over the
+       training set are required, raw features are saved in the first pass
+       and normalized in place in the second pass.
     Args:
-        audio_paths (list): paths to HTK or WAV files
+        audio_paths (list): paths to HTK or WAV files. In case of SPHERE
+            files (.sph), features of both channels (A & B) are extracted
+            from a single read without intermediate WAV files.
         speaker_dict (dict): A dictionary of speakers' gender information
             key (string) => speaker
             value (dict) => dictionary of utterance information of each speaker
                 key (string) => utterance index
                 value (list) => [start_frame, end_frame, transcript]
         tool (string): the tool to extract features,
-            htk or librosa or python_speech_features
+            htk or librosa or python_speech_features or numpy
+            (htk is not available for SPHERE files)
         config (dict): a configuration for feature extraction
         normalize (string):
             no => normalization will be not conducted
@@ -40,11 +53,15 @@ def read_audio(audio_paths, speaker_dict, tool, config, normalize, is_training,
                          data by mean & std per utterance
         is_training (bool): training or not
         save_path (string): path to save npy files
-        save_format (string, optional): numpy as htk
+        save_format (string, optional): numpy or htk or archive
         global_mean (np.ndarray, optional): global mean over the training set
         global_std (np.ndarray, optional): global standard deviation over the
             training set
         dtype (optional): the type of data, default is np.float32
+        num_workers (int, optional): the number of processes to extract
+            features in parallel
+        window_limited (bool, optional): if True, only samples of
+            utterances are read from WAV or SPHERE files (numpy only)
     Returns:
         global_mean (np.ndarray): global mean over the training set
         global_std (np.ndarray): global standard deviation over the
@@ -59,155 +76,214 @@ def read_audio(audio_paths, speaker_dict, tool, config, normalize, is_training,
     if normalize not in ['global', 'speaker', 'utterance', 'no']:
         raise ValueError(
             'normalize must be "utterance" or "speaker" or "global" or "no".')
+    if save_path is not None and save_format not in ['numpy', 'htk', 'archive']:
+        raise ValueError('save_format is numpy or htk or archive.')
 
-    total_frame_num = 0
-    total_frame_num_dict = {}
-    speaker_mean_dict = {}
+    # NOTE: When the statistics over the training set are necessary for
+    # normalization, raw features are saved in the first pass and normalized
+    # in the second pass. Otherwise, features are normalized & saved at once.
+    two_pass = is_training and normalize in ['global', 'speaker']
+
+    task_list = []
+    for audio_path in audio_paths:
+        speaker = basename(audio_path).split('.')[0]
+
+        # Fix speaker name
+        speaker = speaker.replace('sw0', 'sw')
+        # ex.) sw04771-A => sw4771-A (LDC97S62)
+        speaker = speaker.replace('sw_', 'sw')
+        # ex.) sw_4771-A => sw4771-A (eval2000, swbd)
+        speaker = speaker.replace('en_', 'en')
+        # ex.) en_4156-A => en4156-A (eval2000, ch)
+
+        if audio_path.endswith('.sph'):
+            # NOTE: both channels of a SPHERE file are read at once
+            speaker_list = [speaker + '-A', speaker + '-B']
+        else:
+            speaker_list = [speaker]
+
+        task_list.append((audio_path, speaker_list,
+                          [speaker_dict[speaker] for speaker in speaker_list]))
+
+    # Loop 1: Divide each audio file into utterances & accumulate statistics
+    print('=====> Reading audio files...')
+    func = partial(_read_session,
+                   tool=tool,
+                   config=config,
+                   normalize=normalize,
+                   is_training=is_training,
+                   two_pass=two_pass,
+                   save_path=save_path,
+                   save_format=save_format,
+                   global_mean=global_mean,
+                   global_std=global_std,
+                   dtype=dtype,
+                   window_limited=window_limited)
+    utt_list = []
+    frame_num_dict = {}
+    if save_path is not None and save_format == 'archive':
+        archive_writer = ArchiveWriter(save_path)
+    global_stats, speaker_stats = Statistics(), Statistics()
+    for utt_list_session, frame_num_dict_session, global_stats_speaker, speaker_stats_speaker, archive_list in tqdm(
+            imap_parallel(func, task_list, num_workers), total=len(task_list)):
+        utt_list += utt_list_session
+        frame_num_dict.update(frame_num_dict_session)
+        global_stats.merge(global_stats_speaker)
+        speaker_stats.merge(speaker_stats_speaker)
+        for archive_args in archive_list:
+            archive_writer.write(*archive_args)
+
+    if save_path is not None and save_format == 'archive':
+        archive_writer.close()
 
-    # Loop 1: Computing global mean and statistics
     if is_training and normalize != 'no':
-        print('=====> Reading audio files...')
-        for i, audio_path in enumerate(tqdm(audio_paths)):
-            speaker = basename(audio_path).split('.')[0]
-
-            # Fix speaker name
-            speaker = speaker.replace('sw0', 'sw')
-            # ex.) sw04771-A => sw4771-A (LDC97S62)
-            speaker = speaker.replace('sw_', 'sw')
-            # ex.) sw_4771-A => sw4771-A (eval2000, swbd)
-            speaker = speaker.replace('en_', 'en')
-            # ex.) en_4156-A => en4156-A (eval2000, ch)
-
-            # Divide each audio file into utterances
-            _, input_utt_sum, speaker_mean, _, total_frame_num_speaker = segment(
-                audio_path,
-                speaker,
-                speaker_dict[speaker],
-                is_training=True,
-                sil_duration=0,
-                tool=tool,
-                config=config)
-
-            if i == 0:
-                # Initialize global statistics
-                feature_dim = input_utt_sum.shape[0]
-                global_mean = np.zeros((feature_dim,), dtype=dtype)
-                global_std = np.zeros((feature_dim,), dtype=dtype)
-
-            global_mean += input_utt_sum
-            total_frame_num += total_frame_num_speaker
-
-            # For computing speaker stddev
-            if normalize == 'speaker':
-                speaker_mean_dict[speaker] = speaker_mean
-                total_frame_num_dict[speaker] = total_frame_num_speaker
-                # NOTE: speaker mean is already computed
-
-        print('=====> Computing global mean & stddev...')
-        # Compute global mean
-        global_mean /= total_frame_num
-
-        for audio_path in tqdm(audio_paths):
-            speaker = basename(audio_path).split('.')[0]
-
-            # Normalize speaker name
-            speaker = speaker.replace('sw0', 'sw')
-            speaker = speaker.replace('sw_', 'sw')
-            speaker = speaker.replace('en_', 'en')
-
-            # Divide each audio into utterances
-            input_data_dict_speaker, _, _, _, _ = segment(
-                audio_path,
-                speaker,
-                speaker_dict[speaker],
-                is_training=True,
-                sil_duration=0,
-                tool=tool,
-                config=config)
-
-            # For computing global stddev
-            for input_utt in input_data_dict_speaker.values():
-                global_std += np.sum(
-                    np.abs(input_utt - global_mean) ** 2, axis=0)
-
-        # Compute global stddev
-        global_std = np.sqrt(global_std / (total_frame_num - 1))
+        # Compute global mean & stddev
+        global_mean = global_stats.mean('global', dtype=dtype)
+        global_std = global_stats.std('global', dtype=dtype)
 
         if save_path is not None:
-            # Save global mean & std per gender
+            # Save global mean & std
             np.save(join(save_path, 'global_mean.npy'), global_mean)
             np.save(join(save_path, 'global_std.npy'), global_std)
+            global_stats.save(join(save_path, 'statistics.npz'))
+
+    # Loop 2: Normalize the saved features in place
+    if two_pass and save_path is not None:
+        print('=====> Normalization...')
+        if save_format == 'archive':
+            with ArchiveReader(save_path) as archive_reader:
+                specifier_dict = dict(
+                    (utt_name, archive_reader.specifier(utt_name))
+                    for utt_name in archive_reader.keys())
+        normalize_task_list = []
+        for speaker, utt_name in utt_list:
+            if normalize == 'speaker':
+                mean = speaker_stats.mean(speaker, dtype=dtype)
+                std = speaker_stats.std(speaker, dtype=dtype)
+            else:
+                mean, std = global_mean, global_std
+            if save_format == 'archive':
+                input_path = specifier_dict[utt_name]
+            else:
+                input_path = feature_path(
+                    save_path, speaker, utt_name, save_format)
+            normalize_task_list.append((input_path, save_format, mean, std))
+        for _ in tqdm(imap_parallel(normalize_feature, normalize_task_list,
+                                    num_workers),
+                      total=len(normalize_task_list)):
+            pass
+
+    if save_path is not None:
+        # Save the frame number dictionary
+        with open(join(save_path, 'frame_num.pickle'), 'wb') as f:
+            pickle.dump(frame_num_dict, f)
+
+    return global_mean, global_std, frame_num_dict
+
+
+def _read_session(args, tool, config, normalize, is_training, two_pass,
+                  save_path, save_format, global_mean, global_std, dtype,
+                  window_limited):
+    """Divide an audio file into utterances, and normalize & save them.
+       This is called in worker processes.
+    Args:
+        args (tuple): (audio_path, speaker_list, utterance_dict_list).
+            speaker_list has speakers of both channels of a SPHERE file.
+        tool (string): htk or python_speech_features or librosa or numpy
+        config (dict): a configuration for feature extraction
+        normalize (string): global or speaker or utterance or no
+        is_training (bool): training or not
+        two_pass (bool): if True, save features without normalization
+        save_path (string): path to save files
+        save_format (string): numpy or htk or archive
+        global_mean (np.ndarray): global mean over the training set
+        global_std (np.ndarray): global standard deviation over the
+            training set
+        dtype: the type of data
+        window_limited (bool): if True, read only samples of utterances
+    Returns:
+        utt_list (list): tuples of (speaker, utterance name) in order
+        frame_num_dict (dict):
+            key => utterance name
+            value => the number of frames
+        global_stats (Statistics): statistics of the speakers
+        speaker_stats (Statistics): statistics of the speakers per speaker
+        archive_list (list): list of (utt_name, input_utt, sampPeriod, parmKind)
+            to be appended to shards in case of archive
+    """
+    audio_path, speaker_list, utterance_dict_list = args
+    global_stats, speaker_stats = Statistics(), Statistics()
 
-    # Loop 2: Normalization and Saving
-    print('=====> Normalization...')
-    frame_num_dict = {}
     sampPeriod, parmKind = None, None
-    for audio_path in tqdm(audio_paths):
-        speaker = basename(audio_path).split('.')[0]
+    if save_format == 'htk':
+        _, sampPeriod, _, parmKind = read_header(audio_path)
 
-        # Normalize speaker name
-        speaker = speaker.replace('sw0', 'sw')
-        speaker = speaker.replace('sw_', 'sw')
-        speaker = speaker.replace('en_', 'en')
+    if window_limited:
+        # NOTE: each channel is read per utterance
+        input_data_list = [None] * len(speaker_list)
+    elif audio_path.endswith('.sph'):
+        # Read the SPHERE file once & divide channels in memory
+        input_data_list = extract_feature_channels(
+            audio_path, tool, config, dtype)
+        if len(input_data_list) != len(speaker_list):
+            raise ValueError('%s has %d channels.' %
+                             (audio_path, len(input_data_list)))
+    else:
+        input_data_list = [None]
 
-        if normalize == 'speaker' and is_training:
-            speaker_mean = speaker_mean_dict[speaker]
-        else:
-            speaker_mean = None
+    utt_list = []
+    frame_num_dict = {}
+    archive_list = []
+    for i_channel, (speaker, utterance_dict, input_data) in enumerate(zip(
+            speaker_list, utterance_dict_list, input_data_list)):
 
-        # Divide each audio into utterances
-        input_data_dict_speaker, _, speaker_mean, speaker_std, _ = segment(
+        # Divide each audio file into utterances
+        keys, input_data_block, offsets = segment_block(
             audio_path,
             speaker,
-            speaker_dict[speaker],
-            is_training=is_training,
+            utterance_dict,
             sil_duration=0,
             tool=tool,
             config=config,
-            mean=speaker_mean)  # for compute speaker sttdev
-        # NOTE: input_data_dict_speaker have been not normalized yet
+            dtype=dtype,
+            input_data=input_data,
+            window_limited=window_limited,
+            channel=i_channel)
+        # NOTE: utterances of the speaker are stored in a contiguous block,
+        # which has been not normalized yet
 
-        for utt_index, input_utt in input_data_dict_speaker.items():
+        if is_training and normalize != 'no':
+            # For computing global mean & stddev
+            global_stats.add('global', input_data_block)
 
-            if normalize == 'no':
-                pass
-            elif normalize == 'global' or not is_training:
+            # For computing speaker mean & stddev
+            if normalize == 'speaker':
+                speaker_stats.add(speaker, input_data_block)
+
+        if not two_pass:
+            if normalize == 'global' or (not is_training and normalize != 'no'):
                 # Normalize by mean & std over the training set
-                input_utt -= global_mean
-                input_utt /= global_std
-            elif normalize == 'speaker':
-                # Normalize by mean & std per speaker
-                input_utt = (input_utt - speaker_mean) / speaker_std
+                normalize_in_place(input_data_block, *normalize_params(
+                    global_mean, global_std, dtype=dtype))
             elif normalize == 'utterance':
                 # Normalize by mean & std per utterance
-                utt_mean = np.mean(input_utt, axis=0, dtype=dtype)
-                utt_std = np.std(input_utt, axis=0, dtype=dtype)
-                input_utt = (input_utt - utt_mean) / utt_std
-            else:
-                ValueError
+                normalize_utterances(input_data_block, offsets)
 
-            frame_num_dict[speaker + '_' + utt_index] = input_utt.shape[0]
+        for i, utt_index in enumerate(keys):
+            utt_name = speaker + '_' + utt_index
+            input_utt = input_data_block[offsets[i]:offsets[i + 1]]
+            frame_num_dict[utt_name] = input_utt.shape[0]
+            utt_list.append((speaker, utt_name))
 
             if save_path is not None:
-                # Save input features
-                if save_format == 'numpy':
-                    input_data_save_path = mkdir_join(
-                        save_path, speaker, speaker + '_' + utt_index + '.npy')
-                    np.save(input_data_save_path, input_utt)
-                elif save_format == 'htk':
-                    if sampPeriod is None:
-                        _, sampPeriod, parmKind = read(audio_path)
-                    write(input_utt,
-                          htk_path=mkdir_join(
-                              save_path, speaker, speaker + '_' + utt_index + '.htk'),
-                          sampPeriod=sampPeriod,
-                          parmKind=parmKind)
+                if save_format == 'archive':
+                    # NOTE: appended to shards in the main process
+                    archive_list.append(
+                        (utt_name, input_utt, sampPeriod, parmKind))
                 else:
-                    raise ValueError('save_format is numpy or htk.')
+                    # Save input features (not normalized yet in case of
+                    # two_pass)
+                    save_feature(input_utt, save_path, speaker, utt_name,
+                                 save_format, sampPeriod, parmKind)
 
-    if save_path is not None:
-        # Save the frame number dictionary
-        with open(join(save_path, 'frame_num.pickle'), 'wb') as f:
-            pickle.dump(frame_num_dict, f)
-
-    return global_mean, global_std, frame_num_dict
+    return utt_list, frame_num_dict, global_stats, speaker_stats, archive_list
@@ -11,6 +11,8 @@ from os.path import join
 import re
 from collections import OrderedDict
 
+from utils.labels.vocabulary import VocabularyBuilder
+
 SPACE = '_'
 HESITATION = ['uh', 'um', 'eh', 'mm', 'hm', 'ah', 'huh', 'ha', 'er', 'oof',
               'hee', 'ach', 'eee', 'ew']
@@ -224,92 +226,36 @@ def read_stm(stm_path, pem_path, glm_path, run_root_path, data_size='300h'):
     # for debug
     # print(sorted(list(char_set)))
 
-    word_freq1_vocab_file_path = join(
-        run_root_path, 'config/vocab_files/word_freq1_' + data_size + '.txt')
-    word_freq5_vocab_file_path = join(
-        run_root_path, 'config/vocab_files/word_freq5_' + data_size + '.txt')
-    word_freq10_vocab_file_path = join(
-        run_root_path, 'config/vocab_files/word_freq10_' + data_size + '.txt')
-    word_freq15_vocab_file_path = join(
-        run_root_path, 'config/vocab_files/word_freq15_' + data_size + '.txt')
+    # NOTE: vocabulary files are used if word counts have been not saved
+    vocab_builder_train = VocabularyBuilder.load_counts(
+        join(run_root_path,
+             'config/vocab_files/word_count_' + data_size + '.txt'),
+        OrderedDict([(threshold, join(
+            run_root_path, 'config/vocab_files/word_freq%d_%s.txt' %
+            (threshold, data_size))) for threshold in [1, 5, 10, 15]]))
 
     # Compute OOV rate
     # NOTE: these are not corrct because many %hesitation are included.
     with open(join(run_root_path, 'config/oov_rate_eval2000_swbd_stm_' + data_size + '.txt'), 'w') as f:
 
-        # word-level (threshold == 1)
-        oov_rate = compute_oov_rate(
-            speaker_dict_swbd, word_freq1_vocab_file_path)
-        f.write('Word (freq1):\n')
-        f.write('  OOV rate (eval2000, swbd, from stm): %f %%\n' % oov_rate)
-
-        # word-level (threshold == 5)
-        oov_rate = compute_oov_rate(
-            speaker_dict_swbd, word_freq5_vocab_file_path)
-        f.write('Word (freq5):\n')
-        f.write('  OOV rate (eval2000, swbd, from stm): %f %%\n' % oov_rate)
-
-        # word-level (threshold == 10)
-        oov_rate = compute_oov_rate(
-            speaker_dict_swbd, word_freq10_vocab_file_path)
-        f.write('Word (freq10):\n')
-        f.write('  OOV rate (eval2000, swbd, from stm): %f %%\n' % oov_rate)
-
-        # word-level (threshold == 15)
-        oov_rate = compute_oov_rate(
-            speaker_dict_swbd, word_freq15_vocab_file_path)
-        f.write('Word (freq15):\n')
-        f.write('  OOV rate (eval2000, swbd, from stm): %f %%\n' % oov_rate)
+        # word-level (threshold == 1, 5, 10, 15)
+        oov_rate_dict = vocab_builder_train.oov_rates(
+            (utt_info[2].split(SPACE) for utt_dict in speaker_dict_swbd.values()
+             for utt_info in utt_dict.values()),
+            [1, 5, 10, 15])
+        for threshold, oov_rate in oov_rate_dict.items():
+            f.write('Word (freq%d):\n' % threshold)
+            f.write('  OOV rate (eval2000, swbd, from stm): %f %%\n' % oov_rate)
 
     with open(join(run_root_path, 'config/oov_rate_eval2000_ch_stm.txt'), 'w') as f:
 
-        # word-level (threshold == 1)
-        oov_rate = compute_oov_rate(
-            speaker_dict_ch, word_freq1_vocab_file_path)
-        f.write('Word (freq1):\n')
-        f.write('  OOV rate (eval2000, ch, from stm): %f %%\n' % oov_rate)
-
-        # word-level (threshold == 5)
-        oov_rate = compute_oov_rate(
-            speaker_dict_ch, word_freq5_vocab_file_path)
-        f.write('Word (freq5):\n')
-        f.write('  OOV rate (eval2000, ch, from stm): %f %%\n' % oov_rate)
-
-        # word-level (threshold == 10)
-        oov_rate = compute_oov_rate(
-            speaker_dict_ch, word_freq10_vocab_file_path)
-        f.write('Word (freq10):\n')
-        f.write('  OOV rate (eval2000, ch, from stm): %f %%\n' % oov_rate)
-
-        # word-level (threshold == 15)
-        oov_rate = compute_oov_rate(
-            speaker_dict_ch, word_freq15_vocab_file_path)
-        f.write('Word (freq15):\n')
-        f.write('  OOV rate (eval2000, ch, from stm): %f %%\n' % oov_rate)
+        # word-level (threshold == 1, 5, 10, 15)
+        oov_rate_dict = vocab_builder_train.oov_rates(
+            (utt_info[2].split(SPACE) for utt_dict in speaker_dict_ch.values()
+             for utt_info in utt_dict.values()),
+            [1, 5, 10, 15])
+        for threshold, oov_rate in oov_rate_dict.items():
+            f.write('Word (freq%d):\n' % threshold)
+            f.write('  OOV rate (eval2000, ch, from stm): %f %%\n' % oov_rate)
 
     return speaker_dict_swbd, speaker_dict_ch
-
-
-def compute_oov_rate(speaker_dict, vocab_file_path):
-
-    with open(vocab_file_path, 'r') as f:
-        vocab_set = set([])
-        for line in f:
-            word = line.strip()
-            vocab_set.add(word)
-
-    oov_count = 0
-    word_num = 0
-    for speaker_dict, utt_dict in speaker_dict.items():
-        for utt_name, utt_info in utt_dict.items():
-            transcript = utt_info[2]
-            word_list = transcript.split(SPACE)
-            word_num += len(word_list)
-
-            for word in word_list:
-                if word not in vocab_set:
-                    oov_count += 1
-
-    oov_rate = oov_count * 100 / word_num
-
-    return oov_rate
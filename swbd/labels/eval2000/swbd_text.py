@@ -13,7 +13,7 @@ from tqdm import tqdm
 from collections import OrderedDict
 
 from swbd.labels.eval2000.fix_trans_text import fix_transcript
-from swbd.labels.eval2000.stm import compute_oov_rate
+from utils.labels.vocabulary import VocabularyBuilder
 
 SPACE = '_'
 
@@ -143,40 +143,24 @@ def read_text(label_paths, pem_path, glm_path, run_root_path,
     # for debug
     # print(sorted(list(char_set)))
 
-    word_freq1_vocab_file_path = join(
-        run_root_path, 'config/vocab_files/word_freq1_' + data_size + '.txt')
-    word_freq5_vocab_file_path = join(
-        run_root_path, 'config/vocab_files/word_freq5_' + data_size + '.txt')
-    word_freq10_vocab_file_path = join(
-        run_root_path, 'config/vocab_files/word_freq10_' + data_size + '.txt')
-    word_freq15_vocab_file_path = join(
-        run_root_path, 'config/vocab_files/word_freq15_' + data_size + '.txt')
+    # NOTE: vocabulary files are used if word counts have been not saved
+    vocab_builder_train = VocabularyBuilder.load_counts(
+        join(run_root_path,
+             'config/vocab_files/word_count_' + data_size + '.txt'),
+        OrderedDict([(threshold, join(
+            run_root_path, 'config/vocab_files/word_freq%d_%s.txt' %
+            (threshold, data_size))) for threshold in [1, 5, 10, 15]]))
 
     # Compute OOV rate
     with open(join(run_root_path, 'config/oov_rate_eval2000_swbd_txt_' + data_size + '.txt'), 'w') as f:
 
-        # word-level (threshold == 1)
-        oov_rate = compute_oov_rate(
-            speaker_dict, word_freq1_vocab_file_path)
-        f.write('Word (freq1):\n')
-        f.write('  OOV rate (eval2000, swbd, from txt): %f %%\n' % oov_rate)
-
-        # word-level (threshold == 5)
-        oov_rate = compute_oov_rate(
-            speaker_dict, word_freq5_vocab_file_path)
-        f.write('Word (freq5):\n')
-        f.write('  OOV rate (eval2000, swbd, from txt): %f %%\n' % oov_rate)
-
-        # word-level (threshold == 10)
-        oov_rate = compute_oov_rate(
-            speaker_dict, word_freq10_vocab_file_path)
-        f.write('Word (freq10):\n')
-        f.write('  OOV rate (eval2000, swbd, from txt): %f %%\n' % oov_rate)
-
-        # word-level (threshold == 15)
-        oov_rate = compute_oov_rate(
-            speaker_dict, word_freq15_vocab_file_path)
-        f.write('Word (freq15):\n')
-        f.write('  OOV rate (eval2000, swbd, from txt): %f %%\n' % oov_rate)
+        # word-level (threshold == 1, 5, 10, 15)
+        oov_rate_dict = vocab_builder_train.oov_rates(
+            (utt_info[2].split(SPACE) for utt_dict in speaker_dict.values()
+             for utt_info in utt_dict.values()),
+            [1, 5, 10, 15])
+        for threshold, oov_rate in oov_rate_dict.items():
+            f.write('Word (freq%d):\n' % threshold)
+            f.write('  OOV rate (eval2000, swbd, from txt): %f %%\n' % oov_rate)
 
     return speaker_dict
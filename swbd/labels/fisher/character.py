@@ -13,6 +13,8 @@ from tqdm import tqdm
 from collections import OrderedDict
 
 from swbd.labels.fisher.fix_trans import fix_transcript
+from utils.labels.vocabulary import VocabularyBuilder
+from utils.parallel import imap_parallel
 
 
 DOUBLE_LETTERS = ['aa', 'bb', 'cc', 'dd', 'ee', 'ff', 'gg', 'hh', 'ii', 'jj',
@@ -27,100 +29,42 @@ VOCALIZED_NOISE = 'VN'
 OOV = 'OOV'
 
 
-def read_trans(label_paths, target_speaker):
+def read_trans(label_paths, num_workers=1):
     """Read transcripts (*_trans.txt) & save files (.npy).
+       Utterances of both speakers are read from each file at once.
     Args:
         label_paths: list of paths to label files
-        target_speaker: A or B
+        num_workers (int, optional): the number of processes to read files
     Returns:
         speaker_dict: dictionary of speakers
             key (string) => speaker
             value (dict) => dictionary of utterance infomation of each speaker
                 key => utterance index
                 value => [start_frame, end_frame, transcript]
-        char_set (set):
-        char_capital_set (set):
-        word_count_dict (dict):
-            key => word
-            value => the number of words in Fisher corpus
+        char_set (set): characters in transcripts of Fisher corpus
+        char_capital_set (set): characters in capital-divided transcripts of
+            Fisher corpus
+        vocab_builder (VocabularyBuilder): word counts in Fisher corpus
     """
     print('=====> Processing target labels...')
-    speaker_dict = OrderedDict()
+    speaker_dict_a, speaker_dict_b = OrderedDict(), OrderedDict()
     char_set, char_capital_set = set([]), set([])
-    word_count_dict = {}
-    vocab_set = set([])
-
-    for label_path in tqdm(label_paths):
-        utterance_dict = OrderedDict()
-        with open(label_path, 'r') as f:
-            utt_index = 0
-            session = basename(label_path).split('.')[0]
-            for line in f:
-                line = line.strip().split(' ')
-                if line[0] in ['#', '']:
-                    continue
-                start_frame = int(float(line[0]) * 100 + 0.05)
-                end_frame = int(float(line[1]) * 100 + 0.05)
-                which_speaker = line[2].replace(':', '')
-                if which_speaker != target_speaker:
-                    continue
-                speaker = session + '-' + which_speaker
-
-                # Clean transcript
-                transcript_original = ' '.join(line[3:]).lower()
-                transcript = fix_transcript(transcript_original)
-
-                # Convert space to "_"
-                transcript = re.sub(r'\s', SPACE, transcript)
-
-                # Skip silence, laughter, noise, vocalized-noise only utterance
-                if transcript.replace(NOISE, '').replace(LAUGHTER, '').replace(VOCALIZED_NOISE, '').replace(SPACE, '') != '':
-
-                    # Remove the first and last space
-                    if transcript[0] == SPACE:
-                        transcript = transcript[1:]
-                    if transcript[-1] == SPACE:
-                        transcript = transcript[:-1]
-
-                    # Count words
-                    for word in transcript.split(SPACE):
-                        vocab_set.add(word)
-                        if word not in word_count_dict.keys():
-                            word_count_dict[word] = 0
-                        word_count_dict[word] += 1
-
-                    # Capital-divided
-                    transcript_capital = ''
-                    for word in transcript.split(SPACE):
-                        if len(word) == 1:
-                            char_capital_set.add(word)
-                            transcript_capital += word
-                        else:
-                            # Replace the first character with the capital
-                            # letter
-                            word = word[0].upper() + word[1:]
-
-                            # Check double-letters
-                            for i in range(0, len(word) - 1, 1):
-                                if word[i:i + 2] in DOUBLE_LETTERS:
-                                    char_capital_set.add(word[i:i + 2])
-                                else:
-                                    char_capital_set.add(word[i])
-                            transcript_capital += word
-
-                    for c in list(transcript):
-                        char_set.add(c)
-
-                    utterance_dict[str(utt_index).zfill(4)] = [
-                        start_frame, end_frame, transcript]
-
-                    # for debug
-                    # print(transcript_original)
-                    # print(transcript)
-
-                utt_index += 1
-
-            speaker_dict[speaker] = utterance_dict
+    vocab_builder = VocabularyBuilder()
+
+    label_paths = list(label_paths)
+    for (session, utterance_dict_a, utterance_dict_b, char_set_session,
+         char_capital_set_session, vocab_builder_session) in tqdm(
+            imap_parallel(_read_session, label_paths, num_workers),
+            total=len(label_paths)):
+        speaker_dict_a[session + '-A'] = utterance_dict_a
+        speaker_dict_b[session + '-B'] = utterance_dict_b
+        char_set |= char_set_session
+        char_capital_set |= char_capital_set_session
+        vocab_builder.merge(vocab_builder_session)
+
+    # NOTE: speakers of A come first
+    speaker_dict = speaker_dict_a
+    speaker_dict.update(speaker_dict_b)
 
     # Reserve some indices
     for mark in [SPACE, HYPHEN, APOSTROPHE, LAUGHTER, NOISE, VOCALIZED_NOISE]:
@@ -132,4 +76,88 @@ def read_trans(label_paths, target_speaker):
     # print(sorted(list(char_set)))
     # print(sorted(list(char_capital_set)))
 
-    return speaker_dict, char_set, char_capital_set, word_count_dict
+    return speaker_dict, char_set, char_capital_set, vocab_builder
+
+
+def _read_session(label_path):
+    """Read utterances of both speakers in a transcript file.
+    Args:
+        label_path (string): path to a label file
+    Returns:
+        session (string): session name
+        utterance_dict_a (OrderedDict): utterances of the speaker A
+        utterance_dict_b (OrderedDict): utterances of the speaker B
+        char_set (set): characters in transcripts of the file
+        char_capital_set (set): characters in capital-divided transcripts of
+            the file, where double letters are counted as single characters
+        vocab_builder (VocabularyBuilder): word counts in the file
+    """
+    session = basename(label_path).split('.')[0]
+    utterance_dict = {'A': OrderedDict(), 'B': OrderedDict()}
+    utt_index = {'A': 0, 'B': 0}
+    char_set, char_capital_set = set([]), set([])
+    vocab_builder = VocabularyBuilder()
+
+    with open(label_path, 'r') as f:
+        for line in f:
+            line = line.strip().split(' ')
+            if line[0] in ['#', '']:
+                continue
+            start_frame = int(float(line[0]) * 100 + 0.05)
+            end_frame = int(float(line[1]) * 100 + 0.05)
+            which_speaker = line[2].replace(':', '')
+            if which_speaker not in utterance_dict.keys():
+                continue
+
+            # Clean transcript
+            transcript_original = ' '.join(line[3:]).lower()
+            transcript = fix_transcript(transcript_original)
+
+            # Convert space to "_"
+            transcript = re.sub(r'\s', SPACE, transcript)
+
+            # Skip silence, laughter, noise, vocalized-noise only utterance
+            if transcript.replace(NOISE, '').replace(LAUGHTER, '').replace(VOCALIZED_NOISE, '').replace(SPACE, '') != '':
+
+                # Remove the first and last space
+                if transcript[0] == SPACE:
+                    transcript = transcript[1:]
+                if transcript[-1] == SPACE:
+                    transcript = transcript[:-1]
+
+                # Count words
+                vocab_builder.add(transcript.split(SPACE))
+
+                # Capital-divided
+                transcript_capital = ''
+                for word in transcript.split(SPACE):
+                    if len(word) == 1:
+                        char_capital_set.add(word)
+                        transcript_capital += word
+                    else:
+                        # Replace the first character with the capital letter
+                        word = word[0].upper() + word[1:]
+
+                        # Check double-letters
+                        for i in range(0, len(word) - 1, 1):
+                            if word[i:i + 2] in DOUBLE_LETTERS:
+                                char_capital_set.add(word[i:i + 2])
+                            else:
+                                char_capital_set.add(word[i])
+                        transcript_capital += word
+
+                for c in list(transcript):
+                    char_set.add(c)
+
+                utterance_dict[which_speaker][
+                    str(utt_index[which_speaker]).zfill(4)] = [
+                        start_frame, end_frame, transcript]
+
+                # for debug
+                # print(transcript_original)
+                # print(transcript)
+
+            utt_index[which_speaker] += 1
+
+    return (session, utterance_dict['A'], utterance_dict['B'], char_set,
+            char_capital_set, vocab_builder)
@@ -8,6 +8,7 @@ from __future__ import division
 from __future__ import print_function
 
 import re
+import numpy as np
 from tqdm import tqdm
 from collections import OrderedDict
 
@@ -15,6 +16,7 @@ from swbd.labels.ldc97s62.word_boundary import read_segmentation
 from swbd.labels.ldc97s62.fix_trans import fix_transcript
 from utils.labels.character import Char2idx
 from utils.labels.word import Word2idx
+from utils.labels.vocabulary import VocabularyBuilder
 from utils.util import mkdir_join
 
 # NOTE:
@@ -49,7 +51,7 @@ OOV = 'OOV'
 def read_trans(label_paths, word_boundary_paths, run_root_path,
                vocab_file_save_path,
                save_vocab_file=False,  speaker_dict_fisher=None,
-               char_set=None, char_capital_set=None, word_count_dict=None):
+               char_set=None, char_capital_set=None, vocab_builder=None):
     """Read transcripts (*_trans.txt) & save files (.npy).
     Args:
         label_paths (list): list of paths to label files
@@ -60,7 +62,7 @@ def read_trans(label_paths, word_boundary_paths, run_root_path,
         speaker_dict_fisher (dict):
         char_set (set):
         char_capital_set (set):
-        word_count_dict (dict):
+        vocab_builder (VocabularyBuilder): word counts of Fisher corpus
     Returns:
         speaker_dict: dictionary of speakers
             key (string) => speaker
@@ -75,14 +77,10 @@ def read_trans(label_paths, word_boundary_paths, run_root_path,
 
     if merge_with_fisher:
         speaker_dict = speaker_dict_fisher
-        vocab_set = set([])
-        for word in word_count_dict.keys():
-            vocab_set.add(word)
     else:
         speaker_dict = OrderedDict()
         char_set, char_capital_set = set([]), set([])
-        word_count_dict = {}
-        vocab_set = set([])
+        vocab_builder = VocabularyBuilder()
 
     for label_path, wb_path in zip(tqdm(label_paths), word_boundary_paths):
         assert label_path == wb_path.replace('word', 'trans')
@@ -151,11 +149,7 @@ def read_trans(label_paths, word_boundary_paths, run_root_path,
                         trans = trans[:-1]
 
                     # Count words
-                    for word in trans.split(SPACE):
-                        vocab_set.add(word)
-                        if word not in word_count_dict.keys():
-                            word_count_dict[word] = 0
-                        word_count_dict[word] += 1
+                    vocab_builder.add(trans.split(SPACE))
 
                     # Capital-divided
                     trans_capital = ''
@@ -219,6 +213,8 @@ def read_trans(label_paths, word_boundary_paths, run_root_path,
         vocab_file_save_path, 'word_freq10_' + data_size + '.txt')
     word_freq15_vocab_file_path = mkdir_join(
         vocab_file_save_path, 'word_freq15_' + data_size + '.txt')
+    word_count_file_path = mkdir_join(
+        vocab_file_save_path, 'word_count_' + data_size + '.txt')
 
     # Reserve some indices
     for mark in [SPACE, HYPHEN, APOSTROPHE, LAUGHTER, NOISE, VOCALIZED_NOISE]:
@@ -247,32 +243,13 @@ def read_trans(label_paths, word_boundary_paths, run_root_path,
             for char in char_capital_list:
                 f.write('%s\n' % char)
 
-        # word-level (threshold == 1)
-        with open(word_freq1_vocab_file_path, 'w') as f:
-            vocab_list = sorted(list(vocab_set)) + [OOV]
-            for word in vocab_list:
-                f.write('%s\n' % word)
-
-        # word-level (threshold == 5)
-        with open(word_freq5_vocab_file_path, 'w') as f:
-            vocab_list = sorted([word for word, freq in list(word_count_dict.items())
-                                 if freq >= 5]) + [OOV]
-            for word in vocab_list:
-                f.write('%s\n' % word)
-
-        # word-level (threshold == 10)
-        with open(word_freq10_vocab_file_path, 'w') as f:
-            vocab_list = sorted([word for word, freq in list(word_count_dict.items())
-                                 if freq >= 10]) + [OOV]
-            for word in vocab_list:
-                f.write('%s\n' % word)
-
-        # word-level (threshold == 15)
-        with open(word_freq15_vocab_file_path, 'w') as f:
-            vocab_list = sorted([word for word, freq in list(word_count_dict.items())
-                                 if freq >= 15]) + [OOV]
-            for word in vocab_list:
-                f.write('%s\n' % word)
+        # word-level (threshold == 1, 5, 10, 15)
+        vocab_builder.save(OrderedDict([
+            (1, word_freq1_vocab_file_path),
+            (5, word_freq5_vocab_file_path),
+            (10, word_freq10_vocab_file_path),
+            (15, word_freq15_vocab_file_path)]), oov=OOV)
+        vocab_builder.save_counts(word_count_file_path)
 
     # Tokenize
     print('=====> Tokenize...')
@@ -283,27 +260,23 @@ def read_trans(label_paths, word_boundary_paths, run_root_path,
     word2idx_freq5 = Word2idx(word_freq5_vocab_file_path)
     word2idx_freq10 = Word2idx(word_freq10_vocab_file_path)
     word2idx_freq15 = Word2idx(word_freq15_vocab_file_path)
+
+    # Convert characters of all utterances at once
+    transcripts = [utt_info[2] for utt_dict in speaker_dict.values()
+                   for utt_info in utt_dict.values()]
+    values, offsets = char2idx.tokenize_batch(transcripts)
+    char_indices_iter = iter(np.split(values, offsets[1:-1]))
+    values, offsets = char2idx_capital.tokenize_batch(transcripts)
+    char_indices_capital_iter = iter(np.split(values, offsets[1:-1]))
     for speaker, utt_dict in tqdm(speaker_dict.items()):
         for utt_index, [start_frame, end_frame, transcript] in utt_dict.items():
-            char_indices = char2idx(transcript)
-            char_indices_capital = char2idx_capital(transcript)
+            char_indices = next(char_indices_iter)
+            char_indices_capital = next(char_indices_capital_iter)
             word_freq1_indices = word2idx_freq1(transcript)
             word_freq5_indices = word2idx_freq5(transcript)
             word_freq10_indices = word2idx_freq10(transcript)
             word_freq15_indices = word2idx_freq15(transcript)
 
-            char_indices = ' '.join(list(map(str, char_indices.tolist())))
-            char_indices_capital = ' '.join(
-                list(map(str, char_indices_capital.tolist())))
-            word_freq1_indices = ' '.join(
-                list(map(str, word_freq1_indices.tolist())))
-            word_freq5_indices = ' '.join(
-                list(map(str, word_freq5_indices.tolist())))
-            word_freq10_indices = ' '.join(
-                list(map(str, word_freq10_indices.tolist())))
-            word_freq15_indices = ' '.join(
-                list(map(str, word_freq15_indices.tolist())))
-
             utt_dict[utt_index] = [start_frame, end_frame,
                                    char_indices, char_indices_capital,
                                    word_freq1_indices, word_freq5_indices,
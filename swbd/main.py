@@ -12,10 +12,9 @@ from __future__ import print_function
 from os.path import join, isfile
 import sys
 import argparse
+from collections import OrderedDict
 from tqdm import tqdm
 import numpy as np
-import pandas as pd
-from collections import Counter
 import pickle
 
 sys.path.append('../')
@@ -25,8 +24,9 @@ from swbd.labels.ldc97s62.character import read_trans
 from swbd.labels.fisher.character import read_trans as read_trans_fisher
 from swbd.labels.eval2000.stm import read_stm
 from utils.util import mkdir_join
+from utils.inputs.archive import ArchiveReader
 from utils.inputs.wav_split import split_wav
-from utils.dataset import add_element
+from utils.dataset import MultiLabelManifest
 
 parser = argparse.ArgumentParser()
 parser.add_argument('--swbd_audio_path', type=str,
@@ -45,12 +45,14 @@ parser.add_argument('--feature_save_path', type=str,
 parser.add_argument('--run_root_path', type=str,
                     help='path to run this script')
 parser.add_argument('--tool', type=str,
-                    choices=['htk', 'python_speech_features', 'librosa'])
+                    choices=['htk', 'python_speech_features', 'librosa',
+                             'numpy'])
 parser.add_argument('--wav_save_path', type=str, help='path to wav files.')
 parser.add_argument('--htk_save_path', type=str, help='path to htk files.')
 parser.add_argument('--normalize', type=str,
                     choices=['global', 'speaker', 'utterance', 'no'])
-parser.add_argument('--save_format', type=str, choices=['numpy', 'htk', 'wav'])
+parser.add_argument('--save_format', type=str,
+                    choices=['numpy', 'htk', 'archive', 'wav'])
 
 parser.add_argument('--feature_type', type=str, choices=['fbank', 'mfcc'])
 parser.add_argument('--channels', type=int,
@@ -64,6 +66,16 @@ parser.add_argument('--deltadelta', type=int,
                     help='if 1, double delta features are also extracted')
 parser.add_argument('--fisher', type=int,
                     help='If True, create large-size dataset (2000h).')
+parser.add_argument('--num_workers', type=int, default=1,
+                    help='the number of processes to extract features')
+parser.add_argument('--read_sph', type=int, default=0,
+                    help='if 1, extract features from sph files of Fisher '
+                    'directly without intermediate wav files (not for htk). '
+                    'Switchboard & eval2000 are read from wav files because '
+                    'their sph files are shorten-compressed.')
+parser.add_argument('--window_limited', type=int, default=0,
+                    help='if 1, read only samples of utterances from audio '
+                    'files (only for numpy).')
 
 args = parser.parse_args()
 path = Path(swbd_audio_path=args.swbd_audio_path,
@@ -110,19 +122,10 @@ def main(data_size):
             vocab_file_save_path=mkdir_join('./config/vocab_files'),
             save_vocab_file=True)
     elif data_size == '2000h':
-        speaker_dict_a, char_set_a, char_capital_set_a, word_count_dict_a = read_trans_fisher(
+        # NOTE: both speakers are read at once
+        speaker_dict, char_set, char_capital_set, vocab_builder_fisher = read_trans_fisher(
             label_paths=path.trans(corpus='fisher'),
-            target_speaker='A')
-        speaker_dict_b, char_set_b, char_capital_set_b, word_count_dict_b = read_trans_fisher(
-            label_paths=path.trans(corpus='fisher'),
-            target_speaker='B')
-
-        # Meage 2 dictionaries
-        speaker_dict = merge_dicts([speaker_dict_a, speaker_dict_b])
-        char_set = char_set_a | char_set_b
-        char_capital_set = char_capital_set_a | char_capital_set_b
-        word_count_dict_fisher = dict(
-            Counter(word_count_dict_a) + Counter(word_count_dict_b))
+            num_workers=args.num_workers)
 
         speaker_dict_dict['train'] = read_trans(
             label_paths=path.trans(corpus='swbd'),
@@ -133,7 +136,7 @@ def main(data_size):
             speaker_dict_fisher=speaker_dict,
             char_set=char_set,
             char_capital_set=char_capital_set,
-            word_count_dict=word_count_dict_fisher)
+            vocab_builder=vocab_builder_fisher)
         del speaker_dict
 
     print('---------- eval2000 (swbd + ch) ----------')
@@ -171,12 +174,17 @@ def main(data_size):
                 # NOTE: ex.) save_path:
                 # swbd/feature/save_format/data_size/data_type/speaker/utt_name.npy
 
-            elif args.save_format in ['numpy', 'htk']:
+            elif args.save_format in ['numpy', 'htk', 'archive']:
                 if data_type == 'train':
                     if args.tool == 'htk':
                         audio_paths = path.htk(corpus='swbd')
                         if data_size == '2000h':
                             audio_paths += path.htk(corpus='fisher')
+                    elif bool(args.read_sph):
+                        # NOTE: only Fisher is not compressed
+                        audio_paths = path.wav(corpus='swbd')
+                        if data_size == '2000h':
+                            audio_paths += path.sph(corpus='fisher')
                     else:
                         audio_paths = path.wav(corpus='swbd')
                         if data_size == '2000h':
@@ -205,7 +213,9 @@ def main(data_size):
                            save_path=mkdir_join(input_save_path, data_type),
                            save_format=args.save_format,
                            global_mean=global_mean,
-                           global_std=global_std)
+                           global_std=global_std,
+                           num_workers=args.num_workers,
+                           window_limited=bool(args.window_limited))
                 # NOTE: ex.) save_path:
                 # swbd/feature/save_format/data_size/data_type/speaker/*.npy
 
@@ -222,21 +232,19 @@ def main(data_size):
             args.dataset_save_path, args.save_format, data_size, data_type)
 
         print('---------- %s ----------' % data_type)
-        df_columns = ['frame_num', 'input_path', 'transcript']
-        df_char = pd.DataFrame([], columns=df_columns)
-        df_char_capital = pd.DataFrame([], columns=df_columns)
-        df_word_freq1 = pd.DataFrame([], columns=df_columns)
-        df_word_freq5 = pd.DataFrame([], columns=df_columns)
-        df_word_freq10 = pd.DataFrame([], columns=df_columns)
-        df_word_freq15 = pd.DataFrame([], columns=df_columns)
+        label_types = ['character', 'character_capital_divide', 'word_freq1',
+                       'word_freq5', 'word_freq10', 'word_freq15']
+        manifest = MultiLabelManifest(OrderedDict(
+            [(label_type, join(dataset_save_path, label_type + '.csv'))
+             for label_type in label_types]),
+            binary_save_path=join(dataset_save_path, 'dataset.npz'))
 
         with open(join(input_save_path, data_type, 'frame_num.pickle'), 'rb') as f:
             frame_num_dict = pickle.load(f)
 
-        utt_count = 0
-        df_char_list, df_char_capital_list = [], []
-        df_word_freq1_list, df_word_freq5_list = [], []
-        df_word_freq10_list, df_word_freq15_list = [], []
+        if args.save_format == 'archive':
+            archive_reader = ArchiveReader(join(input_save_path, data_type))
+
         speaker_dict = speaker_dict_dict[data_type]
         for speaker, utt_dict in tqdm(speaker_dict.items()):
             for utt_index, utt_info in utt_dict.items():
@@ -246,88 +254,26 @@ def main(data_size):
                 elif args.save_format == 'htk':
                     input_utt_save_path = join(
                         input_save_path, data_type, speaker, speaker + '_' + utt_index + '.htk')
+                elif args.save_format == 'archive':
+                    input_utt_save_path = archive_reader.specifier(speaker + '_' + utt_index)
                 elif args.save_format == 'wav':
                     input_utt_save_path = path.utt2wav(utt_index)
                 else:
-                    raise ValueError('save_format is numpy or htk or wav.')
+                    raise ValueError('save_format is numpy or htk or archive or wav.')
 
-                assert isfile(input_utt_save_path)
+                if args.save_format != 'archive':
+                    assert isfile(input_utt_save_path)
                 frame_num = frame_num_dict[speaker + '_' + utt_index]
 
                 char_indices, char_indices_capital, word_freq1_indices = utt_info[2:5]
                 word_freq5_indices, word_freq10_indices, word_freq15_indices = utt_info[5:8]
 
-                df_char = add_element(
-                    df_char, [frame_num, input_utt_save_path, char_indices])
-                df_char_capital = add_element(
-                    df_char_capital, [frame_num, input_utt_save_path, char_indices_capital])
-                df_word_freq1 = add_element(
-                    df_word_freq1, [frame_num, input_utt_save_path, word_freq1_indices])
-                df_word_freq5 = add_element(
-                    df_word_freq5, [frame_num, input_utt_save_path, word_freq5_indices])
-                df_word_freq10 = add_element(
-                    df_word_freq10, [frame_num, input_utt_save_path, word_freq10_indices])
-                df_word_freq15 = add_element(
-                    df_word_freq15, [frame_num, input_utt_save_path, word_freq15_indices])
-                utt_count += 1
-
-                # Reset
-                if utt_count == 10000:
-                    df_char_list.append(df_char)
-                    df_char_capital_list.append(df_char_capital)
-                    df_word_freq1_list.append(df_word_freq1)
-                    df_word_freq5_list.append(df_word_freq5)
-                    df_word_freq10_list.append(df_word_freq10)
-                    df_word_freq15_list.append(df_word_freq15)
-
-                    df_char = pd.DataFrame([], columns=df_columns)
-                    df_char_capital = pd.DataFrame([], columns=df_columns)
-                    df_word_freq1 = pd.DataFrame([], columns=df_columns)
-                    df_word_freq5 = pd.DataFrame([], columns=df_columns)
-                    df_word_freq10 = pd.DataFrame([], columns=df_columns)
-                    df_word_freq15 = pd.DataFrame([], columns=df_columns)
-                    utt_count = 0
-
-        # Last dataframe
-        df_char_list.append(df_char)
-        df_char_capital_list.append(df_char_capital)
-        df_word_freq1_list.append(df_word_freq1)
-        df_word_freq5_list.append(df_word_freq5)
-        df_word_freq10_list.append(df_word_freq10)
-        df_word_freq15_list.append(df_word_freq15)
-
-        # Concatenate all dataframes
-        df_char = df_char_list[0]
-        df_char_capital = df_char_capital_list[0]
-        df_word_freq1 = df_word_freq1_list[0]
-        df_word_freq5 = df_word_freq5_list[0]
-        df_word_freq10 = df_word_freq10_list[0]
-        df_word_freq15 = df_word_freq15_list[0]
-
-        for df_i in df_char_list[1:]:
-            df_char = pd.concat([df_char, df_i], axis=0)
-        for df_i in df_char_list[1:]:
-            df_char_capital = pd.concat([df_char_capital, df_i], axis=0)
-        for df_i in df_word_freq1_list[1:]:
-            df_word_freq1 = pd.concat([df_word_freq1, df_i], axis=0)
-        for df_i in df_word_freq5_list[1:]:
-            df_word_freq5 = pd.concat([df_word_freq5, df_i], axis=0)
-        for df_i in df_word_freq10_list[1:]:
-            df_word_freq10 = pd.concat([df_word_freq10, df_i], axis=0)
-        for df_i in df_word_freq15_list[1:]:
-            df_word_freq15 = pd.concat([df_word_freq15, df_i], axis=0)
-
-        df_char.to_csv(join(dataset_save_path, 'character.csv'))
-        df_char_capital.to_csv(
-            join(dataset_save_path, 'character_capital_divide.csv'))
-        df_word_freq1.to_csv(join(dataset_save_path, 'word_freq1.csv'))
-        df_word_freq5.to_csv(join(dataset_save_path, 'word_freq5.csv'))
-        df_word_freq10.to_csv(join(dataset_save_path, 'word_freq10.csv'))
-        df_word_freq15.to_csv(join(dataset_save_path, 'word_freq15.csv'))
-
-
-def merge_dicts(dicts):
-    return {k: v for dic in dicts for k, v in dic.items()}
+                manifest.add(frame_num, input_utt_save_path,
+                             [char_indices, char_indices_capital,
+                              word_freq1_indices, word_freq5_indices,
+                              word_freq10_indices, word_freq15_indices])
+
+        manifest.save()
 
 
 if __name__ == '__main__':
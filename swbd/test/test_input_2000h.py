@@ -9,7 +9,6 @@ from os.path import join
 import sys
 import unittest
 from glob import glob
-from collections import Counter
 
 sys.path.append('../../')
 from swbd.input_data import read_audio
@@ -66,18 +65,8 @@ class TestInput2000h(unittest.TestCase):
 
     def test(self):
 
-        speaker_dict_a, char_set_a, char_capital_set_a, word_count_dict_a = read_trans_fisher(
-            label_paths=label_paths_fisher,
-            target_speaker='A')
-        speaker_dict_b, char_set_b, char_capital_set_b, word_count_dict_b = read_trans_fisher(
-            label_paths=label_paths_fisher, target_speaker='B')
-
-        # Meage 2 dictionaries
-        speaker_dict_fisher = merge_dicts([speaker_dict_a, speaker_dict_b])
-        char_set = char_set_a | char_set_b
-        char_capital_set = char_capital_set_a | char_capital_set_b
-        word_count_dict_fisher = dict(
-            Counter(word_count_dict_a) + Counter(word_count_dict_b))
+        speaker_dict_fisher, char_set, char_capital_set, vocab_builder_fisher = read_trans_fisher(
+            label_paths=label_paths_fisher)
 
         self.speaker_dict = read_trans_swbd(
             label_paths=label_paths_swbd,
@@ -87,7 +76,7 @@ class TestInput2000h(unittest.TestCase):
             speaker_dict_fisher=speaker_dict_fisher,
             char_set=char_set,
             char_capital_set=char_capital_set,
-            word_count_dict=word_count_dict_fisher)
+            vocab_builder=vocab_builder_fisher)
 
         self.check(normalize='global', tool='htk')
         self.check(normalize='speaker', tool='htk')
@@ -119,9 +108,5 @@ class TestInput2000h(unittest.TestCase):
                    is_training=True)
 
 
-def merge_dicts(dicts):
-    return {k: v for dic in dicts for k, v in dic.items()}
-
-
 if __name__ == '__main__':
     unittest.main()
@@ -9,7 +9,6 @@ from os.path import join
 import sys
 import unittest
 from glob import glob
-from collections import Counter
 
 sys.path.append('../../')
 from swbd.labels.ldc97s62.character import read_trans as read_trans_swbd
@@ -42,18 +41,8 @@ class TestLabel2000h(unittest.TestCase):
     @measure_time
     def check(self):
 
-        speaker_dict_a, char_set_a, char_capital_set_a, word_count_dict_a = read_trans_fisher(
-            label_paths=label_paths_fisher,
-            target_speaker='A')
-        speaker_dict_b, char_set_b, char_capital_set_b, word_count_dict_b = read_trans_fisher(
-            label_paths=label_paths_fisher, target_speaker='B')
-
-        # Meage 2 dictionaries
-        speaker_dict_fisher = merge_dicts([speaker_dict_a, speaker_dict_b])
-        char_set = char_set_a | char_set_b
-        char_capital_set = char_capital_set_a | char_capital_set_b
-        word_count_dict_fisher = dict(
-            Counter(word_count_dict_a) + Counter(word_count_dict_b))
+        speaker_dict_fisher, char_set, char_capital_set, vocab_builder_fisher = read_trans_fisher(
+            label_paths=label_paths_fisher)
 
         read_trans_swbd(
             label_paths=label_paths_swbd,
@@ -63,11 +52,7 @@ class TestLabel2000h(unittest.TestCase):
             speaker_dict_fisher=speaker_dict_fisher,
             char_set=char_set,
             char_capital_set=char_capital_set,
-            word_count_dict=word_count_dict_fisher)
-
-
-def merge_dicts(dicts):
-    return {k: v for dic in dicts for k, v in dic.items()}
+            vocab_builder=vocab_builder_fisher)
 
 
 if __name__ == '__main__':
@@ -33,8 +33,8 @@ class TestLabelFisher(unittest.TestCase):
     @measure_time
     def check(self):
 
-        read_trans(label_paths=label_paths, target_speaker='A')
-        read_trans(label_paths=label_paths, target_speaker='B')
+        read_trans(label_paths=label_paths)
+        read_trans(label_paths=label_paths, num_workers=4)
 
 
 if __name__ == '__main__':
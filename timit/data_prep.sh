@@ -13,6 +13,7 @@ HCOPY_PATH='/home/lab5/inaguma/htk-3.4/bin/HCopy'
 TOOL='htk'
 # TOOL='python_speech_features'
 # TOOL='librosa'
+# TOOL='numpy'
 # TOOL='kaldi'  # under implementation
 
 ### Configuration (Set by yourself)
@@ -31,9 +32,13 @@ NORMALIZE='speaker'
 
 SAVE_FORMAT='numpy'
 # SAVE_FORMAT='htk'
+# SAVE_FORMAT='archive'
 # SAVE_FORMAT='wav'
 # NOTE: normalization will not be conducted in case of wav
 
+# the number of processes to extract features
+NUM_WORKERS=1
+
 
 ########################################
 # ↓↓↓ Don't change from here ↓↓↓
@@ -110,6 +115,7 @@ python main.py \
   --htk_save_path $HTK_SAVE_PATH \
   --normalize $NORMALIZE \
   --save_format $SAVE_FORMAT \
+  --num_workers $NUM_WORKERS \
   --feature_type $FEATURE_TYPE \
   --channels $CHANNELS \
   --window $WINDOW \
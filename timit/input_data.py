@@ -8,26 +8,32 @@ from __future__ import division
 from __future__ import print_function
 
 from os.path import join, basename
+from functools import partial
 import numpy as np
 import pickle
 from tqdm import tqdm
 
-from utils.util import mkdir_join
-from utils.inputs.htk import read, write
-from utils.inputs.wav2feature_python_speech_features import wav2feature as w2f_psf
-from utils.inputs.wav2feature_librosa import wav2feature as w2f_librosa
+from utils.parallel import imap_parallel
+from utils.inputs.feature_io import extract_feature, feature_path
+from utils.inputs.feature_io import save_feature, normalize_feature
+from utils.inputs.statistics import Statistics
+from utils.inputs.archive import ArchiveWriter, ArchiveReader
 
 
 def read_audio(audio_paths, tool, config, normalize, is_training,
                save_path=None, save_format=None,
                global_mean_male=None, global_std_male=None,
                global_mean_female=None, global_std_female=None,
-               dtype=np.float32):
+               dtype=np.float32, num_workers=1):
     """Read audio files.
+       Each audio file is decoded only once and statistics are accumulated
+       per gender and speaker in constant memory. When the statistics over
+       the training set are required, raw features are saved in the first
+       pass and normalized in place in the second pass.
     Args:
         audio_paths (list): paths to audio files
         tool (string): the tool to extract features,
-            htk or librosa or python_speech_features
+            htk or librosa or python_speech_features or numpy
         config (dict): a configuration for feature extraction
         normalize (string):
             no => normalization will be not conducted
@@ -38,7 +44,7 @@ def read_audio(audio_paths, tool, config, normalize, is_training,
                          data by mean & std per utterance
         is_training (bool, optional):  Set True when proccessing the training set
         save_path (string): path to save npy files
-        save_format (string, optional): numpy as htk
+        save_format (string, optional): numpy or htk or archive
         global_mean_male (np.ndarray, optional): global mean of male over
             the training set
         global_std_male (np.ndarray, optional): global standard deviation
@@ -48,6 +54,8 @@ def read_audio(audio_paths, tool, config, normalize, is_training,
         global_std_female (np.ndarray, optional): global standard
             deviation of female over the training set
         dtype (optional): the type of data, default is np.float32
+        num_workers (int, optional): the number of processes to extract
+            features in parallel
     Returns:
         global_mean_male (np.ndarray): global mean of male over the
             training set
@@ -68,195 +76,168 @@ def read_audio(audio_paths, tool, config, normalize, is_training,
     if normalize not in ['global', 'speaker', 'utterance', 'no']:
         raise ValueError(
             'normalize must be "utterance" or "speaker" or "global" or "no".')
+    if save_path is not None and save_format not in ['numpy', 'htk', 'archive']:
+        raise ValueError('save_format is numpy or htk or archive.')
 
-    # Read each audio file
-    print('=====> Reading audio files...')
-    audio_paths_male, audio_paths_female = [], []
-    input_data_list_male, input_data_list_female = [], []
-    total_frame_num_male, total_frame_num_female = 0, 0
-    total_frame_num_dict = {}
-    speaker_mean_dict, speaker_std_dict = {}, {}
-    for audio_path in tqdm(audio_paths):
+    # NOTE: When the statistics over the training set are necessary for
+    # normalization, raw features are saved in the first pass and normalized
+    # in the second pass. Otherwise, features are normalized & saved at once.
+    two_pass = is_training and normalize in ['global', 'speaker']
+
+    task_list = []
+    for audio_path in audio_paths:
         speaker = audio_path.split('/')[-2]
         gender = speaker[0]  # f (female) or m (male)
         utt_index = basename(audio_path).split('.')[0]
-
-        if tool == 'htk':
-            input_utt, sampPeriod, parmKind = read(audio_path)
-            # NOTE: audio_path is a htk file path in this case
-        elif tool == 'python_speech_features':
-            input_utt = w2f_psf(
-                audio_path,
-                feature_type=config['feature_type'],
-                feature_dim=config['channels'],
-                use_energy=config['energy'],
-                use_delta1=config['delta'],
-                use_delta2=config['deltadelta'],
-                window=config['window'],
-                slide=config['slide'])
-        elif tool == 'librosa':
-            input_utt = w2f_librosa(
-                audio_path,
-                feature_type=config['feature_type'],
-                feature_dim=config['channels'],
-                use_energy=config['energy'],
-                use_delta1=config['delta'],
-                use_delta2=config['deltadelta'],
-                window=config['window'],
-                slide=config['slide'])
-
-        # for debug
-        # print(input_utt.shape)
-
-        if gender == 'm':
-            input_data_list_male.append(input_utt)
-            audio_paths_male.append(audio_path)
-        elif gender == 'f':
-            input_data_list_female.append(input_utt)
-            audio_paths_female.append(audio_path)
-        else:
+        utt_name = speaker + '_' + utt_index
+        if gender not in ['m', 'f']:
             raise ValueError('gender is m or f.')
+        task_list.append((audio_path, utt_name, speaker, gender))
+        # NOTE: audio_path is a htk file path in case of htk
 
-        if is_training:
-            speaker = audio_path.split('/')[-2]
-            gender = speaker[0]
-            frame_num_utt, feat_dim = input_utt.shape
-
-            if gender == 'm':
-                total_frame_num_male += frame_num_utt
-            elif gender == 'f':
-                total_frame_num_female += frame_num_utt
-            else:
-                raise ValueError('gender is m or f.')
-
-            if normalize == 'speaker':
-                # Initialization
-                if speaker not in total_frame_num_dict.keys():
-                    total_frame_num_dict[speaker] = 0
-                    speaker_mean_dict[speaker] = np.zeros((feat_dim,),
-                                                          dtype=dtype)
-                    speaker_std_dict[speaker] = np.zeros((feat_dim,),
-                                                         dtype=dtype)
-
-                total_frame_num_dict[speaker] += frame_num_utt
-                speaker_mean_dict[speaker] += np.sum(input_utt, axis=0)
-    # NOTE: Load all data in advance because TIMIT is a small dataset.
+    # Loop 1: Extract features & accumulate statistics
+    print('=====> Reading audio files...')
+    func = partial(_read_utterance,
+                   tool=tool,
+                   config=config,
+                   normalize=normalize,
+                   is_training=is_training,
+                   two_pass=two_pass,
+                   save_path=save_path,
+                   save_format=save_format,
+                   global_mean_std={'m': (global_mean_male, global_std_male),
+                                    'f': (global_mean_female, global_std_female)},
+                   dtype=dtype)
+    frame_num_dict = {}
+    if save_path is not None and save_format == 'archive':
+        archive_writer = ArchiveWriter(save_path)
+    gender_stats, speaker_stats = Statistics(), Statistics()
+    for (_, utt_name, _, _), (frame_num, gender_stats_utt, speaker_stats_utt, archive_list) in zip(
+            task_list, tqdm(imap_parallel(func, task_list, num_workers),
+                            total=len(task_list))):
+        frame_num_dict[utt_name] = frame_num
+        gender_stats.merge(gender_stats_utt)
+        speaker_stats.merge(speaker_stats_utt)
+        for archive_args in archive_list:
+            archive_writer.write(*archive_args)
+
+    if save_path is not None and save_format == 'archive':
+        archive_writer.close()
 
     if is_training and normalize != 'no':
-        # Compute speaker mean
-        if normalize == 'speaker':
-            for speaker in speaker_mean_dict.keys():
-                speaker_mean_dict[speaker] /= total_frame_num_dict[speaker]
-
         # Compute global mean & std per gender
-        print('=====> Computing global mean & std over the training set...')
-        frame_offset = 0
-        feat_dim = input_data_list_male[0].shape[1]
-        train_data_male = np.empty((total_frame_num_male, feat_dim))
-        train_data_female = np.empty((total_frame_num_female, feat_dim))
-        # male
-        for input_utt, audio_path in zip(tqdm(input_data_list_male),
-                                         audio_paths_male):
-            speaker = audio_path.split('/')[-2]
-            frame_num_utt = input_utt.shape[0]
-            train_data_male[frame_offset:frame_offset +
-                            frame_num_utt] = input_utt
-            frame_offset += frame_num_utt
+        global_mean_male = gender_stats.mean('m', dtype=dtype)
+        global_std_male = gender_stats.std('m', ddof=0, dtype=dtype)
+        global_mean_female = gender_stats.mean('f', dtype=dtype)
+        global_std_female = gender_stats.std('f', ddof=0, dtype=dtype)
 
+        if save_path is not None:
+            # Save global mean & std per gender
+            # NOTE: a gender absent in the subset has no statistics
+            for name, value in [
+                    ('global_mean_male', global_mean_male),
+                    ('global_std_male', global_std_male),
+                    ('global_mean_female', global_mean_female),
+                    ('global_std_female', global_std_female)]:
+                if value is not None:
+                    np.save(join(save_path, name + '.npy'), value)
+            gender_stats.save(join(save_path, 'statistics.npz'))
+
+    # Loop 2: Normalize the saved features in place
+    if two_pass and save_path is not None:
+        print('=====> Normalization...')
+        if save_format == 'archive':
+            with ArchiveReader(save_path) as archive_reader:
+                specifier_dict = dict(
+                    (utt_name, archive_reader.specifier(utt_name))
+                    for utt_name in archive_reader.keys())
+        normalize_task_list = []
+        for _, utt_name, speaker, gender in task_list:
             if normalize == 'speaker':
-                speaker_std_dict[speaker] += np.sum(
-                    np.abs(input_utt -
-                           speaker_mean_dict[speaker]) ** 2, axis=0)
-        # female
-        frame_offset = 0
-        for input_utt, audio_path in zip(tqdm(input_data_list_female),
-                                         audio_paths_female):
-            speaker = audio_path.split('/')[-2]
-            frame_num_utt = input_utt.shape[0]
-            train_data_female[frame_offset:frame_offset +
-                              frame_num_utt] = input_utt
-            frame_offset += frame_num_utt
+                mean = speaker_stats.mean(speaker, dtype=dtype)
+                std = speaker_stats.std(speaker, dtype=dtype)
+            elif gender == 'm':
+                mean, std = global_mean_male, global_std_male
+            else:
+                mean, std = global_mean_female, global_std_female
+            if save_format == 'archive':
+                input_path = specifier_dict[utt_name]
+            else:
+                input_path = feature_path(
+                    save_path, speaker, utt_name, save_format)
+            normalize_task_list.append((input_path, save_format, mean, std))
+        for _ in tqdm(imap_parallel(normalize_feature, normalize_task_list,
+                                    num_workers),
+                      total=len(normalize_task_list)):
+            pass
 
-            if normalize == 'speaker':
-                speaker_std_dict[speaker] += np.sum(
-                    np.abs(input_utt -
-                           speaker_mean_dict[speaker]) ** 2, axis=0)
+    if save_path is not None:
+        # Save the frame number dictionary
+        with open(join(save_path, 'frame_num.pickle'), 'wb') as f:
+            pickle.dump(frame_num_dict, f)
 
-        # Compute speaker std
-        if normalize == 'speaker':
-            for speaker in speaker_std_dict.keys():
-                speaker_std_dict[speaker] = np.sqrt(
-                    speaker_std_dict[speaker] / (total_frame_num_dict[speaker] - 1))
+    return (global_mean_male, global_std_male,
+            global_mean_female, global_std_female, frame_num_dict)
 
-        global_mean_male = np.mean(train_data_male, axis=0)
-        global_std_male = np.std(train_data_male, axis=0)
-        global_mean_female = np.mean(train_data_female, axis=0)
-        global_std_female = np.std(train_data_female, axis=0)
 
-        if save_path is not None:
-            # Save global mean & std
-            np.save(join(save_path, 'global_mean_male.npy'),
-                    global_mean_male)
-            np.save(join(save_path, 'global_std_male.npy'),
-                    global_std_male)
-            np.save(join(save_path, 'global_mean_female.npy'),
-                    global_mean_female)
-            np.save(join(save_path, 'global_std_female.npy'),
-                    global_std_female)
+def _read_utterance(args, tool, config, normalize, is_training, two_pass,
+                    save_path, save_format, global_mean_std, dtype):
+    """Extract, normalize & save input features of an utterance.
+       This is called in worker processes.
+    Args:
+        args (tuple): (audio_path, utt_name, speaker, gender)
+        tool (string): htk or python_speech_features or librosa or numpy
+        config (dict): a configuration for feature extraction
+        normalize (string): global or speaker or utterance or no
+        is_training (bool): Set True when proccessing the training set
+        two_pass (bool): if True, save features without normalization
+        save_path (string): path to save files
+        save_format (string): numpy or htk or archive
+        global_mean_std (dict):
+            key (string) => gender
+            value (tuple) => (global mean, global std)
+        dtype: the type of data
+    Returns:
+        frame_num (int): the number of frames
+        gender_stats (Statistics): statistics of the utterance per gender
+        speaker_stats (Statistics): statistics of the utterance per speaker
+        archive_list (list): list of (utt_name, input_utt, sampPeriod, parmKind)
+            to be appended to shards in case of archive
+    """
+    audio_path, utt_name, speaker, gender = args
+    gender_stats, speaker_stats = Statistics(), Statistics()
 
-    # Save input features as npy files
-    print('=====> Normalization...')
-    frame_num_dict = {}
-    for input_utt, audio_path in zip(tqdm(input_data_list_male + input_data_list_female),
-                                     audio_paths_male + audio_paths_female):
-        speaker = audio_path.split('/')[-2]
-        utt_index = basename(audio_path).split('.')[0]
-        gender = speaker[0]
+    input_utt, sampPeriod, parmKind = extract_feature(
+        audio_path, tool, config, dtype)
 
-        if normalize == 'no':
-            pass
-        elif normalize == 'global' or not is_training:
+    if is_training:
+        # For computing global mean & std per gender
+        gender_stats.add(gender, input_utt)
+
+        # For computing speaker mean & std
+        if normalize == 'speaker':
+            speaker_stats.add(speaker, input_utt)
+
+    if not two_pass:
+        if normalize == 'global' or (not is_training and normalize != 'no'):
             # Normalize by global mean & std over the training set
-            if gender == 'm':
-                input_utt -= global_mean_male
-                input_utt /= global_std_male
-            elif gender == 'f':
-                input_utt -= global_mean_female
-                input_utt /= global_std_female
-            else:
-                raise ValueError('gender is m or f.')
-        elif normalize == 'speaker':
-            # Normalize by mean & std per speaker
-            input_utt -= speaker_mean_dict[speaker]
-            input_utt /= speaker_std_dict[speaker]
+            global_mean, global_std = global_mean_std[gender]
+            input_utt -= global_mean
+            input_utt /= global_std
         elif normalize == 'utterance':
             # Normalize by mean & std per utterance
             utt_mean = np.mean(input_utt, axis=0, dtype=dtype)
             utt_std = np.std(input_utt, axis=0, dtype=dtype)
             input_utt = (input_utt - utt_mean) / utt_std
-        else:
-            raise ValueError
-
-        frame_num_dict[speaker + '_' + utt_index] = input_utt.shape[0]
-
-        if save_path is not None:
-            # Save input features
-            if save_format == 'numpy':
-                np.save(mkdir_join(save_path, speaker, speaker + '_' +
-                                   utt_index + '.npy'), input_utt)
-            elif save_format == 'htk':
-                write(input_utt,
-                      htk_path=mkdir_join(
-                          save_path, speaker, speaker + '_' + utt_index + '.htk'),
-                      sampPeriod=sampPeriod,
-                      parmKind=parmKind)
-            else:
-                raise ValueError('save_format is numpy or htk.')
 
+    archive_list = []
     if save_path is not None:
-        # Save the frame number dictionary
-        with open(join(save_path, 'frame_num.pickle'), 'wb') as f:
-            pickle.dump(frame_num_dict, f)
+        if save_format == 'archive':
+            # NOTE: appended to shards in the main process
+            archive_list.append((utt_name, input_utt, sampPeriod, parmKind))
+        else:
+            # Save input features (not normalized yet in case of two_pass)
+            save_feature(input_utt, save_path, speaker, utt_name,
+                         save_format, sampPeriod, parmKind)
 
-    return (global_mean_male, global_std_male,
-            global_mean_female, global_std_female, frame_num_dict)
+    return input_utt.shape[0], gender_stats, speaker_stats, archive_list
@@ -10,9 +10,9 @@ from __future__ import print_function
 from os.path import join, isfile
 import sys
 import argparse
+from collections import OrderedDict
 from tqdm import tqdm
 import numpy as np
-import pandas as pd
 import pickle
 
 sys.path.append('../')
@@ -21,7 +21,8 @@ from timit.transcript_character import read_char
 from timit.transcript_phone import read_phone
 from timit.input_data import read_audio
 from utils.util import mkdir_join
-from utils.dataset import add_element
+from utils.inputs.archive import ArchiveReader
+from utils.dataset import MultiLabelManifest
 
 parser = argparse.ArgumentParser()
 parser.add_argument('--data_path', type=str, help='path to TIMIT dataset')
@@ -31,11 +32,13 @@ parser.add_argument('--feature_save_path', type=str,
                     help='path to save input features')
 parser.add_argument('--config_path', type=str, help='path to config directory')
 parser.add_argument('--tool', type=str,
-                    choices=['htk', 'python_speech_features', 'librosa'])
+                    choices=['htk', 'python_speech_features', 'librosa',
+                             'numpy'])
 parser.add_argument('--htk_save_path', type=str, help='path to save htk files')
 parser.add_argument('--normalize', type=str,
                     choices=['global', 'speaker', 'utterance', 'no'])
-parser.add_argument('--save_format', type=str, choices=['numpy', 'htk', 'wav'])
+parser.add_argument('--save_format', type=str,
+                    choices=['numpy', 'htk', 'archive', 'wav'])
 
 parser.add_argument('--feature_type', type=str, choices=['fbank', 'mfcc'])
 parser.add_argument('--channels', type=int,
@@ -47,6 +50,8 @@ parser.add_argument('--energy', type=int, help='if 1, add the energy feature')
 parser.add_argument('--delta', type=int, help='if 1, add the energy feature')
 parser.add_argument('--deltadelta', type=int,
                     help='if 1, double delta features are also extracted')
+parser.add_argument('--num_workers', type=int, default=1,
+                    help='the number of processes to extract features')
 
 args = parser.parse_args()
 path = Path(data_path=args.data_path,
@@ -79,7 +84,7 @@ def main():
         # inputs
         ########################################
         print('=> Processing input data...')
-        if args.save_format in ['numpy', 'htk']:
+        if args.save_format in ['numpy', 'htk', 'archive']:
             input_save_path = mkdir_join(
                 args.feature_save_path, args.save_format)
             if isfile(join(input_save_path, data_type, 'complete.txt')):
@@ -117,7 +122,8 @@ def main():
                            global_mean_male=global_mean_male,
                            global_std_male=global_std_male,
                            global_mean_female=global_mean_female,
-                           global_std_female=global_std_female)
+                           global_std_female=global_std_female,
+                           num_workers=args.num_workers)
                 # NOTE: ex.) save_path:
                 # timit/feature/save_format/data_type/*.npy
 
@@ -144,14 +150,18 @@ def main():
         print('\n=> Saving dataset files (phone)...')
         dataset_save_path = mkdir_join(
             args.dataset_save_path, args.save_format, data_type)
-        df_columns = ['frame_num', 'input_path', 'transcript']
-        df_phone61 = pd.DataFrame([], columns=df_columns)
-        df_phone48 = pd.DataFrame([], columns=df_columns)
-        df_phone39 = pd.DataFrame([], columns=df_columns)
+        label_types = ['phone61', 'phone48', 'phone39']
+        manifest = MultiLabelManifest(OrderedDict(
+            [(label_type, join(dataset_save_path, label_type + '.csv'))
+             for label_type in label_types]),
+            binary_save_path=join(dataset_save_path, 'dataset.npz'))
 
         with open(join(input_save_path, data_type, 'frame_num.pickle'), 'rb') as f:
             frame_num_dict = pickle.load(f)
 
+        if args.save_format == 'archive':
+            archive_reader = ArchiveReader(join(input_save_path, data_type))
+
         for utt_name, trans_list in tqdm(trans_dict.items()):
             if args.save_format == 'numpy':
                 speaker = utt_name.split('_')[0]
@@ -161,26 +171,23 @@ def main():
                 speaker = utt_name.split('_')[0]
                 input_utt_save_path = join(
                     input_save_path, data_type, speaker, utt_name + '.htk')
+            elif args.save_format == 'archive':
+                input_utt_save_path = archive_reader.specifier(utt_name)
             elif args.save_format == 'wav':
                 input_utt_save_path = path.utt2wav(utt_name)
             else:
-                raise ValueError('save_format is numpy or htk or wav.')
+                raise ValueError('save_format is numpy or htk or archive or wav.')
 
-            assert isfile(input_utt_save_path)
+            if args.save_format != 'archive':
+                assert isfile(input_utt_save_path)
             frame_num = frame_num_dict[utt_name]
 
             phone61_indices, phone48_indices, phone39_indices = trans_list
 
-            df_phone61 = add_element(
-                df_phone61, [frame_num, input_utt_save_path, phone61_indices])
-            df_phone48 = add_element(
-                df_phone48, [frame_num, input_utt_save_path, phone48_indices])
-            df_phone39 = add_element(
-                df_phone39, [frame_num, input_utt_save_path, phone39_indices])
+            manifest.add(frame_num, input_utt_save_path,
+                         [phone61_indices, phone48_indices, phone39_indices])
 
-        df_phone61.to_csv(join(dataset_save_path, 'phone61.csv'))
-        df_phone48.to_csv(join(dataset_save_path, 'phone48.csv'))
-        df_phone39.to_csv(join(dataset_save_path, 'phone39.csv'))
+        manifest.save()
 
         ########################################
         # labels (character)
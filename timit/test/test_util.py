@@ -0,0 +1,51 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test for mapping phones (TIMIT corpus)."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import sys
+import unittest
+import numpy as np
+
+sys.path.append('../../')
+from timit.util import map_phone2phone, PhoneMapper
+
+map_file_path = '../config/phone2phone.txt'
+
+
+class TestPhoneMapper(unittest.TestCase):
+
+    def test(self):
+
+        phone_mapper = PhoneMapper(map_file_path)
+        phone61_list = phone_mapper.phone_list_dict['phone61']
+        self.assertEqual(len(phone61_list), 61)
+
+        utterances = [['h#', 'q', 'ao', 'zh', 'q', 'h#'], ['q'], ['pau']]
+        phone61_indices_list = [
+            np.array([phone61_list.index(phone) for phone in phone_list],
+                     dtype=np.int32) for phone_list in utterances]
+        values = np.concatenate(phone61_indices_list)
+        offsets = np.r_[0, np.cumsum(list(map(len, phone61_indices_list)))]
+
+        for label_type in ['phone61', 'phone48', 'phone39']:
+            mapped_values, mapped_offsets = phone_mapper.map_batch(
+                values, offsets, label_type)
+            self.assertEqual(mapped_values.dtype, np.int32)
+            for i, phone_list in enumerate(utterances):
+                index_list = mapped_values[
+                    mapped_offsets[i]:mapped_offsets[i + 1]]
+                self.assertEqual(
+                    phone_mapper.idx2phone(index_list, label_type).split(),
+                    map_phone2phone(phone_list, label_type, map_file_path))
+                self.assertTrue(np.array_equal(
+                    phone_mapper(phone61_indices_list[i], label_type),
+                    index_list))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,6 +9,7 @@ from __future__ import print_function
 
 from os.path import basename
 import re
+import numpy as np
 from tqdm import tqdm
 
 from utils.labels.character import Char2idx
@@ -143,17 +144,20 @@ def read_char(label_paths, vocab_file_save_path, save_vocab_file=False,
     char2idx = Char2idx(char_vocab_file_path)
     char2idx_capital = Char2idx(
         char_capital_vocab_file_path, capital_divide=True)
+    if not is_test:
+        # Convert characters of all utterances at once
+        transcripts = list(trans_dict.values())
+        values, offsets = char2idx.tokenize_batch(transcripts)
+        char_indices_iter = iter(np.split(values, offsets[1:-1]))
+        values, offsets = char2idx_capital.tokenize_batch(transcripts)
+        char_indices_capital_iter = iter(np.split(values, offsets[1:-1]))
     for utt_name, transcript in tqdm(trans_dict.items()):
         if is_test:
             trans_dict[utt_name] = [transcript, transcript]
             # NOTE: save as it is
         else:
-            char_indices = char2idx(transcript)
-            char_indices_capital = char2idx_capital(transcript)
-
-            char_indices = ' '.join(list(map(str, char_indices.tolist())))
-            char_indices_capital = ' '.join(
-                list(map(str, char_indices_capital.tolist())))
+            char_indices = next(char_indices_iter)
+            char_indices_capital = next(char_indices_capital_iter)
 
             trans_dict[utt_name] = [char_indices, char_indices_capital]
 
@@ -8,11 +8,12 @@ from __future__ import division
 from __future__ import print_function
 
 from os.path import join, basename
+import numpy as np
 from tqdm import tqdm
 
 from utils.labels.phone import Phone2idx
 from utils.util import mkdir_join
-from timit.util import map_phone2phone
+from timit.util import PhoneMapper
 
 
 def read_phone(label_paths, vocab_file_save_path, save_vocab_file=False,
@@ -30,20 +31,10 @@ def read_phone(label_paths, vocab_file_save_path, save_vocab_file=False,
     """
     print('=====> Reading target labels...')
 
-    # Make the mapping file (from phone to index)
+    # Read the mapping file (from 61 phones to 48 & 39 phones) only once
     phone2phone_map_file_path = join(
         vocab_file_save_path, '../phone2phone.txt')
-    phone61_set, phone48_set, phone39_set = set([]), set([]), set([])
-    with open(phone2phone_map_file_path, 'r') as f:
-        for line in f:
-            line = line.strip().split()
-            if line[1] != 'nan':
-                phone61_set.add(line[0])
-                phone48_set.add(line[1])
-                phone39_set.add(line[2])
-            else:
-                # Ignore "q" if phone39 or phone48
-                phone61_set.add(line[0])
+    phone_mapper = PhoneMapper(phone2phone_map_file_path)
 
     phone61_vocab_map_file_path = mkdir_join(
         vocab_file_save_path, 'phone61.txt')
@@ -55,13 +46,13 @@ def read_phone(label_paths, vocab_file_save_path, save_vocab_file=False,
     # Save mapping file
     if save_vocab_file:
         with open(phone61_vocab_map_file_path, 'w') as f:
-            for phone in sorted(list(phone61_set)):
+            for phone in phone_mapper.phone_list_dict['phone61']:
                 f.write('%s\n' % phone)
         with open(phone48_vocab_map_file_path, 'w') as f:
-            for phone in sorted(list(phone48_set)):
+            for phone in phone_mapper.phone_list_dict['phone48']:
                 f.write('%s\n' % phone)
         with open(phone39_vocab_map_file_path, 'w') as f:
-            for phone in sorted(list(phone39_set)):
+            for phone in phone_mapper.phone_list_dict['phone39']:
                 f.write('%s\n' % phone)
 
     trans_dict = {}
@@ -78,47 +69,32 @@ def read_phone(label_paths, vocab_file_save_path, save_vocab_file=False,
                 # end_frame = line[1]
                 phone61_list.append(line[2])
 
-        # Map from 61 phones to the corresponding phones
-        phone48_list = map_phone2phone(phone61_list, 'phone48',
-                                       phone2phone_map_file_path)
-        phone39_list = map_phone2phone(phone61_list, 'phone39',
-                                       phone2phone_map_file_path)
-
-        # Convert to string
-        trans_phone61 = ' '.join(phone61_list)
-        trans_phone48 = ' '.join(phone48_list)
-        trans_phone39 = ' '.join(phone39_list)
-
-        # for debug
-        # print(trans_phone61)
-        # print(trans_phone48)
-        # print(trans_phone39)
-        # print('-----')
-
-        trans_dict[utt_name] = [trans_phone61, trans_phone48, trans_phone39]
+        trans_dict[utt_name] = ' '.join(phone61_list)
 
     # Tokenize
     print('=====> Tokenize...')
     phone2idx_61 = Phone2idx(phone61_vocab_map_file_path)
-    phone2idx_48 = Phone2idx(phone48_vocab_map_file_path)
-    phone2idx_39 = Phone2idx(phone39_vocab_map_file_path)
-    for utt_name, [trans_phone61, trans_phone48, trans_phone39] in tqdm(trans_dict.items()):
+    phone61_indices_list = [phone2idx_61(trans_phone61)
+                            for trans_phone61 in trans_dict.values()]
+    values61 = np.concatenate(phone61_indices_list)
+    offsets = np.r_[0, np.cumsum(list(map(len, phone61_indices_list)))]
+
+    # Map indices of all utterances from 61 phones at once
+    values48, offsets48 = phone_mapper.map_batch(values61, offsets, 'phone48')
+    values39, offsets39 = phone_mapper.map_batch(values61, offsets, 'phone39')
+    phone48_indices_iter = iter(np.split(values48, offsets48[1:-1]))
+    phone39_indices_iter = iter(np.split(values39, offsets39[1:-1]))
+    for utt_name, phone61_indices in zip(tqdm(list(trans_dict.keys())),
+                                         phone61_indices_list):
+        phone48_indices = next(phone48_indices_iter)
+        phone39_indices = next(phone39_indices_iter)
         if is_test:
             trans_dict[utt_name] = [
-                trans_phone61, trans_phone48, trans_phone39]
+                trans_dict[utt_name],
+                phone_mapper.idx2phone(phone48_indices, 'phone48'),
+                phone_mapper.idx2phone(phone39_indices, 'phone39')]
             # NOTE: save as it is
         else:
-            phone61_indices = phone2idx_61(trans_phone61)
-            phone48_indices = phone2idx_48(trans_phone48)
-            phone39_indices = phone2idx_39(trans_phone39)
-
-            phone61_indices = ' '.join(
-                list(map(str, phone61_indices.tolist())))
-            phone48_indices = ' '.join(
-                list(map(str, phone48_indices.tolist())))
-            phone39_indices = ' '.join(
-                list(map(str, phone39_indices.tolist())))
-
             trans_dict[utt_name] = [phone61_indices,
                                     phone48_indices, phone39_indices]
     return trans_dict
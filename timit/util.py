@@ -5,6 +5,30 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import numpy as np
+
+
+def read_phone2phone(map_file_path):
+    """Read the phone2phone mapping file.
+    Args:
+        map_file_path (string): path to the phone2phone mapping file
+    Returns:
+        map_dict_dict (dict):
+            key (string) => phone48 or phone39
+            value (dict) => 61 phone => 48 or 39 phone ('' for "q")
+    """
+    map_dict_dict = {'phone48': {}, 'phone39': {}}
+    with open(map_file_path, 'r') as f:
+        for line in f:
+            line = line.strip().split()
+            if line[1] != 'nan':
+                map_dict_dict['phone48'][line[0]] = line[1]
+                map_dict_dict['phone39'][line[0]] = line[2]
+            else:
+                map_dict_dict['phone48'][line[0]] = ''
+                map_dict_dict['phone39'][line[0]] = ''
+    return map_dict_dict
+
 
 def map_phone2phone(phone_list, label_type, map_file_path):
     """Map from 61 phones to 39 or 48 phones.
@@ -19,28 +43,84 @@ def map_phone2phone(phone_list, label_type, map_file_path):
         return phone_list
 
     # read a mapping file
-    map_dict = {}
-    with open(map_file_path, 'r') as f:
-        for line in f:
-            line = line.strip().split()
-            if line[1] != 'nan':
-                if label_type == 'phone48':
-                    map_dict[line[0]] = line[1]
-                elif label_type == 'phone39':
-                    map_dict[line[0]] = line[2]
-            else:
-                map_dict[line[0]] = ''
+    map_dict = read_phone2phone(map_file_path)[label_type]
 
     # mapping from 61 phones to 39 or 48 phones
-    mapped_phone_list = []
-    for i in range(len(phone_list)):
-        if phone_list[i] in map_dict.keys():
-            mapped_phone_list.append(map_dict[phone_list[i]])
-        else:
-            mapped_phone_list.append(phone_list[i])
+    mapped_phone_list = [map_dict.get(phone, phone) for phone in phone_list]
 
     # ignore "q"
-    while '' in mapped_phone_list:
-        mapped_phone_list.remove('')
+    return [phone for phone in mapped_phone_list if phone != '']
+
+
+class PhoneMapper(object):
+    """Map phone indices from 61 phones to 48 or 39 phones. The mapping file
+       is read only once into lookup arrays.
+    Args:
+        map_file_path (string): path to the phone2phone mapping file
+    """
+
+    def __init__(self, map_file_path):
+        map_dict_dict = read_phone2phone(map_file_path)
+
+        # NOTE: indices are those in vocabulary files of sorted phones
+        self.phone_list_dict = {
+            'phone61': sorted(map_dict_dict['phone48'].keys())}
+        for label_type in ['phone48', 'phone39']:
+            self.phone_list_dict[label_type] = sorted(
+                set(map_dict_dict[label_type].values()) - set(['']))
+
+        # Make lookup tables from indices of 61 phones (-1 for "q")
+        self.table_dict = {}
+        for label_type in ['phone48', 'phone39']:
+            phone2idx = dict((phone, i) for i, phone in enumerate(
+                self.phone_list_dict[label_type]))
+            phone2idx[''] = -1
+            self.table_dict[label_type] = np.array(
+                [phone2idx[map_dict_dict[label_type][phone]]
+                 for phone in self.phone_list_dict['phone61']],
+                dtype=np.int64)
+
+    def __call__(self, phone61_indices, label_type):
+        """
+        Args:
+            phone61_indices (np.ndarray): indices of 61 phones
+            label_type (string): phone39 or phone48 or phone61
+        Returns:
+            index_list (np.ndarray): indices of mapped phones
+        """
+        offsets = np.array([0, len(phone61_indices)], dtype=np.int64)
+        return self.map_batch(phone61_indices, offsets, label_type)[0]
+
+    def map_batch(self, values, offsets, label_type):
+        """Map indices of many utterances at once.
+        Args:
+            values (np.ndarray): flat indices of 61 phones of all utterances
+            offsets (np.ndarray): indices of the i-th utterance are
+                values[offsets[i]:offsets[i + 1]]
+            label_type (string): phone39 or phone48 or phone61
+        Returns:
+            values (np.ndarray): flat indices of mapped phones
+            offsets (np.ndarray): offsets of each utterance in values
+        """
+        if label_type == 'phone61':
+            return values, offsets
+        if label_type not in self.table_dict.keys():
+            raise ValueError(
+                'label_type is "phone61" or "phone48" or "phone39".')
+
+        mapped_values = self.table_dict[label_type][values]
+        # ignore "q"
+        keep = mapped_values >= 0
+        cum_keep = np.r_[0, np.cumsum(keep)]
+        return mapped_values[keep].astype(values.dtype), cum_keep[offsets]
 
-    return mapped_phone_list
+    def idx2phone(self, index_list, label_type):
+        """
+        Args:
+            index_list (np.ndarray): phone indices
+            label_type (string): phone39 or phone48 or phone61
+        Returns:
+            str_phone (string): string of space-divided phones
+        """
+        phone_list = self.phone_list_dict[label_type]
+        return ' '.join(phone_list[i] for i in index_list)
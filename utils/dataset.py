@@ -5,10 +5,304 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+from os.path import join, dirname, basename
+from array import array
+import numpy as np
 import pandas as pd
 
 
 def add_element(df, elem_list):
-    series = pd.Series(elem_list, index=df.columns)
-    df = df.append(series, ignore_index=True)
+    """Append a row to the dataframe. This copies the whole dataframe, so use
+       MultiLabelManifest to make large dataset files.
+    Args:
+        df (pd.DataFrame): dataframe
+        elem_list (list): elements of the new row
+    Returns:
+        df (pd.DataFrame): new dataframe
+    """
+    series = pd.DataFrame([elem_list], columns=df.columns)
+    df = pd.concat([df, series], ignore_index=True)
     return df
+
+
+def indices2str(transcript):
+    """Convert indices to a string of space-separated indices as saved in CSV
+       files. Raw text is returned as it is.
+    Args:
+        transcript (np.ndarray or list or string): indices or raw text
+    Returns:
+        transcript (string)
+    """
+    if isinstance(transcript, np.ndarray):
+        return ' '.join(map(str, transcript.tolist()))
+    if isinstance(transcript, (list, tuple)):
+        return ' '.join(map(str, transcript))
+    return transcript
+
+
+class MultiLabelManifest(object):
+    """Make dataset files of many label types (ex. character, word) in a
+       single pass over utterances. frame_num & input_path columns are shared
+       by all label types, and only transcripts are kept per label type.
+    Args:
+        save_path_dict (OrderedDict):
+            key (string) => label type
+            value (string) => path to a CSV file
+        flush_size (int, optional): the number of rows kept in memory before
+            written to CSV files
+        binary_save_path (string, optional): path to a npz file. If given,
+            a binary manifest of all label types is also saved.
+        label_dtype (optional): the data type of indices in the binary
+            manifest. Default is np.int32.
+    """
+
+    def __init__(self, save_path_dict, flush_size=100000,
+                 binary_save_path=None, label_dtype=np.int32):
+        self.label_types = list(save_path_dict.keys())
+        self.save_path_dict = save_path_dict
+        self.flush_size = flush_size
+        self.columns = ['frame_num', 'input_path', 'transcript']
+
+        self.binary_save_path = binary_save_path
+        if binary_save_path is not None:
+            self._binary_writer = BinaryManifestWriter(
+                self.label_types, dtype=label_dtype)
+
+        self._frame_nums = []
+        self._input_paths = []
+        self._transcripts = [[] for _ in self.label_types]
+        self._row_num = 0
+        self._row_num_saved = 0
+
+    def __len__(self):
+        return self._row_num
+
+    def add(self, frame_num, input_path, transcripts):
+        """Append an utterance.
+        Args:
+            frame_num (int): the number of frames
+            input_path (string): path to input features
+            transcripts (list): transcripts in the same order as label types.
+                Each transcript is a np.ndarray of indices or a string. Indices
+                are kept as they are until written to files.
+        """
+        if len(transcripts) != len(self.label_types):
+            raise ValueError('The number of transcripts must be %d.' %
+                             len(self.label_types))
+        if self.binary_save_path is not None:
+            # NOTE: labels are checked here before the row is appended
+            self._binary_writer.add(frame_num, input_path, transcripts)
+        self._frame_nums.append(frame_num)
+        self._input_paths.append(input_path)
+        for transcript_list, transcript in zip(self._transcripts, transcripts):
+            transcript_list.append(transcript)
+        self._row_num += 1
+
+        if self._row_num - self._row_num_saved >= self.flush_size:
+            self._flush()
+
+    def to_dataframe(self, label_type):
+        """
+        Args:
+            label_type (string): label type
+        Returns:
+            df (pd.DataFrame): dataframe of rows not written to CSV files
+        """
+        return pd.DataFrame(
+            {'frame_num': self._frame_nums,
+             'input_path': self._input_paths,
+             'transcript': list(map(
+                 indices2str,
+                 self._transcripts[self.label_types.index(label_type)]))},
+            columns=self.columns,
+            index=pd.RangeIndex(self._row_num_saved, self._row_num))
+
+    def _flush(self):
+        # NOTE: frame_num & input_path columns are converted only once
+        df = pd.DataFrame(
+            {'frame_num': self._frame_nums, 'input_path': self._input_paths},
+            columns=self.columns[:2],
+            index=pd.RangeIndex(self._row_num_saved, self._row_num))
+        for label_type, transcript_list in zip(self.label_types,
+                                               self._transcripts):
+            df['transcript'] = list(map(indices2str, transcript_list))
+            df.to_csv(self.save_path_dict[label_type],
+                      mode='w' if self._row_num_saved == 0 else 'a',
+                      header=self._row_num_saved == 0)
+        self._row_num_saved = self._row_num
+        self._frame_nums = []
+        self._input_paths = []
+        self._transcripts = [[] for _ in self.label_types]
+
+    def save(self):
+        """Write all rows to CSV files (and the binary manifest)."""
+        if self.binary_save_path is not None:
+            self._binary_writer.save(self.binary_save_path)
+        if self._row_num == self._row_num_saved and self._row_num_saved > 0:
+            return
+        self._flush()
+
+
+class BinaryManifestWriter(object):
+    """Make a columnar binary manifest of many label types as a npz file.
+       frame_num is saved as int32, input_path is split into dictionary-encoded
+       directories & file names, and labels of each label type are saved as a
+       ragged integer array (flat values & offsets). Transcripts which are not
+       sequences of indices (ex. raw text of test sets) are saved as strings.
+    Args:
+        label_types (list): label types
+        dtype (optional): the data type of indices. Default is np.int32.
+            np.uint16 halves the size for vocabularies smaller than 65536.
+    """
+
+    def __init__(self, label_types, dtype=np.int32):
+        self.label_types = list(label_types)
+        self.dtype = np.dtype(dtype)
+        if self.dtype.kind not in ['i', 'u']:
+            raise ValueError('dtype must be an integer type.')
+
+        self._frame_nums = array('i')
+        self._input_dir2id = {}
+        self._input_dir_ids = array('i')
+        self._input_names = []
+        self._values = [array(self.dtype.char) for _ in self.label_types]
+        self._offsets = [array('l', [0]) for _ in self.label_types]
+        self._texts = [None] * len(self.label_types)
+
+    def __len__(self):
+        return len(self._frame_nums)
+
+    def add(self, frame_num, input_path, transcripts):
+        """Append an utterance.
+        Args:
+            frame_num (int): the number of frames
+            input_path (string): path to input features
+            transcripts (list): transcripts in the same order as label types.
+                Each transcript is a list or np.ndarray of indices, or
+                a string of space-separated indices.
+        """
+        # NOTE: non-integer labels are not truncated silently
+        for transcript in transcripts:
+            if isinstance(transcript, np.ndarray):
+                if not np.issubdtype(transcript.dtype, np.integer):
+                    raise ValueError('Labels must be integer indices, but '
+                                     'got %s.' % transcript.dtype)
+            elif isinstance(transcript, (list, tuple)):
+                if any(isinstance(index, (float, np.floating))
+                       for index in transcript):
+                    raise ValueError('Labels must be integer indices, but '
+                                     'got float.')
+
+        self._frame_nums.append(frame_num)
+        input_dir = dirname(input_path)
+        if input_dir not in self._input_dir2id.keys():
+            self._input_dir2id[input_dir] = len(self._input_dir2id)
+        self._input_dir_ids.append(self._input_dir2id[input_dir])
+        self._input_names.append(basename(input_path))
+
+        for i, transcript in enumerate(transcripts):
+            if self._texts[i] is None and isinstance(transcript, np.ndarray) \
+                    and transcript.dtype.kind in ['i', 'u']:
+                # NOTE: indices are copied as bytes without Python integers
+                self._values[i].frombytes(self._cast(transcript).tobytes())
+                self._offsets[i].append(len(self._values[i]))
+                continue
+            if self._texts[i] is None:
+                try:
+                    if isinstance(transcript, str):
+                        transcript = transcript.split()
+                    indices = [int(index) for index in transcript]
+                except ValueError:
+                    self._to_text(i)
+                else:
+                    self._values[i].extend(indices)
+                    self._offsets[i].append(len(self._values[i]))
+                    continue
+            self._texts[i].append(indices2str(transcript))
+
+    def _cast(self, indices):
+        if not np.can_cast(indices.dtype, self.dtype) and len(indices) > 0:
+            info = np.iinfo(self.dtype)
+            if indices.min() < info.min or indices.max() > info.max:
+                raise ValueError('Indices are out of the range of %s.' %
+                                 self.dtype.name)
+        return indices.astype(self.dtype, copy=False)
+
+    def _to_text(self, i):
+        values, offsets = self._values[i], self._offsets[i]
+        self._texts[i] = [
+            ' '.join(map(str, values[offsets[j]:offsets[j + 1]]))
+            for j in range(len(offsets) - 1)]
+        self._values[i] = array(self.dtype.char)
+        self._offsets[i] = array('l', [0])
+
+    def save(self, save_path):
+        """
+        Args:
+            save_path (string): path to a npz file
+        """
+        input_dirs = sorted(self._input_dir2id.keys(),
+                            key=lambda x: self._input_dir2id[x])
+        data = {
+            'label_types': np.array(self.label_types, dtype=str),
+            'frame_num': np.frombuffer(self._frame_nums, dtype='i').astype(
+                np.int32),
+            'input_dirs': np.array(input_dirs, dtype=str),
+            'input_dir_ids': np.frombuffer(self._input_dir_ids,
+                                           dtype='i').astype(np.int32),
+            'input_names': np.array(self._input_names, dtype=str)}
+        for i, label_type in enumerate(self.label_types):
+            if self._texts[i] is None:
+                data[label_type + '_values'] = np.frombuffer(
+                    self._values[i], dtype=self.dtype).copy()
+                data[label_type + '_offsets'] = np.frombuffer(
+                    self._offsets[i], dtype='l').astype(np.int64)
+            else:
+                data[label_type + '_text'] = np.array(self._texts[i],
+                                                      dtype=str)
+        np.savez(save_path, **data)
+
+
+class BinaryManifest(object):
+    """Load a binary manifest saved by BinaryManifestWriter.
+    Args:
+        manifest_path (string): path to a npz file
+    """
+
+    def __init__(self, manifest_path):
+        data = np.load(manifest_path)
+        self.label_types = [str(label_type)
+                            for label_type in data['label_types']]
+        self.frame_num = data['frame_num']
+        self._input_dirs = data['input_dirs']
+        self._input_dir_ids = data['input_dir_ids']
+        self._input_names = data['input_names']
+        self._data = data
+
+    def __len__(self):
+        return len(self.frame_num)
+
+    def input_path(self, index):
+        """
+        Args:
+            index (int): index of an utterance
+        Returns:
+            input_path (string): path to input features
+        """
+        return join(str(self._input_dirs[self._input_dir_ids[index]]),
+                    str(self._input_names[index]))
+
+    def labels(self, label_type):
+        """
+        Args:
+            label_type (string): label type
+        Returns:
+            values (np.ndarray): flat indices of all utterances, or
+                transcripts (strings) in case of raw text
+            offsets (np.ndarray): labels of the i-th utterance are
+                values[offsets[i]:offsets[i + 1]]. None in case of raw text.
+        """
+        if label_type + '_text' in self._data.files:
+            return self._data[label_type + '_text'], None
+        return (self._data[label_type + '_values'],
+                self._data[label_type + '_offsets'])
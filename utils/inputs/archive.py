@@ -0,0 +1,197 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Pack input features of many utterances into large shard files.
+   Each shard is a concatenation of HTK records (header + big-endian float32
+   data), and utterances are located by an index of
+   (utt_name => shard, byte offset, frame num, feature dim).
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from os.path import join
+from struct import unpack
+import numpy as np
+
+from utils.inputs.htk import write_many
+
+INDEX_NAME = 'archive_index.npz'
+
+
+class ArchiveWriter(object):
+    """Append input features into shard files.
+    Args:
+        save_path (string): path to the directory to save shards & the index
+        max_shard_size (int, optional): a new shard is started when the size
+            of the current shard exceeds this value (byte)
+    """
+
+    def __init__(self, save_path, max_shard_size=2 ** 30):
+        self.save_path = save_path
+        self.max_shard_size = max_shard_size
+
+        self._shard_names = []
+        self._f = None
+        self._utt_names = []
+        self._shard_ids = []
+        self._offsets = []
+        self._frame_nums = []
+        self._feature_dims = []
+
+    def write(self, utt_name, input_utt, sampPeriod=None, parmKind=None):
+        """Append an utterance to the current shard.
+        Args:
+            utt_name (string): utterance name
+            input_utt (np.ndarray): A tensor of size (frame_num, feature_dim)
+            sampPeriod (int, optional): default is 100000 (10ms)
+            parmKind (int, optional): default is 9 (USER)
+        """
+        if self._f is None or self._f.tell() >= self.max_shard_size:
+            self._open_next_shard()
+        if sampPeriod is None:
+            sampPeriod = 100000
+        if parmKind is None:
+            parmKind = 9
+
+        offset = write_many([input_utt], self._f, sampPeriod, parmKind)[0]
+        self._utt_names.append(utt_name)
+        self._shard_ids.append(len(self._shard_names) - 1)
+        self._offsets.append(offset)
+        self._frame_nums.append(input_utt.shape[0])
+        self._feature_dims.append(input_utt.shape[1])
+
+    def _open_next_shard(self):
+        if self._f is not None:
+            self._f.close()
+        shard_name = 'feature.%05d.ark' % len(self._shard_names)
+        self._shard_names.append(shard_name)
+        shard_path = join(self.save_path, shard_name)
+        self._f = open(shard_path, 'wb')
+
+    def close(self):
+        """Close the current shard & save the index."""
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+        np.savez(join(self.save_path, INDEX_NAME),
+                 shard_names=np.array(self._shard_names, dtype=str),
+                 utt_names=np.array(self._utt_names, dtype=str),
+                 shard_ids=np.array(self._shard_ids, dtype=np.int32),
+                 offsets=np.array(self._offsets, dtype=np.int64),
+                 frame_nums=np.array(self._frame_nums, dtype=np.int64),
+                 feature_dims=np.array(self._feature_dims, dtype=np.int32))
+
+
+class ArchiveReader(object):
+    """Random access to utterances in shard files.
+       Shards are memory-mapped lazily and each utterance is returned as a
+       zero-copy big-endian view. Memory maps are owned by the reader and
+       released by close() (or at the end of a with statement).
+    Args:
+        save_path (string): path to the directory of shards & the index
+        mode (string, optional): r (read-only) or r+ (normalize in place)
+    """
+
+    def __init__(self, save_path, mode='r'):
+        if mode not in ['r', 'r+']:
+            raise ValueError('mode is r or r+.')
+        self.save_path = save_path
+        self.mode = mode
+
+        index = np.load(join(save_path, INDEX_NAME))
+        self._shard_names = [str(name) for name in index['shard_names']]
+        self._shard_ids = index['shard_ids']
+        self._offsets = index['offsets']
+        self._frame_nums = index['frame_nums']
+        self._feature_dims = index['feature_dims']
+        self._utt2idx = dict(
+            (str(utt_name), i) for i, utt_name in enumerate(index['utt_names']))
+
+        # NOTE: key => shard_path
+        self._shards = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self._utt2idx)
+
+    def __contains__(self, utt_name):
+        return utt_name in self._utt2idx.keys()
+
+    def keys(self):
+        return list(self._utt2idx.keys())
+
+    def __getitem__(self, utt_name):
+        """
+        Args:
+            utt_name (string): utterance name
+        Returns:
+            input_utt (np.ndarray): A tensor of size (frame_num, feature_dim)
+        """
+        i = self._utt2idx[utt_name]
+        shard_path = join(self.save_path,
+                          self._shard_names[self._shard_ids[i]])
+        if shard_path not in self._shards.keys():
+            self._shards[shard_path] = np.memmap(
+                shard_path, dtype=np.uint8, mode=self.mode)
+        return _view(self._shards[shard_path], self._offsets[i],
+                     self._frame_nums[i], self._feature_dims[i])
+
+    def flush(self):
+        """Write changes of memory-mapped shards back to the disk."""
+        for shard in self._shards.values():
+            shard.flush()
+
+    def close(self):
+        """Write changes back & release memory maps of shards. Views returned
+           before keep their own shard mapped until they are released.
+        """
+        if self.mode == 'r+':
+            self.flush()
+        self._shards = {}
+
+    def specifier(self, utt_name):
+        """
+        Args:
+            utt_name (string): utterance name
+        Returns:
+            specifier (string): `shard_path:byte offset`, which is readable by
+                read_archive()
+        """
+        i = self._utt2idx[utt_name]
+        return '%s:%d' % (join(self.save_path,
+                               self._shard_names[self._shard_ids[i]]),
+                          self._offsets[i])
+
+
+def read_archive(specifier, mode='r'):
+    """Read an utterance by `shard_path:byte offset` without the index.
+    Args:
+        specifier (string): `shard_path:byte offset`
+        mode (string, optional): r or r+
+    Returns:
+        input_utt (np.memmap): A big-endian memory map of only the utterance
+            of size (frame_num, feature_dim). Call flush() to write changes
+            back in case of r+. The file is unmapped when it is released.
+    """
+    shard_path, offset = specifier.rsplit(':', 1)
+    offset = int(offset)
+    with open(shard_path, 'rb') as f:
+        f.seek(offset)
+        frame_num, _, sampSize, _ = unpack(">IIHH", f.read(12))
+    if frame_num == 0:
+        return np.zeros((0, sampSize // 4), dtype='>f4')
+    return np.memmap(shard_path, dtype='>f4', mode=mode, offset=offset + 12,
+                     shape=(frame_num, sampSize // 4))
+
+
+def _view(shard, offset, frame_num, feature_dim):
+    start = offset + 12
+    end = start + frame_num * feature_dim * 4
+    return shard[start:end].view('>f4').reshape(frame_num, feature_dim)
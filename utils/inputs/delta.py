@@ -0,0 +1,41 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Compute delta features by linear regression over neighbouring frames."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+
+
+def delta(feat, N=2):
+    """Compute delta features from a feature vector sequence.
+       The regression over the preceding and following N frames is computed
+       for all frames at once by accumulating shifted views of the
+       edge-padded sequence, instead of looping over frames.
+    Args:
+        feat (np.ndarray): A tensor of size `(frame_num, feature_dim)`.
+            Each row holds 1 feature vector.
+        N (int, optional): For each frame, calculate delta features based on
+            preceding and following N frames
+    Returns:
+        delta_feat (np.ndarray): A tensor of size `(frame_num, feature_dim)`.
+            Each row holds 1 delta feature vector.
+    """
+    if N < 1:
+        raise ValueError('N must be an integer >= 1')
+    frame_num = len(feat)
+    if frame_num == 0:
+        return np.zeros_like(feat)
+    denominator = 2 * sum([i**2 for i in range(1, N + 1)])
+    padded = np.pad(feat, ((N, N), (0, 0)), mode='edge')
+
+    # NOTE: accumulate in the same order as np.dot(np.arange(-N, N + 1),
+    # padded[t: t + 2 * N + 1]) for each frame t
+    delta_feat = np.zeros(feat.shape, dtype=np.result_type(feat, np.int64))
+    for i, n in enumerate(range(-N, N + 1)):
+        delta_feat += n * padded[i: i + frame_num]
+    delta_feat /= denominator
+    return delta_feat.astype(feat.dtype, copy=False)
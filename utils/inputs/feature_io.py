@@ -0,0 +1,350 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Extract & save input features per utterance, and normalize the saved
+   features."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from os.path import join
+import wave
+import numpy as np
+
+from utils.util import mkdir_join
+from utils.inputs.htk import read, write
+from utils.inputs.archive import read_archive
+from utils.inputs.sphere import read_sphere, sphere_length, is_sphere
+from utils.inputs.wav2feature_python_speech_features import wav2feature as w2f_psf
+from utils.inputs.wav2feature_python_speech_features import signal2feature as s2f_psf
+from utils.inputs.wav2feature_librosa import wav2feature as w2f_librosa
+from utils.inputs.wav2feature_librosa import signal2feature as s2f_librosa
+from utils.inputs.wav2feature_librosa import pcm2float
+from utils.inputs.wav2feature_numpy import wav2feature as w2f_numpy
+from utils.inputs.wav2feature_numpy import signal2feature as s2f_numpy
+from utils.inputs.wav2feature_numpy import frame_size
+
+
+def extract_feature(audio_path, tool, config, dtype=np.float32):
+    """Extract features from a HTK or WAV file.
+    Args:
+        audio_path (string): path to a HTK or WAV file
+        tool (string): htk or python_speech_features or librosa or numpy
+        config (dict): a configuration for feature extraction
+        dtype (optional): the type of data, default is np.float32
+    Returns:
+        input_utt (np.ndarray): A tensor of size (frame_num, feature_dim)
+        sampPeriod (int): None unless tool is htk
+        parmKind (int): None unless tool is htk
+    """
+    sampPeriod, parmKind = None, None
+    if tool == 'htk':
+        input_utt, sampPeriod, parmKind = read(audio_path)
+    elif tool == 'python_speech_features':
+        input_utt = w2f_psf(
+            audio_path,
+            feature_type=config['feature_type'],
+            feature_dim=config['channels'],
+            use_energy=config['energy'],
+            use_delta1=config['delta'],
+            use_delta2=config['deltadelta'],
+            window=config['window'],
+            slide=config['slide'])
+    elif tool == 'librosa':
+        input_utt = w2f_librosa(
+            audio_path,
+            feature_type=config['feature_type'],
+            feature_dim=config['channels'],
+            use_energy=config['energy'],
+            use_delta1=config['delta'],
+            use_delta2=config['deltadelta'],
+            window=config['window'],
+            slide=config['slide'])
+    elif tool == 'numpy':
+        input_utt = w2f_numpy(
+            audio_path,
+            feature_type=config['feature_type'],
+            feature_dim=config['channels'],
+            use_energy=config['energy'],
+            use_delta1=config['delta'],
+            use_delta2=config['deltadelta'],
+            window=config['window'],
+            slide=config['slide'])
+    return input_utt.astype(dtype, copy=False), sampPeriod, parmKind
+
+
+def extract_feature_channels(sph_path, tool, config, dtype=np.float32):
+    """Extract features of all channels from a SPHERE file. The file is read
+       only once, and interleaved channels are divided in memory.
+    Args:
+        sph_path (string): path to a SPHERE file
+        tool (string): python_speech_features or librosa or numpy
+        config (dict): a configuration for feature extraction
+        dtype (optional): the type of data, default is np.float32
+    Returns:
+        input_data_list (list): features of each channel (A, B, ...), each
+            of which is a tensor of size (frame_num, feature_dim)
+    """
+    if tool not in ['python_speech_features', 'librosa', 'numpy']:
+        raise ValueError(
+            'tool is python_speech_features or librosa or numpy.')
+
+    sampling_rate, audio = read_sphere(sph_path)
+    if audio.ndim == 1:
+        audio = audio.reshape((-1, 1))
+
+    kwargs = dict(feature_type=config['feature_type'],
+                  feature_dim=config['channels'],
+                  use_energy=config['energy'],
+                  use_delta1=config['delta'],
+                  use_delta2=config['deltadelta'],
+                  window=config['window'],
+                  slide=config['slide'])
+    input_data_list = []
+    for i_channel in range(audio.shape[1]):
+        audio_channel = audio[:, i_channel]
+        if tool == 'python_speech_features':
+            input_data = s2f_psf(audio_channel, sampling_rate, **kwargs)
+        elif tool == 'librosa':
+            y, sr = pcm2float(audio_channel, sampling_rate)
+            input_data = s2f_librosa(y, sr, **kwargs)
+        elif tool == 'numpy':
+            input_data = s2f_numpy(audio_channel, sampling_rate, **kwargs)
+        input_data_list.append(input_data.astype(dtype, copy=False))
+    return input_data_list
+
+
+def audio_length(audio_path):
+    """
+    Args:
+        audio_path (string): path to a WAV or SPHERE file
+    Returns:
+        sampling_rate (int): sampling rate
+        sample_num (int): the number of samples per channel
+    """
+    if is_sphere(audio_path):
+        return sphere_length(audio_path)
+    wav = wave.open(audio_path, 'rb')
+    try:
+        return wav.getframerate(), wav.getnframes()
+    finally:
+        wav.close()
+
+
+def read_audio_range(audio_path, start, end):
+    """Read samples in [start, end) of a WAV or SPHERE file by seeking.
+    Args:
+        audio_path (string): path to a WAV (16-bit PCM) or SPHERE file
+        start (int): the first sample to read
+        end (int): the sample to stop reading
+    Returns:
+        sampling_rate (int): sampling rate
+        audio (np.ndarray): A tensor of size `[T]` or `[T, channel_num]`
+    """
+    if is_sphere(audio_path):
+        return read_sphere(audio_path, start, end)
+    wav = wave.open(audio_path, 'rb')
+    try:
+        if wav.getsampwidth() != 2:
+            raise ValueError('Only 16-bit PCM is supported: %s' % audio_path)
+        channel_num = wav.getnchannels()
+        start = min(start, wav.getnframes())
+        wav.setpos(start)
+        data = wav.readframes(max(0, end - start))
+        sampling_rate = wav.getframerate()
+    finally:
+        wav.close()
+    audio = np.frombuffer(data, dtype='<i2').astype(np.int16)
+    if channel_num > 1:
+        audio = audio.reshape((-1, channel_num))
+    return sampling_rate, audio
+
+
+def feature_frame_num(audio_path, config):
+    """The number of frames of features extracted from the whole file by
+       the numpy backend.
+    Args:
+        audio_path (string): path to a WAV or SPHERE file
+        config (dict): a configuration for feature extraction
+    Returns:
+        frame_num (int): the number of frames
+    """
+    sampling_rate, sample_num = audio_length(audio_path)
+    frame_length, frame_shift = frame_size(
+        sampling_rate, config['window'], config['slide'])
+    return max(0, (sample_num - frame_length) // frame_shift + 1)
+
+
+def extract_feature_range(audio_path, config, start_frame, end_frame,
+                          channel=0, dtype=np.float32):
+    """Extract features of frames in [start_frame, end_frame) by the numpy
+       backend, reading only samples of these frames & the context frames
+       for delta features. Features are the same as those of the whole
+       file because each frame depends only on its own samples.
+    Args:
+        audio_path (string): path to a WAV or SPHERE file
+        config (dict): a configuration for feature extraction
+        start_frame (int): the first frame
+        end_frame (int): the frame to stop
+        channel (int, optional): the channel of a multi-channel file
+        dtype (optional): the type of data, default is np.float32
+    Returns:
+        input_data (np.ndarray): A tensor of size (frame_num, feature_dim)
+    """
+    sampling_rate, sample_num = audio_length(audio_path)
+    frame_length, frame_shift = frame_size(
+        sampling_rate, config['window'], config['slide'])
+    frame_num = max(0, (sample_num - frame_length) // frame_shift + 1)
+
+    # NOTE: delta features are computed over 2 frames on each side
+    if config['deltadelta']:
+        context = 4
+    elif config['delta']:
+        context = 2
+    else:
+        context = 0
+    start_frame_read = min(max(0, start_frame - context), frame_num)
+    end_frame_read = max(min(frame_num, end_frame + context),
+                         start_frame_read)
+
+    _, audio = read_audio_range(
+        audio_path,
+        start_frame_read * frame_shift,
+        (end_frame_read - 1) * frame_shift + frame_length)
+    if audio.ndim == 2:
+        audio = audio[:, channel]
+    input_data = s2f_numpy(audio, sampling_rate,
+                           feature_type=config['feature_type'],
+                           feature_dim=config['channels'],
+                           use_energy=config['energy'],
+                           use_delta1=config['delta'],
+                           use_delta2=config['deltadelta'],
+                           window=config['window'],
+                           slide=config['slide'])
+    input_data = input_data[max(0, start_frame - start_frame_read):
+                            max(0, end_frame - start_frame_read)]
+    return input_data.astype(dtype, copy=False)
+
+
+def feature_path(save_path, speaker, utt_name, save_format):
+    """
+    Args:
+        save_path (string): path to save files
+        speaker (string): speaker name
+        utt_name (string): utterance name
+        save_format (string): numpy or htk
+    Returns:
+        path to the feature file of the utterance
+    """
+    if save_format == 'numpy':
+        return join(save_path, speaker, utt_name + '.npy')
+    elif save_format == 'htk':
+        return join(save_path, speaker, utt_name + '.htk')
+    else:
+        raise ValueError('save_format is numpy or htk.')
+
+
+def save_feature(input_utt, save_path, speaker, utt_name, save_format,
+                 sampPeriod=None, parmKind=None):
+    """Save input features of an utterance.
+    Args:
+        input_utt (np.ndarray): A tensor of size (frame_num, feature_dim)
+        save_path (string): path to save files
+        speaker (string): speaker name
+        utt_name (string): utterance name
+        save_format (string): numpy or htk
+        sampPeriod (int, optional):
+        parmKind (int, optional):
+    """
+    if save_format == 'numpy':
+        np.save(mkdir_join(save_path, speaker, utt_name + '.npy'), input_utt)
+    elif save_format == 'htk':
+        write(input_utt,
+              htk_path=mkdir_join(save_path, speaker, utt_name + '.htk'),
+              sampPeriod=sampPeriod,
+              parmKind=parmKind)
+    else:
+        raise ValueError('save_format is numpy or htk.')
+
+
+def normalize_params(mean, std, dtype=np.float32):
+    """Convert mean & std into vectors to normalize features as
+       input_data * scale + offset.
+    Args:
+        mean (np.ndarray): A mean vector
+        std (np.ndarray): A stddev vector
+        dtype (optional): the type of data, default is np.float32
+    Returns:
+        scale (np.ndarray): 1 / std
+        offset (np.ndarray): - mean / std
+    """
+    scale = 1 / np.asarray(std, dtype=np.float64)
+    offset = -np.asarray(mean, dtype=np.float64) * scale
+    return scale.astype(dtype), offset.astype(dtype)
+
+
+def normalize_in_place(input_data, scale, offset):
+    """Normalize features in place without allocating temporary arrays.
+    Args:
+        input_data (np.ndarray): A tensor of size `(frame_num, feature_dim)`
+        scale (np.ndarray): A vector of size `(feature_dim,)`
+        offset (np.ndarray): A vector of size `(feature_dim,)`
+    Returns:
+        input_data (np.ndarray): the normalized input_data itself
+    """
+    np.multiply(input_data, scale, out=input_data)
+    np.add(input_data, offset, out=input_data)
+    return input_data
+
+
+def normalize_utterances(input_data_block, offsets):
+    """Normalize each utterance in a block by its own mean & std in place.
+    Args:
+        input_data_block (np.ndarray): A tensor of size
+            `(total_frame_num, feature_dim)`
+        offsets (np.ndarray): A tensor of size `(utt_num + 1,)`. Features of
+            the i-th utterance are input_data_block[offsets[i]:offsets[i + 1]]
+    Returns:
+        input_data_block (np.ndarray): the normalized block itself
+    """
+    for i in range(len(offsets) - 1):
+        input_utt = input_data_block[offsets[i]:offsets[i + 1]]
+        if input_utt.shape[0] == 0:
+            continue
+        utt_mean = np.mean(input_utt, axis=0, dtype=input_utt.dtype)
+        np.subtract(input_utt, utt_mean, out=input_utt)
+        # NOTE: the variance is computed after subtracting the mean in place
+        utt_var = np.einsum('ij,ij->j', input_utt, input_utt)
+        utt_var /= input_utt.shape[0]
+        np.multiply(input_utt, 1 / np.sqrt(utt_var), out=input_utt)
+    return input_data_block
+
+
+def normalize_feature(args):
+    """Normalize a saved feature file in place.
+    Args:
+        args (tuple): (path to the feature file, save_format, mean, std).
+            In case of archive, the path is `shard_path:byte offset`.
+    """
+    input_path, save_format, mean, std = args
+    scale, offset = normalize_params(mean, std, dtype=np.asarray(mean).dtype)
+    if save_format == 'archive':
+        # NOTE: only the utterance is mapped, not the whole shard
+        input_utt = read_archive(input_path, mode='r+')
+        normalize_in_place(input_utt, scale, offset)
+        if isinstance(input_utt, np.memmap):
+            input_utt.flush()
+        del input_utt
+    elif save_format == 'numpy':
+        input_utt = np.load(input_path, mmap_mode='r+')
+        normalize_in_place(input_utt, scale, offset)
+        input_utt.flush()
+        del input_utt
+    elif save_format == 'htk':
+        input_utt, sampPeriod, parmKind = read(input_path)
+        normalize_in_place(input_utt, scale, offset)
+        write(input_utt, htk_path=input_path,
+              sampPeriod=sampPeriod, parmKind=parmKind)
+    else:
+        raise ValueError('save_format is numpy or htk or archive.')
@@ -5,43 +5,67 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
-from os.path import join
+from os.path import join, getsize
 from struct import unpack, pack
 import numpy as np
 
 
-def read(htk_path):
-    """Read each HTK file.
+def read_header(htk_path):
+    """Read the header of each HTK file.
     Args:
         htk_path (string): path to a HTK file
     Returns:
-        input_data (np.ndarray): A tensor of size (frame_num, feature_dim)
+        frame_num (int): the number of frames
         sampPeriod (int):
+        sampSize (int): the number of bytes per frame
         parmKind (int):
     """
-    # print('...Reading: %s' % htk_path)
     with open(htk_path, "rb") as f:
-        # Read header
         spam = f.read(12)
-        frame_num, sampPeriod, sampSize, parmKind = unpack(">IIHH", spam)
+    frame_num, sampPeriod, sampSize, parmKind = unpack(">IIHH", spam)
 
-        # for debug
-        # print(frame_num)  # frame num
-        # print(sampPeriod)  # 10ms
-        # print(sampSize)  # feature dim * 4 (byte)
-        # print(parmKind)
+    # NOTE: the number of frames is computed from the file size as reading
+    # the whole file
+    frame_num = (getsize(htk_path) - 12) // sampSize
+    return frame_num, sampPeriod, sampSize, parmKind
 
-        # Read data
-        feature_dim = int(sampSize / 4)
-        f.seek(12, 0)
-        input_data = np.fromfile(f, 'f')
-        try:
-            input_data = input_data.reshape(-1, feature_dim)
-        except:
-            print(input_data.shape)
-            raise ValueError
 
-        input_data.byteswap(True)
+def read(htk_path, mmap=False, start_frame=None, end_frame=None):
+    """Read each HTK file.
+    Args:
+        htk_path (string): path to a HTK file
+        mmap (bool, optional): if True, return a read-only big-endian view of
+            the memory-mapped file without loading & copying data
+        start_frame (int, optional): the first frame to read
+        end_frame (int, optional): the frame next to the last frame to read.
+            Frames out of [start_frame:end_frame] are not read.
+    Returns:
+        input_data (np.ndarray): A tensor of size (frame_num, feature_dim)
+        sampPeriod (int):
+        parmKind (int):
+    """
+    # print('...Reading: %s' % htk_path)
+    frame_num, sampPeriod, sampSize, parmKind = read_header(htk_path)
+    feature_dim = sampSize // 4
+    start_frame, end_frame, _ = slice(start_frame, end_frame).indices(
+        frame_num)
+    end_frame = max(start_frame, end_frame)
+
+    if mmap:
+        if frame_num == 0:
+            return (np.zeros((0, feature_dim), dtype='>f4'),
+                    sampPeriod, parmKind)
+        input_data = np.memmap(htk_path, dtype='>f4', mode='r', offset=12,
+                               shape=(frame_num, feature_dim))
+        return input_data[start_frame:end_frame], sampPeriod, parmKind
+
+    with open(htk_path, "rb") as f:
+        # Read data
+        f.seek(12 + start_frame * sampSize, 0)
+        input_data = np.fromfile(f, 'f',
+                                 count=(end_frame - start_frame) * feature_dim)
+    input_data = input_data.reshape(-1, feature_dim)
+    input_data.byteswap(True)
 
     return input_data, sampPeriod, parmKind
 
@@ -56,13 +80,36 @@ def write(input_data, htk_path, sampPeriod, parmKind):
     """
     # print('...Saving: %s' % htk_path)
     with open(htk_path, "wb") as f:
-        # Write header
-        frame_num, feature_dim = input_data.shape
-        sampSize = feature_dim * 4
-        f.write(pack(">iihh", frame_num, sampPeriod, sampSize, parmKind))
+        _write(f, input_data, sampPeriod, parmKind)
+
 
-        # Write data
-        f.write(pack(">%df" % (frame_num * feature_dim), *input_data.ravel()))
+def write_many(input_data_list, f, sampPeriod, parmKind):
+    """Append HTK records of many utterances to an open file.
+    Args:
+        input_data_list (list): list of tensors of size
+            (frame_num, feature_dim)
+        f: a file object opened in binary mode
+        sampPeriod (int):
+        parmKind (int):
+    Returns:
+        offsets (list): byte offsets of the header of each record in the file
+    """
+    offsets = []
+    for input_data in input_data_list:
+        offsets.append(f.tell())
+        _write(f, input_data, sampPeriod, parmKind)
+    return offsets
+
+
+def _write(f, input_data, sampPeriod, parmKind):
+    # Write header
+    frame_num, feature_dim = input_data.shape
+    sampSize = feature_dim * 4
+    f.write(pack(">iihh", frame_num, sampPeriod, sampSize, parmKind))
+
+    # Write data as big-endian float32 through the buffer protocol
+    input_data = np.ascontiguousarray(input_data, dtype='>f4')
+    f.write(input_data.data)
 
 
 def save_config(audio_file_type, feature_type, channels, config_save_path,
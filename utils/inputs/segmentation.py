@@ -10,14 +10,15 @@ from __future__ import print_function
 import numpy as np
 from collections import OrderedDict
 
-from utils.inputs.htk import read as read_htk
-from utils.inputs.wav2feature_python_speech_features import wav2feature as w2f_psf
-from utils.inputs.wav2feature_librosa import wav2feature as w2f_librosa
+from utils.inputs.htk import read
+from utils.inputs.feature_io import extract_feature
+from utils.inputs.feature_io import extract_feature_range, feature_frame_num
 
 
 def segment(audio_path, speaker, utterance_dict, is_training,
-            sil_duration=0., tool='htk', config=None, mean=None,
-            dtype=np.float32):
+            sil_duration=0, tool='htk', config=None, mean=None,
+            dtype=np.float32, input_data=None, window_limited=False,
+            channel=0):
     """Segment each HTK or WAV file into utterances. Normalization will not be
        conducted here.
     Args:
@@ -26,149 +27,57 @@ def segment(audio_path, speaker, utterance_dict, is_training,
         utterance_dict (dict): dictionary of utterance information
             key (string) => utterance index
             value (list) => [start_frame, end_frame, transcript (, transcript2)]
-        sil_duration (float): duration of silence at both ends. Default is 0.
+        sil_duration (int): duration of silence at both ends in frames.
+            Default is 0.
         tool (string): htk or python_speech_features or librosa
         config (dict): a configuration for feature extraction
         mean (np.ndarray):  A mean vector over the file
-        dtype (optional): default is np.float64
+        dtype (optional): default is np.float32
+        input_data (np.ndarray, optional): features of the whole file which
+            have been already extracted (e.g., a channel of a SPHERE file).
+            If given, audio_path is not read.
+        window_limited (bool, optional): if True, only samples of utterances
+            (and context frames) are read from a WAV or SPHERE file, instead
+            of extracting features of the whole file. This is available for
+            the numpy backend. HTK files are always read by memory-mapped
+            slices.
+        channel (int, optional): the channel of a multi-channel file to read
+            in case of window_limited
     Returns:
         input_data_dict (dict):
             key (string) => utt_index
             value (np.ndarray )=> a feature vector of size
-                `(frame_num, feature_dim)`
+                `(frame_num, feature_dim)`, which is a view of a block
+                shared by all utterances of the file
         input_data_utt_sum (np.ndarray): A sum of feature vectors of a speaker
         mean (np.ndarray): A mean vector over the file
         stddev (np.ndarray): A stddev vector over the file
         total_frame_num_file (int): total frame num of the target speaker's utterances
     """
-    if tool != 'htk' and config is None:
-        raise ValueError('Set config dict.')
-
-    # Read the HTK or WAV file
-    if tool == 'htk':
-        input_data, _, _ = read_htk(audio_path)
-    elif tool == 'python_speech_features':
-        input_data = w2f_psf(
-            audio_path,
-            feature_type=config['feature_type'],
-            feature_dim=config['channels'],
-            use_energy=config['energy'],
-            use_delta1=config['delta'],
-            use_delta2=config['deltadelta'],
-            window=config['window'],
-            slide=config['slide'])
-    elif tool == 'librosa':
-        input_data = w2f_librosa(
-            audio_path,
-            feature_type=config['feature_type'],
-            feature_dim=config['channels'],
-            use_energy=config['energy'],
-            use_delta1=config['delta'],
-            use_delta2=config['deltadelta'],
-            window=config['window'],
-            slide=config['slide'])
+    keys, input_data_block, offsets = segment_block(
+        audio_path, speaker, utterance_dict,
+        sil_duration=sil_duration,
+        tool=tool,
+        config=config,
+        dtype=dtype,
+        input_data=input_data,
+        window_limited=window_limited,
+        channel=channel)
 
-    assert isinstance(utterance_dict, OrderedDict)
-    # NOTE: utterance_dict must be an instance of OrderedDict
-
-    # Divide into each utterance
-    feature_dim = input_data.shape[1]
     input_data_dict = {}
-    total_frame_num_file = 0
-    end_frame_pre = 0
-    utt_num = len(utterance_dict.keys())
-    input_data_utt_sum = np.zeros((feature_dim,), dtype=dtype)
-    stddev = np.zeros((feature_dim,), dtype=dtype)
-    keys = sorted(list(utterance_dict.keys()))
     for i, utt_index in enumerate(keys):
-        utt_info = utterance_dict[utt_index]
-        start_frame, end_frame = utt_info[0], utt_info[1]
-
-        # Check timestamp
-        if start_frame > end_frame:
-            print('Warning: time stamp is reversed.')
-            print('speaker index: %s' % speaker)
-            print('utterance index: %s' % utt_index)
-            print('start_frame: %.3f' % start_frame)
-            print('end_frame: %.3f' % end_frame)
-            raise ValueError
-
-        # Check the first utterance
-        if i == 0:
-            if start_frame >= sil_duration:
-                start_frame_extend = start_frame - sil_duration
-            else:
-                start_frame_extend = 0
-
-            if len(utterance_dict) != 1:
-                start_frame_next = utterance_dict[keys[i + 1]][0]
-                if end_frame > start_frame_next:
-                    print('Warning: utterances are overlapping.')
-                    print('speaker index: %s' % speaker)
-                    print('utterance index: %s' % utt_index)
-                    print('end_frame: %.3f' % end_frame)
-                    print('start_frame_next: %.3f' % start_frame_next)
-
-                if start_frame_next - end_frame >= sil_duration * 2:
-                    end_frame_extend = end_frame + sil_duration
-                else:
-                    end_frame_extend = end_frame + \
-                        int((start_frame_next - end_frame) / 2)
-            else:
-                end_frame_extend = end_frame + sil_duration
-                # end_frame_extend = end_frame
-
-        # Check the last utterance
-        elif i == utt_num - 1:
-            if start_frame - end_frame_pre >= sil_duration * 2:
-                start_frame_extend = start_frame - sil_duration
-            else:
-                start_frame_extend = start_frame - \
-                    int((start_frame - end_frame_pre) / 2)
-
-            if input_data.shape[0] - end_frame >= sil_duration:
-                end_frame_extend = end_frame + sil_duration
-            else:
-                end_frame_extend = input_data.shape[0]  # last frame
-
-        # Check other utterances
-        else:
-            if start_frame - end_frame_pre >= sil_duration * 2:
-                start_frame_extend = start_frame - sil_duration
-            else:
-                start_frame_extend = start_frame - \
-                    int((start_frame - end_frame_pre) / 2)
-
-            start_frame_next = utterance_dict[keys[i + 1]][0]
-            if end_frame > start_frame_next:
-                print('Warning: utterances are overlapping.')
-                print('speaker index: %s' % speaker)
-                print('utterance index: %s' % utt_index)
-                print('end_frame: %.3f' % end_frame)
-                print('start_frame_next: %.3f' % start_frame_next)
-
-            if start_frame_next - end_frame >= sil_duration * 2:
-                end_frame_extend = end_frame + sil_duration
-            else:
-                end_frame_extend = end_frame + \
-                    int((start_frame_next - end_frame) / 2)
-
-        input_data_utt = input_data[start_frame_extend:end_frame_extend]
-        input_data_utt_sum += np.sum(input_data_utt, axis=0)
-        total_frame_num_file += (end_frame_extend - start_frame_extend)
-        input_data_dict[str(utt_index)] = input_data_utt
-
-        # For computing stddev over the file
-        if mean is not None:
-            stddev += np.sum(
-                np.abs(input_data_utt - mean) ** 2, axis=0)
-
-        # Update
-        end_frame_pre = end_frame
+        input_data_dict[str(utt_index)] = input_data_block[
+            offsets[i]:offsets[i + 1]]
+    input_data_utt_sum = np.sum(input_data_block, axis=0)
+    total_frame_num_file = input_data_block.shape[0]
 
     if is_training:
         if mean is not None:
             # Compute stddev over the file
+            stddev = np.zeros((input_data_block.shape[1],), dtype=dtype)
+            for input_data_utt in input_data_dict.values():
+                stddev += np.sum(
+                    np.abs(input_data_utt - mean) ** 2, axis=0)
             stddev = np.sqrt(stddev / (total_frame_num_file - 1))
         else:
             # Compute mean over the file
@@ -178,3 +87,152 @@ def segment(audio_path, speaker, utterance_dict, is_training,
         mean, stddev = None, None
 
     return input_data_dict, input_data_utt_sum, mean, stddev, total_frame_num_file
+
+
+def segment_block(audio_path, speaker, utterance_dict, sil_duration=0,
+                  tool='htk', config=None, dtype=np.float32, input_data=None,
+                  window_limited=False, channel=0):
+    """Segment each HTK or WAV file into utterances, which are copied into a
+       single contiguous block. The block can be normalized in place at once.
+    Args:
+        audio_path (string): path to a HTK or WAV file
+        speaker (string): speaker name
+        utterance_dict (dict): dictionary of utterance information
+            key (string) => utterance index
+            value (list) => [start_frame, end_frame, transcript (, transcript2)]
+        sil_duration (int): duration of silence at both ends in frames.
+            Default is 0.
+        tool (string): htk or python_speech_features or librosa or numpy
+        config (dict): a configuration for feature extraction
+        dtype (optional): default is np.float32
+        input_data (np.ndarray, optional): features of the whole file which
+            have been already extracted
+        window_limited (bool, optional): if True, only samples of utterances
+            are read (numpy only)
+        channel (int, optional): the channel of a multi-channel file to read
+            in case of window_limited
+    Returns:
+        keys (list): sorted utterance indices
+        input_data_block (np.ndarray): A tensor of size
+            `(total_frame_num, feature_dim)`. Features of the i-th utterance
+            are input_data_block[offsets[i]:offsets[i + 1]].
+        offsets (np.ndarray): A tensor of size `(utt_num + 1,)`
+    """
+    if tool != 'htk' and config is None and input_data is None:
+        raise ValueError('Set config dict.')
+    window_limited = window_limited and tool != 'htk' and input_data is None
+    if window_limited and tool != 'numpy':
+        raise ValueError('window_limited is available only for numpy.')
+
+    assert isinstance(utterance_dict, OrderedDict)
+    # NOTE: utterance_dict must be an instance of OrderedDict
+
+    # Read the HTK or WAV file
+    if window_limited:
+        # NOTE: features are extracted per utterance below
+        frame_num = feature_frame_num(audio_path, config)
+        feature_dim = extract_feature_range(
+            audio_path, config, 0, 1, channel, dtype).shape[1]
+    else:
+        if input_data is None:
+            if tool == 'htk':
+                # NOTE: only frames of each utterance are loaded from the
+                # memory-mapped file
+                input_data, _, _ = read(audio_path, mmap=True)
+            else:
+                input_data, _, _ = extract_feature(
+                    audio_path, tool, config, dtype)
+        frame_num, feature_dim = input_data.shape
+
+    keys = sorted(list(utterance_dict.keys()))
+    boundaries = utterance_boundaries(
+        [utterance_dict[utt_index][0] for utt_index in keys],
+        [utterance_dict[utt_index][1] for utt_index in keys],
+        frame_num, sil_duration, speaker=speaker, utt_indices=keys)
+
+    # NOTE: boundaries are clipped by the file as slicing does. They are
+    # floats in case of a float sil_duration.
+    boundaries = np.clip(boundaries, 0, frame_num).astype(np.int64)
+    offsets = np.zeros((len(keys) + 1,), dtype=np.int64)
+    np.cumsum(np.maximum(boundaries[:, 1] - boundaries[:, 0], 0),
+              out=offsets[1:])
+
+    # Divide into each utterance
+    input_data_block = np.empty((offsets[-1], feature_dim), dtype=dtype)
+    for i, (start_frame_extend, end_frame_extend) in enumerate(boundaries):
+        if window_limited:
+            input_data_block[offsets[i]:offsets[i + 1]] = extract_feature_range(
+                audio_path, config, start_frame_extend, end_frame_extend,
+                channel, dtype)
+        else:
+            input_data_block[offsets[i]:offsets[i + 1]] = input_data[
+                start_frame_extend:end_frame_extend]
+
+    return keys, input_data_block, offsets
+
+
+def utterance_boundaries(start_frames, end_frames, frame_num,
+                         sil_duration=0, speaker=None, utt_indices=None):
+    """Extend all utterances of a file by silence at both ends at once
+       without overlapping the neighbouring utterances. Each gap between
+       utterances shorter than sil_duration * 2 is divided in half.
+    Args:
+        start_frames (list or np.ndarray): start frames of utterances sorted
+            by utterance index
+        end_frames (list or np.ndarray): end frames of utterances
+        frame_num (int): the number of frames of the whole file
+        sil_duration (int, optional): duration of silence at both ends
+        speaker (string, optional): speaker name for warnings
+        utt_indices (list, optional): utterance indices for warnings
+    Returns:
+        boundaries (np.ndarray): A tensor of size `(utt_num, 2)`, where each
+            row is (start_frame_extend, end_frame_extend)
+    """
+    start_frames = np.asarray(start_frames)
+    end_frames = np.asarray(end_frames)
+    utt_num = len(start_frames)
+    if utt_indices is None:
+        utt_indices = list(range(utt_num))
+    if utt_num == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+
+    # Check timestamp
+    reversed_indices = np.flatnonzero(start_frames > end_frames)
+    if len(reversed_indices) > 0:
+        i = reversed_indices[0]
+        print('Warning: time stamp is reversed.')
+        print('speaker index: %s' % speaker)
+        print('utterance index: %s' % utt_indices[i])
+        print('start_frame: %.3f' % start_frames[i])
+        print('end_frame: %.3f' % end_frames[i])
+        raise ValueError
+
+    # NOTE: gap[i] is the gap between the i-th and (i + 1)-th utterances
+    gap = start_frames[1:] - end_frames[:-1]
+    for i in np.flatnonzero(gap < 0):
+        print('Warning: utterances are overlapping.')
+        print('speaker index: %s' % speaker)
+        print('utterance index: %s' % utt_indices[i])
+        print('end_frame: %.3f' % end_frames[i])
+        print('start_frame_next: %.3f' % start_frames[i + 1])
+
+    # NOTE: int() in the half of gaps rounds toward zero
+    half_gap = np.trunc(gap / 2).astype(np.int64)
+    wide = gap >= sil_duration * 2
+
+    dtype = np.result_type(start_frames, end_frames, sil_duration)
+    start_frames_extend = np.empty((utt_num,), dtype=dtype)
+    start_frames_extend[0] = max(start_frames[0] - sil_duration, 0)
+    start_frames_extend[1:] = np.where(
+        wide, start_frames[1:] - sil_duration, start_frames[1:] - half_gap)
+
+    end_frames_extend = np.empty((utt_num,), dtype=dtype)
+    end_frames_extend[:-1] = np.where(
+        wide, end_frames[:-1] + sil_duration, end_frames[:-1] + half_gap)
+    if utt_num == 1:
+        end_frames_extend[-1] = end_frames[-1] + sil_duration
+    else:
+        # NOTE: the last utterance is clipped by the last frame
+        end_frames_extend[-1] = min(end_frames[-1] + sil_duration, frame_num)
+
+    return np.stack([start_frames_extend, end_frames_extend], axis=1)
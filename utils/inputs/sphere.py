@@ -0,0 +1,154 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Read NIST SPHERE files (TIMIT, Switchboard, Fisher) without sox."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import numpy as np
+
+SPHERE_MAGIC = b'NIST_1A'
+
+
+def _make_ulaw_table():
+    """Decode table of 8-bit mu-law (G.711) to 16-bit linear PCM."""
+    u = ~np.arange(256, dtype=np.int32) & 0xff
+    exponent = (u >> 4) & 0x07
+    mantissa = u & 0x0f
+    magnitude = (((mantissa << 3) + 0x84) << exponent) - 0x84
+    return np.where(u & 0x80, -magnitude, magnitude).astype(np.int16)
+
+
+def _make_alaw_table():
+    """Decode table of 8-bit A-law (G.711) to 16-bit linear PCM."""
+    a = np.arange(256, dtype=np.int32) ^ 0x55
+    exponent = (a >> 4) & 0x07
+    mantissa = (a & 0x0f) << 4
+    magnitude = np.where(exponent == 0, mantissa + 8,
+                         (mantissa + 0x108) << np.maximum(exponent - 1, 0))
+    return np.where(a & 0x80, magnitude, -magnitude).astype(np.int16)
+
+
+_ULAW_TABLE = _make_ulaw_table()
+_ALAW_TABLE = _make_alaw_table()
+
+
+def is_sphere(file_path):
+    """
+    Args:
+        file_path (string): path to an audio file
+    Returns:
+        (bool): True if the file has a NIST SPHERE header
+    """
+    with open(file_path, 'rb') as f:
+        return f.read(len(SPHERE_MAGIC)) == SPHERE_MAGIC
+
+
+def read_sphere_header(f):
+    """Read the header of a NIST SPHERE file.
+    Args:
+        f (file): a file object opened in binary mode at the beginning
+    Returns:
+        header (dict):
+            key (string) => field name (sample_rate, channel_count etc.)
+            value (int or float or string) => field value
+    """
+    if f.readline().strip() != SPHERE_MAGIC:
+        raise ValueError('Not a NIST SPHERE file.')
+    header_size = int(f.readline().strip())
+    lines = f.read(header_size - f.tell()).decode('ascii', 'replace')
+
+    header = {'header_size': header_size}
+    for line in lines.split('\n'):
+        line = line.strip()
+        if line == 'end_head':
+            break
+        if line == '' or line[0] == ';':
+            continue
+        field = line.split(None, 2)
+        if len(field) != 3:
+            raise ValueError('Invalid SPHERE header field: %s' % line)
+        name, field_type, value = field
+        if field_type == '-i':
+            header[name] = int(value)
+        elif field_type == '-r':
+            header[name] = float(value)
+        else:
+            # NOTE: the length of a string is given as -sN
+            header[name] = value[:int(field_type[2:])]
+    return header
+
+
+def read_sphere(sph_path, start=0, end=None):
+    """Read a NIST SPHERE file into a buffer of 16-bit linear PCM.
+       Interleaved channels of 2-channel files (Switchboard etc.) are
+       returned as columns, as scipy.io.wavfile.read does.
+    Args:
+        sph_path (string): path to a SPHERE file
+        start (int, optional): the first sample to read
+        end (int, optional): the sample to stop reading. By default, samples
+            are read until the end of the file. Only bytes of samples in
+            [start, end) are read from the file.
+    Returns:
+        sampling_rate (int): sampling rate
+        audio (np.ndarray): A tensor of size `[T]` or `[T, channel_num]`
+    """
+    with open(sph_path, 'rb') as f:
+        header = read_sphere_header(f)
+        channel_num = header.get('channel_count', 1)
+        sample_n_bytes = header.get('sample_n_bytes', 2)
+        block_size = channel_num * sample_n_bytes
+        sample_coding = header.get('sample_coding', 'pcm')
+        if 'shorten' in sample_coding or 'wavpack' in sample_coding:
+            # NOTE: ex.) ulaw,embedded-shorten-v2.00 (LDC97S62, eval2000)
+            raise ValueError('Compressed SPHERE file is not supported: %s '
+                             '(decompress it with sph2pipe).' % sph_path)
+
+        f.seek(header['header_size'] + start * block_size)
+        if end is None:
+            data = f.read()
+        else:
+            data = f.read(max(0, end - start) * block_size)
+
+    if sample_coding.startswith('ulaw') or sample_coding.startswith('mu-law'):
+        audio = _ULAW_TABLE[np.frombuffer(data, dtype=np.uint8)]
+    elif sample_coding.startswith('alaw'):
+        audio = _ALAW_TABLE[np.frombuffer(data, dtype=np.uint8)]
+    elif sample_coding.startswith('pcm') and sample_n_bytes == 2:
+        # NOTE: 01 is little-endian, 10 is big-endian
+        byte_format = header.get('sample_byte_format', '01')
+        dtype = '>i2' if byte_format == '10' else '<i2'
+        data = data[:len(data) - len(data) % 2]
+        audio = np.frombuffer(data, dtype=dtype).astype(np.int16)
+    else:
+        raise ValueError('Unsupported SPHERE sample coding: %s (%d bytes)' %
+                         (sample_coding, sample_n_bytes))
+
+    if 'sample_count' in header.keys():
+        sample_num = max(0, header['sample_count'] - start)
+        audio = audio[:sample_num * channel_num]
+    audio = audio[:len(audio) - len(audio) % channel_num]
+    if channel_num > 1:
+        audio = audio.reshape((-1, channel_num))
+    return header['sample_rate'], audio
+
+
+def sphere_length(sph_path):
+    """
+    Args:
+        sph_path (string): path to a SPHERE file
+    Returns:
+        sampling_rate (int): sampling rate
+        sample_num (int): the number of samples per channel
+    """
+    with open(sph_path, 'rb') as f:
+        header = read_sphere_header(f)
+        if 'sample_count' in header.keys():
+            return header['sample_rate'], header['sample_count']
+        f.seek(0, 2)
+        data_size = f.tell() - header['header_size']
+    block_size = header.get('channel_count', 1) * header.get(
+        'sample_n_bytes', 2)
+    return header['sample_rate'], data_size // block_size
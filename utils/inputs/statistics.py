@@ -0,0 +1,150 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Accumulate mean & stddev of input features for normalization."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from collections import OrderedDict
+import numpy as np
+
+CHUNK_SIZE = 4096
+
+
+class Statistics(object):
+    """Mergeable accumulator of mean & variance per group (ex. gender, speaker).
+       The statistics of each group are kept as (frame num, mean, sum of
+       squared deviations) in float64 and combined by the parallel algorithm
+       of Chan et al. Partial statistics computed by different workers or
+       over different shards can be reduced by merge().
+    """
+
+    def __init__(self):
+        self._stats = OrderedDict()
+        # NOTE: key => [frame num, mean, sum of squared deviations]
+
+    def add(self, key, input_data):
+        """Add feature vectors to the group.
+        Args:
+            key (string): the name of the group
+            input_data (np.ndarray): A tensor of size `(frame_num, feature_dim)`
+        """
+        frame_num = input_data.shape[0]
+        if frame_num == 0:
+            return
+        mean = np.mean(input_data, axis=0, dtype=np.float64)
+        # NOTE: deviations are computed in float64 per chunk of frames, so
+        # that a block of a whole session is not copied at once
+        m2 = np.zeros_like(mean)
+        for i in range(0, frame_num, CHUNK_SIZE):
+            diff = input_data[i:i + CHUNK_SIZE].astype(np.float64)
+            diff -= mean
+            m2 += np.einsum('ij,ij->j', diff, diff)
+        self._add(key, frame_num, mean, m2)
+
+    def merge(self, other):
+        """Merge the statistics of another accumulator into this one.
+        Args:
+            other (Statistics): partial statistics
+        Returns:
+            self (Statistics)
+        """
+        for key, (frame_num, mean, m2) in other._stats.items():
+            self._add(key, frame_num, mean, m2)
+        return self
+
+    def _add(self, key, frame_num, mean, m2):
+        if key not in self._stats.keys():
+            self._stats[key] = [frame_num, mean.copy(), m2.copy()]
+            return
+
+        stats = self._stats[key]
+        total_frame_num = stats[0] + frame_num
+        delta = mean - stats[1]
+        stats[1] += delta * frame_num / total_frame_num
+        stats[2] += m2 + delta ** 2 * stats[0] * frame_num / total_frame_num
+        stats[0] = total_frame_num
+
+    def keys(self):
+        return list(self._stats.keys())
+
+    def __contains__(self, key):
+        return key in self._stats.keys()
+
+    def __len__(self):
+        return len(self._stats)
+
+    def frame_num(self, key):
+        """
+        Args:
+            key (string): the name of the group
+        Returns:
+            frame_num (int): the number of frames in the group. 0 if the
+                group has no frames.
+        """
+        if key not in self._stats.keys():
+            return 0
+        return self._stats[key][0]
+
+    def mean(self, key, dtype=np.float32):
+        """
+        Args:
+            key (string): the name of the group
+            dtype (optional): the type of data, default is np.float32
+        Returns:
+            mean (np.ndarray): A mean vector of the group. None if the group
+                has no frames (ex. a gender absent in a subset).
+        """
+        if key not in self._stats.keys():
+            return None
+        return self._stats[key][1].astype(dtype)
+
+    def std(self, key, ddof=1, dtype=np.float32):
+        """
+        Args:
+            key (string): the name of the group
+            ddof (int, optional): delta degrees of freedom. Default is 1
+                (unbiased).
+            dtype (optional): the type of data, default is np.float32
+        Returns:
+            std (np.ndarray): A stddev vector of the group. None if the group
+                has no frames (ex. a gender absent in a subset).
+        """
+        if key not in self._stats.keys():
+            return None
+        frame_num, _, m2 = self._stats[key]
+        if frame_num <= ddof:
+            raise ValueError(
+                'stddev of %s needs more than %d frames, but got %d.' %
+                (key, ddof, frame_num))
+        return np.sqrt(m2 / (frame_num - ddof)).astype(dtype)
+
+    def save(self, save_path):
+        """Save statistics as a npz file.
+        Args:
+            save_path (string): path to the npz file
+        """
+        keys = self.keys()
+        np.savez(save_path,
+                 keys=np.array([str(key) for key in keys]),
+                 frame_num=np.array([self._stats[k][0] for k in keys],
+                                    dtype=np.int64),
+                 mean=np.array([self._stats[k][1] for k in keys]),
+                 m2=np.array([self._stats[k][2] for k in keys]))
+
+    @classmethod
+    def load(cls, stats_path):
+        """Load statistics saved by save().
+        Args:
+            stats_path (string): path to the npz file
+        Returns:
+            stats (Statistics)
+        """
+        stats = cls()
+        data = np.load(stats_path)
+        for key, frame_num, mean, m2 in zip(data['keys'], data['frame_num'],
+                                            data['mean'], data['m2']):
+            stats._add(str(key), int(frame_num), mean, m2)
+        return stats
@@ -10,9 +10,10 @@ from __future__ import print_function
 """
 
 import librosa
-import subprocess
 import numpy as np
 
+from utils.inputs.sphere import read_sphere
+
 
 def wav2feature(wav_path, feature_type='logfbank', feature_dim=40,
                 use_energy=True, use_delta1=True, use_delta2=True,
@@ -31,28 +32,66 @@ def wav2feature(wav_path, feature_type='logfbank', feature_dim=40,
     Returns:
         feat (np.ndarray): A tensor of size `[T, feature_dim]`
     """
-    if feature_type == 'logmelfbank':
-        feature_type = 'logfbank'
-    if feature_type not in ['logfbank', 'fbank', 'mfcc']:
-        raise ValueError('feature_type is or "logfbank" or "fbank" or "mfcc".')
-    if use_delta2:
-        delta1 = True
-
     # Read wav file
     try:
         y, sr = librosa.load(wav_path)
     except ValueError:
         # Read NIST file
-        wav_path_tmp = './tmp.wav'
-        # result = subprocess.call(['sph2pipe', '-f', 'wav', wav_path, wav_path_tmp])
-        result = subprocess.call(['sox', wav_path, '-t', 'wav', wav_path_tmp])
+        fs, audio = read_sphere(wav_path)
+        y, sr = pcm2float(audio, fs)
+
+    return signal2feature(y, sr,
+                          feature_type=feature_type,
+                          feature_dim=feature_dim,
+                          use_energy=use_energy,
+                          use_delta1=use_delta1,
+                          use_delta2=use_delta2,
+                          window=window,
+                          slide=slide,
+                          dtype=dtype)
 
-        if result != 0:
-            raise ValueError
 
-        # Try again
-        y, sr = librosa.load(wav_path_tmp)
-        subprocess.call(['rm', wav_path_tmp])
+def pcm2float(audio, sampling_rate, target_sampling_rate=22050):
+    """Convert 16-bit PCM to a float waveform in the same way as
+       librosa.load (mono & resampled to 22050Hz by default).
+    Args:
+        audio (np.ndarray): A waveform of size `[T]` or `[T, channel_num]`
+        sampling_rate (int): the sampling rate of audio
+        target_sampling_rate (int, optional): the sampling rate to resample
+    Returns:
+        y (np.ndarray): A waveform of size `[T']`
+        sr (int): the sampling rate of y
+    """
+    y = librosa.to_mono(audio.T.astype(np.float32) / 32768)
+    y = librosa.resample(y, orig_sr=sampling_rate,
+                         target_sr=target_sampling_rate)
+    return y, target_sampling_rate
+
+
+def signal2feature(y, sr, feature_type='logfbank', feature_dim=40,
+                   use_energy=True, use_delta1=True, use_delta2=True,
+                   window=0.025, slide=0.01, dtype=np.float64):
+    """Convert a waveform to MFCC or log mel filterbank features.
+    Args:
+        y (np.ndarray): A float waveform of size `[T]`
+        sr (int): the sampling rate
+        feature_type (string, optional): logfbank or fbank or mfcc
+        feature_dim (int, optional): the demension of each feature
+        use_energy (bool, optional): if True, add energy
+        use_delta1 (bool, optional): if True, add delta features
+        use_delta2 (bool, optional): if True, add delta delta features
+        window (float, optional): window width to extract features
+        slide (float, optional): extract features per 'slide'
+        dtype (optional): default is np.float64
+    Returns:
+        feat (np.ndarray): A tensor of size `[T, feature_dim]`
+    """
+    if feature_type == 'logmelfbank':
+        feature_type = 'logfbank'
+    if feature_type not in ['logfbank', 'fbank', 'mfcc']:
+        raise ValueError('feature_type is or "logfbank" or "fbank" or "mfcc".')
+    if use_delta2:
+        use_delta1 = True
 
     if feature_type == 'mfcc':
         feat = librosa.feature.mfcc(y=y,
@@ -93,7 +132,7 @@ def wav2feature(wav_path, feature_type='logfbank', feature_dim=40,
         delta1_feat = librosa.feature.delta(feat, width=9)
         delta2_feat = librosa.feature.delta(delta1_feat, width=9)
         feat = np.concatenate((feat, delta1_feat, delta2_feat), axis=1)
-    elif delta1:
+    elif use_delta1:
         delta1_feat = librosa.feature.delta(feat, width=9)
         feat = np.concatenate((feat, delta1_feat), axis=1)
 
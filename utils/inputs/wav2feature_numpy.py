@@ -0,0 +1,227 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+"""NumPy based feature extraction compatible with HTK (HCopy).
+   Frames are made by stride tricks and transformed by a batched real FFT.
+   Mel filterbanks, window functions and DCT matrices are memoized per
+   configuration so that they are built only once per process.
+"""
+
+import numpy as np
+import scipy.io.wavfile
+from numpy.lib.stride_tricks import as_strided
+
+from utils.inputs.delta import delta
+from utils.inputs.sphere import read_sphere
+
+# NOTE: key => (sampling_rate, n_fft, channels)
+_MEL_FILTERBANK_CACHE = {}
+# NOTE: key => frame_length
+_WINDOW_CACHE = {}
+# NOTE: key => (channels, num_ceps, ceplifter)
+_DCT_CACHE = {}
+
+
+def wav2feature(wav_path, feature_type='logfbank', feature_dim=40,
+                use_energy=True, use_delta1=True, use_delta2=True,
+                window=0.025, slide=0.01, dtype=np.float64):
+    """Read wav file & convert to MFCC or log mel filterbank features.
+    Args:
+        wav_path (string): the path to a wav file
+        feature_type (string, optional): logfbank or fbank or mfcc
+        feature_dim (int, optional): the demension of each feature
+        use_energy (bool, optional): if True, add energy
+        use_delta1 (bool, optional): if True, add delta features
+        use_delta2 (bool, optional): if True, add delta delta features
+        window (float, optional): window width to extract features
+        slide (float, optional): extract features per 'slide'
+        dtype (optional): default is np.float64
+    Returns:
+        feat (np.ndarray): A tensor of size `[T, feature_dim]`
+    """
+    # Read wav file
+    try:
+        fs, audio = scipy.io.wavfile.read(wav_path)
+    except ValueError:
+        # Read NIST file
+        fs, audio = read_sphere(wav_path)
+
+    return signal2feature(audio, fs,
+                          feature_type=feature_type,
+                          feature_dim=feature_dim,
+                          use_energy=use_energy,
+                          use_delta1=use_delta1,
+                          use_delta2=use_delta2,
+                          window=window,
+                          slide=slide,
+                          dtype=dtype)
+
+
+def signal2feature(audio, sampling_rate, feature_type='logfbank',
+                   feature_dim=40, use_energy=True, use_delta1=True,
+                   use_delta2=True, window=0.025, slide=0.01, num_ceps=12,
+                   ceplifter=22, preemph=0.97, dtype=np.float64):
+    """Convert a waveform to MFCC or log mel filterbank features.
+       The configuration corresponds to the one saved by
+       utils.inputs.htk.save_config (USEHAMMING = T, ZMEANSOURCE = T,
+       ENORMALISE = F, NUMCHANS = feature_dim).
+    Args:
+        audio (np.ndarray): A tensor of size `[num_samples]`
+        sampling_rate (int): the sampling rate of audio
+        feature_type (string, optional): logfbank (fbank) or mfcc
+        feature_dim (int, optional): the number of mel channels
+        use_energy (bool, optional): if True, add log energy
+        use_delta1 (bool, optional): if True, add delta features
+        use_delta2 (bool, optional): if True, add delta delta features
+        window (float, optional): window width to extract features
+        slide (float, optional): extract features per 'slide'
+        num_ceps (int, optional): the number of cepstral coefficients in
+            case of mfcc
+        ceplifter (int, optional): the cepstral liftering coefficient in
+            case of mfcc
+        preemph (float, optional): the pre-emphasis coefficient
+        dtype (optional): default is np.float64
+    Returns:
+        feat (np.ndarray): A tensor of size `[T, feature_dim]`
+    """
+    if feature_type in ['logmelfbank', 'fbank']:
+        feature_type = 'logfbank'
+        # NOTE: FBANK in HTK is log mel-filter bank channel outputs
+    if feature_type not in ['logfbank', 'mfcc']:
+        raise ValueError('feature_type is "logfbank" or "fbank" or "mfcc".')
+    if use_delta2:
+        use_delta1 = True
+
+    frame_length, frame_shift = frame_size(sampling_rate, window, slide)
+    n_fft = 1
+    while n_fft < frame_length:
+        n_fft *= 2
+
+    # Make frames without copying the waveform
+    audio = np.ascontiguousarray(audio, dtype=np.float64)
+    frame_num = max(0, (len(audio) - frame_length) // frame_shift + 1)
+    frames = as_strided(audio,
+                        shape=(frame_num, frame_length),
+                        strides=(audio.strides[0] * frame_shift,
+                                 audio.strides[0]),
+                        writeable=False)
+
+    # Zero mean source per frame
+    frames = frames - np.mean(frames, axis=1, keepdims=True)
+
+    # Log energy before pre-emphasis & windowing
+    if use_energy:
+        energy = np.log(np.maximum(np.sum(frames ** 2, axis=1), np.exp(-50)))
+
+    # Pre-emphasis per frame
+    frames[:, 1:] -= preemph * frames[:, :-1].copy()
+    frames[:, 0] *= 1 - preemph
+
+    # Batched real FFT over all frames
+    frames *= _get_window(frame_length)
+    spectrum = np.abs(np.fft.rfft(frames, n=n_fft, axis=1))
+
+    melspec = np.dot(spectrum,
+                     _get_mel_filterbank(sampling_rate, n_fft, feature_dim))
+    feat = np.log(np.maximum(melspec, 1.0))
+
+    if feature_type == 'mfcc':
+        feat = np.dot(feat, _get_dct(feature_dim, num_ceps, ceplifter))
+
+    if use_energy:
+        feat = np.concatenate((feat, energy.reshape(-1, 1)), axis=1)
+
+    if use_delta2:
+        delta1_feat = delta(feat, N=2)
+        delta2_feat = delta(delta1_feat, N=2)
+        feat = np.concatenate((feat, delta1_feat, delta2_feat), axis=1)
+    elif use_delta1:
+        delta1_feat = delta(feat, N=2)
+        feat = np.concatenate((feat, delta1_feat), axis=1)
+
+    return feat.astype(dtype, copy=False)
+
+
+def frame_size(sampling_rate, window, slide):
+    """
+    Args:
+        sampling_rate (int): the sampling rate
+        window (float): window width to extract features
+        slide (float): extract features per 'slide'
+    Returns:
+        frame_length (int): the number of samples per frame
+        frame_shift (int): the number of samples between frames
+    """
+    return int(round(window * sampling_rate)), int(round(slide * sampling_rate))
+
+
+def _mel(freq):
+    return 1127 * np.log(1 + freq / 700)
+
+
+def _get_mel_filterbank(sampling_rate, n_fft, channels):
+    """Make triangular mel filters in the same way as HTK.
+    Args:
+        sampling_rate (int): the sampling rate
+        n_fft (int): the FFT size
+        channels (int): the number of mel channels
+    Returns:
+        mel_filterbank (np.ndarray): A tensor of size
+            `[n_fft // 2 + 1, channels]`
+    """
+    key = (sampling_rate, n_fft, channels)
+    if key not in _MEL_FILTERBANK_CACHE.keys():
+        # Center frequencies equally spaced on the mel scale
+        mel_max = _mel(sampling_rate / 2)
+        center = np.arange(channels + 2) * mel_max / (channels + 1)
+
+        mel_bin = _mel(np.arange(n_fft // 2 + 1) * sampling_rate / n_fft)
+        mel_bin = mel_bin.reshape(-1, 1)
+        rise = (mel_bin - center[:-2]) / (center[1:-1] - center[:-2])
+        fall = (center[2:] - mel_bin) / (center[2:] - center[1:-1])
+        mel_filterbank = np.maximum(0, np.minimum(rise, fall))
+
+        # NOTE: the DC component is not used in HTK
+        mel_filterbank[0] = 0
+        mel_filterbank.flags.writeable = False
+        _MEL_FILTERBANK_CACHE[key] = mel_filterbank
+    return _MEL_FILTERBANK_CACHE[key]
+
+
+def _get_window(frame_length):
+    """
+    Args:
+        frame_length (int): the number of samples per frame
+    Returns:
+        window (np.ndarray): A hamming window of size `[frame_length]`
+    """
+    if frame_length not in _WINDOW_CACHE.keys():
+        window = np.hamming(frame_length)
+        window.flags.writeable = False
+        _WINDOW_CACHE[frame_length] = window
+    return _WINDOW_CACHE[frame_length]
+
+
+def _get_dct(channels, num_ceps, ceplifter):
+    """Make a DCT matrix with cepstral liftering in the same way as HTK.
+    Args:
+        channels (int): the number of mel channels
+        num_ceps (int): the number of cepstral coefficients
+        ceplifter (int): the cepstral liftering coefficient
+    Returns:
+        dct (np.ndarray): A tensor of size `[channels, num_ceps]`
+    """
+    key = (channels, num_ceps, ceplifter)
+    if key not in _DCT_CACHE.keys():
+        i = np.arange(1, channels + 1).reshape(-1, 1)
+        j = np.arange(1, num_ceps + 1)
+        dct = np.sqrt(2 / channels) * np.cos(np.pi * j / channels * (i - 0.5))
+        if ceplifter > 0:
+            dct *= 1 + ceplifter / 2 * np.sin(np.pi * j / ceplifter)
+        dct.flags.writeable = False
+        _DCT_CACHE[key] = dct
+    return _DCT_CACHE[key]
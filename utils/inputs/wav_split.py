@@ -12,9 +12,10 @@ import numpy as np
 import wave
 from tqdm import tqdm
 from utils.util import mkdir_join
+from utils.inputs.segmentation import utterance_boundaries
 
 
-def split_wav(wav_paths, save_path, speaker_dict):
+def split_wav(wav_paths, save_path, speaker_dict, sil_duration=0):
     """Read WAV files & divide them with respect to each utterance.
     Args:
         wav_paths (list): path to WAV files
@@ -24,6 +25,8 @@ def split_wav(wav_paths, save_path, speaker_dict):
             value => the dictionary of utterance information of each speaker
                 key => utterance index
                 value => [start_frame, end_frame, transcript]
+        sil_duration (int, optional): duration of silence at both ends in
+            frames, which are extended in the same way as features
     """
     # Read each WAV file
     print('==> Reading WAV files...')
@@ -45,7 +48,8 @@ def split_wav(wav_paths, save_path, speaker_dict):
 
         # Split per utterance & save as wav files
         audio.split(audio_data, utt_dict, speaker,
-                    save_path=wav_utt_save_path)
+                    save_path=wav_utt_save_path,
+                    sil_duration=sil_duration)
 
 
 class Audio(object):
@@ -82,7 +86,8 @@ class Audio(object):
 
         return audio_data
 
-    def split(self, audio_data, utterance_dict, speaker, save_path):
+    def split(self, audio_data, utterance_dict, speaker, save_path,
+              sil_duration=0):
         """
         Args:
             audio_data:
@@ -91,12 +96,20 @@ class Audio(object):
                 value => [start_frame, end_frame, transcript]
             speaker:
             save_path: path to save each WAV file
+            sil_duration (int, optional): duration of silence at both ends
         """
-        for utt_index, utt_info in sorted(utterance_dict.items(),
-                                          key=lambda x: x[0]):
-            start_frame, end_frame = utt_info[:2]
-            start_frame = int((start_frame / 100) * self.sampling_rate)
-            end_frame = int((end_frame / 100) * self.sampling_rate)
+        # NOTE: boundaries are computed in frames (10ms) as segment() does
+        keys = sorted(utterance_dict.keys())
+        boundaries = utterance_boundaries(
+            [utterance_dict[utt_index][0] for utt_index in keys],
+            [utterance_dict[utt_index][1] for utt_index in keys],
+            frame_num=len(audio_data) * 100 // self.sampling_rate,
+            sil_duration=sil_duration,
+            speaker=speaker,
+            utt_indices=keys)
+        boundaries = (boundaries / 100 * self.sampling_rate).astype(np.int64)
+
+        for utt_index, (start_frame, end_frame) in zip(keys, boundaries):
             audio_data_split = audio_data[start_frame:end_frame]
 
             with wave.Wave_write(
@@ -18,14 +18,17 @@ class Char2idx(object):
         double_letter (bool, optional): if True, group repeated letters.
             This is used for Japanese.
         remove_list (list, optional): characters to neglect
+        dtype (optional): the data type of indices. Default is np.int32.
+            np.uint16 is enough for vocabularies smaller than 65536.
     """
 
     def __init__(self, vocab_file_path, space_mark='_', capital_divide=False,
-                 double_letter=False, remove_list=[]):
+                 double_letter=False, remove_list=[], dtype=np.int32):
         self.space_mark = space_mark
         self.capital_divide = capital_divide
         self.double_letter = double_letter
         self.remove_list = remove_list
+        self.dtype = dtype
 
         # Read the vocabulary file
         self.map_dict = {}
@@ -42,56 +45,137 @@ class Char2idx(object):
         self.map_dict['<'] = vocab_count
         self.map_dict['>'] = vocab_count + 1
 
+        if capital_divide and len(space_mark) != 1:
+            raise ValueError('space_mark must be a character.')
+
+        # Make lookup tables indexed by code points of characters, and sorted
+        # by pairs of code points of double-letters
+        char_list = [token for token in self.map_dict.keys()
+                     if len(token) == 1]
+        pair_list = sorted(token for token in self.map_dict.keys()
+                           if len(token) == 2 and
+                           not (capital_divide and space_mark in token))
+        char_codes = np.array(list(map(ord, char_list)), dtype=np.int64)
+        pair_first_codes = np.array([ord(pair[0]) for pair in pair_list],
+                                    dtype=np.int64)
+        table_size = max([0] + [code + 1 for code in char_codes] +
+                         [code + 1 for code in pair_first_codes])
+        self._char_table = np.full((table_size,), -1, dtype=np.int64)
+        self._char_table[char_codes] = [self.map_dict[char]
+                                        for char in char_list]
+        self._pair_first_table = np.zeros((table_size,), dtype=bool)
+        self._pair_first_table[pair_first_codes] = True
+        self._pair_codes = np.array(
+            [_pair_code(ord(pair[0]), ord(pair[1])) for pair in pair_list],
+            dtype=np.int64)
+        self._pair_indices = np.array(
+            [self.map_dict[pair] for pair in pair_list], dtype=np.int64)
+
     def __call__(self, str_char):
         """
         Args:
             str_char (string): a sequence of characters
         Returns:
-            index_list (list): character indices
+            index_list (np.ndarray): character indices
         """
-        index_list = []
-
-        # Convert from character to index
-        if self.capital_divide:
-            for word in str_char.split(self.space_mark):
-                # Replace the first character with the capital letter
-                index_list.append(self.map_dict[word[0].upper()])
-
-                # Check double-letters
-                skip_flag = False
-                for i in range(1, len(word) - 1, 1):
-                    if skip_flag:
-                        skip_flag = False
-                        continue
-
-                    if not skip_flag and word[i:i + 2] in self.map_dict.keys():
-                        index_list.append(self.map_dict[word[i:i + 2]])
-                        skip_flag = True
-                    else:
-                        index_list.append(self.map_dict[word[i]])
-
-                # Final character
-                if not skip_flag:
-                    index_list.append(self.map_dict[word[-1]])
-
-        elif self.double_letter:
-            skip_flag = False
-            for i in range(len(str_char) - 1):
-                if skip_flag:
-                    skip_flag = False
-                    continue
-
-                if not skip_flag and str_char[i:i + 2] in self.map_dict.keys():
-                    index_list.append(self.map_dict[str_char[i:i + 2]])
-                    skip_flag = True
-                else:
-                    index_list.append(self.map_dict[str_char[i]])
+        return self.tokenize_batch([str_char])[0]
 
-            # Final character
-            if not skip_flag:
-                index_list.append(self.map_dict[str_char[-1]])
-
-        else:
-            index_list = list(map(lambda x: self.map_dict[x], list(str_char)))
+    def tokenize_batch(self, str_char_list):
+        """Convert many sequences of characters at once. Double-letters are
+           matched greedily from left to right as in the sequential loop.
+        Args:
+            str_char_list (list): sequences of characters
+        Returns:
+            values (np.ndarray): flat character indices of all sequences
+            offsets (np.ndarray): indices of the i-th sequence are
+                values[offsets[i]:offsets[i + 1]]
+        """
+        lengths = np.array([len(str_char) for str_char in str_char_list],
+                           dtype=np.int64)
+        ends = np.cumsum(lengths)
+        codes = np.frombuffer(''.join(str_char_list).encode('utf-32-le'),
+                              dtype='<u4').astype(np.int64)
+        n = len(codes)
+        is_end = np.zeros((n,), dtype=bool)
+        is_end[ends[lengths > 0] - 1] = True
+        is_start = np.zeros((n,), dtype=bool)
+        is_start[(ends - lengths)[lengths > 0]] = True
+
+        char_indices = _lookup_table(codes, self._char_table)
+        first_indices = char_indices.copy()
+        # the number of indices emitted at each position
+        counts = np.ones((n,), dtype=np.int64)
+        # Double-letters can start at these positions
+        candidates = ~is_end
 
-        return np.array(index_list)
+        if self.capital_divide:
+            is_space = codes == ord(self.space_mark)
+            prev_space = np.r_[True, is_space[:-1]] | is_start
+            next_space = np.r_[is_space[1:], True] | is_end
+            if np.any(lengths == 0) or np.any(is_space & (prev_space | is_end)):
+                raise ValueError('Words must not be empty.')
+            word_start = ~is_space & prev_space
+            # Replace the first character with the capital letter
+            first_codes, inverse = np.unique(codes[word_start],
+                                             return_inverse=True)
+            first_indices[word_start] = np.array(
+                [self.map_dict.get(chr(code).upper(), -1)
+                 for code in first_codes], dtype=np.int64)[inverse]
+            counts[is_space] = 0
+            # NOTE: the first character of a word of a single character is
+            # also emitted as the final character
+            counts[word_start & next_space] = 2
+            candidates &= ~is_space & ~next_space & ~word_start
+
+        if self.capital_divide or self.double_letter:
+            pair_indices = np.full((n,), -1, dtype=np.int64)
+            candidates &= _lookup_table(codes, self._pair_first_table, False)
+            positions = np.flatnonzero(candidates)
+            pair_indices[positions] = _lookup(
+                _pair_code(codes[positions], codes[positions + 1]),
+                self._pair_codes, self._pair_indices)
+            candidates &= pair_indices >= 0
+
+            # Overlapping double-letters make runs of candidates, and every
+            # other candidate from the start of each run is taken
+            positions = np.arange(n)
+            run_start = candidates & ~np.r_[False, candidates[:-1]]
+            run_start_positions = np.maximum.accumulate(
+                np.where(run_start, positions, 0)) if n > 0 else positions
+            take = candidates & ((positions - run_start_positions) % 2 == 0)
+            first_indices[take] = pair_indices[take]
+            counts[np.flatnonzero(take) + 1] = 0
+
+        emit = counts > 0
+        for indices, mask in [(first_indices, emit),
+                              (char_indices, counts == 2)]:
+            unknown = mask & (indices < 0)
+            if np.any(unknown):
+                raise KeyError(chr(codes[np.flatnonzero(unknown)[0]]))
+
+        cum_counts = np.r_[0, np.cumsum(counts)]
+        values = np.empty((cum_counts[-1],), dtype=self.dtype)
+        values[cum_counts[:-1][emit]] = first_indices[emit]
+        values[cum_counts[:-1][counts == 2] + 1] = char_indices[counts == 2]
+        offsets = cum_counts[np.r_[0, ends]]
+        return values, offsets
+
+
+def _pair_code(first_code, second_code):
+    return first_code * 0x110000 + second_code
+
+
+def _lookup_table(codes, table, default=-1):
+    """Look up a table indexed by code points."""
+    if len(table) == 0:
+        return np.full(codes.shape, default, dtype=table.dtype)
+    return np.where(codes < len(table),
+                    table[np.minimum(codes, len(table) - 1)], default)
+
+
+def _lookup(codes, keys, values):
+    """Look up values of sorted keys. -1 is returned for unknown keys."""
+    if len(keys) == 0:
+        return np.full(codes.shape, -1, dtype=np.int64)
+    positions = np.minimum(np.searchsorted(keys, codes), len(keys) - 1)
+    return np.where(keys[positions] == codes, values[positions], -1)
@@ -13,9 +13,12 @@ class Phone2idx(object):
     Args:
         vocab_file_path (string): path to the vocabulary file
         remove_list (list, optional): phones to neglect
+        dtype (optional): the data type of indices. Default is np.int32.
     """
 
-    def __init__(self, vocab_file_path, remove_list=[]):
+    def __init__(self, vocab_file_path, remove_list=[], dtype=np.int32):
+        self.dtype = dtype
+
         # Read the vocabulary file
         self.map_dict = {}
         vocab_count = 0
@@ -42,4 +45,4 @@ class Phone2idx(object):
         phone_list = str_phone.split(' ')
         index_list = list(map(lambda x: self.map_dict[x], phone_list))
 
-        return np.array(index_list)
+        return np.array(index_list, dtype=self.dtype)
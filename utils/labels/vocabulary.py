@@ -0,0 +1,188 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Make word vocabularies of many frequency thresholds at once."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+from os.path import isfile
+from collections import Counter, OrderedDict
+import numpy as np
+
+
+class VocabularyBuilder(object):
+    """Count words over transcripts, and make vocabularies of all frequency
+       thresholds from a single sorted list. Builders of different corpora or
+       of parallel workers can be merged.
+    Args:
+        word_count_dict (dict, optional):
+            key (string) => word
+            value (int) => the number of the word
+    """
+
+    def __init__(self, word_count_dict=None):
+        self.counter = Counter()
+        if word_count_dict is not None:
+            self.counter.update(word_count_dict)
+
+    def __len__(self):
+        return len(self.counter)
+
+    def __contains__(self, word):
+        return word in self.counter
+
+    def add(self, word_list):
+        """
+        Args:
+            word_list (list): words in a transcript
+        """
+        self.counter.update(word_list)
+
+    def merge(self, other):
+        """Add word counts of another builder.
+        Args:
+            other (VocabularyBuilder)
+        Returns:
+            self (VocabularyBuilder)
+        """
+        self.counter.update(other.counter)
+        return self
+
+    def vocab_lists(self, thresholds, oov=None):
+        """
+        Args:
+            thresholds (list): frequency thresholds
+            oov (string, optional): if given, appended to each vocabulary
+        Returns:
+            vocab_list_dict (OrderedDict):
+                key (int) => frequency threshold
+                value (list) => sorted words appearing threshold times or more
+        """
+        # NOTE: words are sorted only once
+        word_list = sorted(self.counter.keys())
+        vocab_list_dict = OrderedDict()
+        for threshold in thresholds:
+            vocab_list = [word for word in word_list
+                          if self.counter[word] >= threshold]
+            if oov is not None:
+                vocab_list.append(oov)
+            vocab_list_dict[threshold] = vocab_list
+        return vocab_list_dict
+
+    def map_dicts(self, thresholds, oov=None):
+        """
+        Args:
+            thresholds (list): frequency thresholds
+            oov (string, optional): if given, appended to each vocabulary
+        Returns:
+            map_dict_dict (OrderedDict):
+                key (int) => frequency threshold
+                value (dict) => word => index in the vocabulary file
+        """
+        map_dict_dict = OrderedDict()
+        for threshold, vocab_list in self.vocab_lists(thresholds,
+                                                      oov).items():
+            map_dict_dict[threshold] = dict(
+                (word, i) for i, word in enumerate(vocab_list))
+        return map_dict_dict
+
+    def save(self, vocab_file_path_dict, oov=None):
+        """Write vocabulary files.
+        Args:
+            vocab_file_path_dict (dict):
+                key (int) => frequency threshold
+                value (string) => path to the vocabulary file
+            oov (string, optional): if given, written at the end of each file
+        """
+        thresholds = list(vocab_file_path_dict.keys())
+        for threshold, vocab_list in self.vocab_lists(thresholds,
+                                                      oov).items():
+            with open(vocab_file_path_dict[threshold], 'w') as f:
+                for word in vocab_list:
+                    f.write('%s\n' % word)
+
+    def oov_rates(self, word_lists, thresholds):
+        """Compute OOV rates of test transcripts for all frequency thresholds
+           at once. Words of the test transcripts are counted in a single
+           pass, and each distinct word is looked up only once.
+        Args:
+            word_lists (iterable): words of each test transcript
+            thresholds (list): frequency thresholds of vocabularies
+        Returns:
+            oov_rate_dict (OrderedDict):
+                key (int) => frequency threshold
+                value (float) => OOV rate (%)
+        """
+        test_counter = Counter()
+        for word_list in word_lists:
+            test_counter.update(word_list)
+        # NOTE: frequencies in training transcripts
+        freqs = np.array([self.counter[word] for word in test_counter.keys()],
+                         dtype=np.int64)
+        counts = np.array(list(test_counter.values()), dtype=np.int64)
+        word_num = counts.sum()
+
+        oov_rate_dict = OrderedDict()
+        for threshold in thresholds:
+            oov_count = counts[freqs < threshold].sum()
+            oov_rate_dict[threshold] = float(oov_count * 100 / word_num)
+        return oov_rate_dict
+
+    def save_counts(self, save_path):
+        """Write word counts to a text file (word & count per line).
+        Args:
+            save_path (string): path to the text file
+        """
+        with open(save_path, 'w') as f:
+            for word in sorted(self.counter.keys()):
+                f.write('%s\t%d\n' % (word, self.counter[word]))
+
+    @classmethod
+    def load_counts(cls, count_file_path, vocab_file_path_dict=None):
+        """
+        Args:
+            count_file_path (string): path to a file saved by save_counts()
+            vocab_file_path_dict (dict, optional): vocabulary files of the
+                training set, which are used when count_file_path does not
+                exist (ex. made before word counts were saved)
+                key (int) => frequency threshold
+                value (string) => path to the vocabulary file
+        Returns:
+            vocab_builder (VocabularyBuilder)
+        """
+        if not isfile(count_file_path):
+            if vocab_file_path_dict is not None and all(
+                    isfile(path) for path in vocab_file_path_dict.values()):
+                return cls.from_vocab_files(vocab_file_path_dict)
+            raise ValueError(
+                '%s is not found. Make vocabulary files of the training set '
+                'first.' % count_file_path)
+
+        word_count_dict = {}
+        with open(count_file_path, 'r') as f:
+            for line in f:
+                word, count = line.rstrip('\n').split('\t')
+                word_count_dict[word] = int(count)
+        return cls(word_count_dict)
+
+    @classmethod
+    def from_vocab_files(cls, vocab_file_path_dict):
+        """Restore word counts from vocabulary files of frequency thresholds.
+           Each word is counted as the largest threshold of the vocabularies
+           including it, so that OOV rates of these thresholds are the same
+           as those computed from the vocabulary files.
+        Args:
+            vocab_file_path_dict (dict):
+                key (int) => frequency threshold
+                value (string) => path to the vocabulary file
+        Returns:
+            vocab_builder (VocabularyBuilder)
+        """
+        word_count_dict = {}
+        for threshold in sorted(vocab_file_path_dict.keys()):
+            with open(vocab_file_path_dict[threshold], 'r') as f:
+                for line in f:
+                    word_count_dict[line.strip()] = threshold
+        return cls(word_count_dict)
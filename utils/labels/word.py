@@ -13,10 +13,12 @@ class Word2idx(object):
     Args:
         vocab_file_path (string): path to the vocablary file
         space_mark (string, optional): the space mark to divide a sequence into words
+        dtype (optional): the data type of indices. Default is np.int32.
     """
 
-    def __init__(self, vocab_file_path, space_mark='_'):
+    def __init__(self, vocab_file_path, space_mark='_', dtype=np.int32):
         self.space_mark = space_mark
+        self.dtype = dtype
 
         # Read the vocablary file
         self.map_dict = {}
@@ -49,4 +51,4 @@ class Word2idx(object):
                 # Replace with <UNK>
                 index_list.append(self.map_dict['OOV'])
 
-        return np.array(index_list)
+        return np.array(index_list, dtype=self.dtype)
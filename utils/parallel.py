@@ -19,6 +19,45 @@ def make_parallel(func, args, core=mp.cpu_count()):
     Returns:
         result_tuple (tuple): tuple of returns
     """
-    p = mp.Pool(core - 1)
-    result_tuple = p.map(func, args)
-    return result_tuple
+    return tuple(imap_parallel(func, args, num_workers=core - 1))
+
+
+def imap_parallel(func, args, num_workers=1, chunksize=None):
+    """Apply func to each element of args with a pool of processes.
+       Results are yielded in the same order as args, so that the caller can
+       merge them incrementally.
+    Args:
+        func (function): a function defined at the top level of a module
+            (or functools.partial of it) to be picklable
+        args (list): arguments for func
+        num_workers (int, optional): the number of worker processes. If 1 or
+            less, func is applied in the current process.
+        chunksize (int, optional): the number of tasks submitted to a worker
+            at once. By default, args are divided into about 4 chunks per
+            worker.
+    Returns:
+        generator of returns of func
+    """
+    if num_workers <= 1:
+        for arg in args:
+            yield func(arg)
+        return
+
+    if chunksize is None:
+        chunksize, extra = divmod(len(args), num_workers * 4)
+        if extra:
+            chunksize += 1
+        chunksize = max(chunksize, 1)
+
+    pool = mp.Pool(num_workers)
+    try:
+        for result in pool.imap(func, args, chunksize):
+            yield result
+        pool.close()
+    except BaseException:
+        # NOTE: GeneratorExit is raised here when the consumer stops early,
+        # and it is not a subclass of Exception
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
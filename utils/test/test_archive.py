@@ -0,0 +1,74 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test for the packed feature archive."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import sys
+import unittest
+import tempfile
+import numpy as np
+
+sys.path.append('../../')
+from utils.inputs.archive import ArchiveWriter, ArchiveReader, read_archive
+
+
+class TestArchive(unittest.TestCase):
+
+    def test(self):
+
+        save_path = tempfile.mkdtemp()
+        input_data_dict = {}
+        for i, frame_num in enumerate([10, 1, 300, 50, 7]):
+            input_data_dict['utt%d' % i] = np.random.randn(
+                frame_num, 40).astype(np.float32)
+
+        # Write into small shards
+        archive_writer = ArchiveWriter(save_path, max_shard_size=16000)
+        for utt_name in sorted(input_data_dict.keys()):
+            archive_writer.write(utt_name, input_data_dict[utt_name])
+        archive_writer.close()
+
+        archive_reader = ArchiveReader(save_path)
+        self.assertEqual(len(archive_reader), 5)
+        self.assertEqual(len(set(
+            [archive_reader.specifier(utt_name).split(':')[0]
+             for utt_name in archive_reader.keys()])), 2)
+        for utt_name, input_data in input_data_dict.items():
+            self.assertTrue(utt_name in archive_reader)
+            self.assertTrue(np.array_equal(archive_reader[utt_name],
+                                           input_data))
+            self.assertTrue(np.array_equal(
+                read_archive(archive_reader.specifier(utt_name)), input_data))
+
+        # Normalize in place
+        archive_reader = ArchiveReader(save_path, mode='r+')
+        input_utt = archive_reader['utt2']
+        input_utt -= 1
+        archive_reader.flush()
+        self.assertTrue(np.allclose(
+            read_archive(archive_reader.specifier('utt2')),
+            input_data_dict['utt2'] - 1))
+        self.assertTrue(np.array_equal(
+            read_archive(archive_reader.specifier('utt3')),
+            input_data_dict['utt3']))
+        archive_reader.close()
+
+        # Normalize in place by a memory map of only the utterance
+        input_utt = read_archive(archive_reader.specifier('utt3'), mode='r+')
+        input_utt *= 2
+        input_utt.flush()
+        del input_utt
+        with ArchiveReader(save_path) as archive_reader:
+            self.assertTrue(np.allclose(archive_reader['utt3'],
+                                        input_data_dict['utt3'] * 2))
+            self.assertTrue(np.array_equal(archive_reader['utt4'],
+                                           input_data_dict['utt4']))
+        self.assertEqual(len(archive_reader._shards), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
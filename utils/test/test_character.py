@@ -0,0 +1,97 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test for converting characters to indices."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import sys
+import unittest
+import tempfile
+from os.path import join
+
+sys.path.append('../../')
+from utils.labels.character import Char2idx
+
+
+def _char2idx_loop(map_dict, str_char, space_mark='_', capital_divide=False,
+                   double_letter=False):
+    """Convert character by character (reference)."""
+    index_list = []
+    if capital_divide:
+        for word in str_char.split(space_mark):
+            index_list.append(map_dict[word[0].upper()])
+            skip_flag = False
+            for i in range(1, len(word) - 1, 1):
+                if skip_flag:
+                    skip_flag = False
+                    continue
+                if word[i:i + 2] in map_dict.keys():
+                    index_list.append(map_dict[word[i:i + 2]])
+                    skip_flag = True
+                else:
+                    index_list.append(map_dict[word[i]])
+            if not skip_flag:
+                index_list.append(map_dict[word[-1]])
+    elif double_letter:
+        skip_flag = False
+        for i in range(len(str_char) - 1):
+            if skip_flag:
+                skip_flag = False
+                continue
+            if str_char[i:i + 2] in map_dict.keys():
+                index_list.append(map_dict[str_char[i:i + 2]])
+                skip_flag = True
+            else:
+                index_list.append(map_dict[str_char[i]])
+        if not skip_flag:
+            index_list.append(map_dict[str_char[-1]])
+    else:
+        index_list = [map_dict[char] for char in str_char]
+    return index_list
+
+
+class TestChar2idx(unittest.TestCase):
+
+    def test(self):
+
+        vocab_file_path = join(tempfile.mkdtemp(), 'vocab.txt')
+        with open(vocab_file_path, 'w') as f:
+            for char in ['a', 'b', 'c', 'l', 'o', 't', 'A', 'B', 'C', 'L', 'O',
+                         'T', 'H', 'll', 'oo', 'ab', '\'', '_']:
+                f.write('%s\n' % char)
+
+        transcripts = ['ball_a_too', 'll_loo', 'cat\'_tab', 'b_c',
+                       'toooo_lll', 'abab_ooo']
+        for kwargs in [{}, {'capital_divide': True},
+                       {'double_letter': True}]:
+            char2idx = Char2idx(vocab_file_path, **kwargs)
+            references = [_char2idx_loop(char2idx.map_dict, transcript,
+                                         **kwargs)
+                          for transcript in transcripts]
+            for transcript, reference in zip(transcripts, references):
+                self.assertEqual(char2idx(transcript).tolist(), reference)
+
+            values, offsets = char2idx.tokenize_batch(transcripts)
+            self.assertEqual(len(offsets), len(transcripts) + 1)
+            for i, reference in enumerate(references):
+                self.assertEqual(
+                    values[offsets[i]:offsets[i + 1]].tolist(), reference)
+
+        # Only the capital letter is in the vocabulary
+        char2idx = Char2idx(vocab_file_path, capital_divide=True)
+        self.assertEqual(
+            char2idx('hall_to').tolist(),
+            _char2idx_loop(char2idx.map_dict, 'hall_to', capital_divide=True))
+        with self.assertRaises(KeyError):
+            char2idx('hall_h')
+
+        values, offsets = Char2idx(vocab_file_path).tokenize_batch([])
+        self.assertEqual(len(values), 0)
+        self.assertEqual(offsets.tolist(), [0])
+
+
+if __name__ == '__main__':
+    unittest.main()
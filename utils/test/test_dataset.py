@@ -0,0 +1,118 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test for making dataset files."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import sys
+import unittest
+import tempfile
+from os.path import join
+import numpy as np
+import pandas as pd
+
+sys.path.append('../../')
+from collections import OrderedDict
+from utils.dataset import MultiLabelManifest, add_element
+from utils.dataset import BinaryManifest
+
+
+class TestMultiLabelManifest(unittest.TestCase):
+
+    def test(self):
+
+        save_path = tempfile.mkdtemp()
+        label_types = ['character', 'word_freq1', 'word_freq5']
+        manifest = MultiLabelManifest(OrderedDict(
+            [(label_type, join(save_path, label_type + '.csv'))
+             for label_type in label_types]), flush_size=4,
+            binary_save_path=join(save_path, 'dataset.npz'))
+        for i in range(10):
+            manifest.add(i * 10, '/path/to/%d.npy' % i,
+                         ['%d' % i, '%d 1' % i, '%d 5' % i])
+        # Rows kept in memory are the same as those made by add_element()
+        df = pd.DataFrame([], columns=manifest.columns)
+        for i in range(8, 10):
+            df = add_element(df, [i * 10, '/path/to/%d.npy' % i, '%d 5' % i])
+        df_manifest = manifest.to_dataframe('word_freq5')
+        self.assertEqual(list(df_manifest.columns), list(df.columns))
+        self.assertEqual(list(df_manifest.index), [8, 9])
+        self.assertEqual(df_manifest.values.tolist(), df.values.tolist())
+
+        manifest.save()
+
+        for label_type, suffix in zip(label_types, ['', ' 1', ' 5']):
+            df = pd.read_csv(join(save_path, label_type + '.csv'),
+                             index_col=0, dtype={'transcript': str})
+            self.assertEqual(list(df.index), list(range(10)))
+            self.assertEqual(
+                df.values.tolist(),
+                [[i * 10, '/path/to/%d.npy' % i, '%d%s' % (i, suffix)]
+                 for i in range(10)])
+
+        # Binary manifest
+        manifest = BinaryManifest(join(save_path, 'dataset.npz'))
+        self.assertEqual(len(manifest), 10)
+        self.assertEqual(manifest.label_types, label_types)
+        self.assertEqual(manifest.frame_num.dtype, np.int32)
+        self.assertEqual(manifest.frame_num.tolist(),
+                         [i * 10 for i in range(10)])
+        self.assertEqual(manifest.input_path(3), '/path/to/3.npy')
+        values, offsets = manifest.labels('word_freq5')
+        self.assertEqual(values.dtype, np.int32)
+        for i in range(10):
+            self.assertEqual(values[offsets[i]:offsets[i + 1]].tolist(),
+                             [i, 5])
+
+    def test_indices(self):
+
+        save_path = tempfile.mkdtemp()
+        label_types = ['character', 'word']
+        manifest = MultiLabelManifest(OrderedDict(
+            [(label_type, join(save_path, label_type + '.csv'))
+             for label_type in label_types]), flush_size=4,
+            binary_save_path=join(save_path, 'dataset.npz'),
+            label_dtype=np.uint16)
+        for i in range(10):
+            manifest.add(i * 10, '/path/to/%d.npy' % i,
+                         [np.arange(i + 1, dtype=np.int32), 'text %d' % i])
+        manifest.save()
+
+        # Indices are written to CSV files as strings
+        df = pd.read_csv(join(save_path, 'character.csv'), index_col=0,
+                         dtype={'transcript': str})
+        self.assertEqual(df['transcript'].tolist(),
+                         [' '.join(map(str, range(i + 1))) for i in range(10)])
+
+        manifest = BinaryManifest(join(save_path, 'dataset.npz'))
+        values, offsets = manifest.labels('character')
+        self.assertEqual(values.dtype, np.uint16)
+        for i in range(10):
+            self.assertEqual(values[offsets[i]:offsets[i + 1]].tolist(),
+                             list(range(i + 1)))
+        texts, offsets = manifest.labels('word')
+        self.assertIsNone(offsets)
+        self.assertEqual(str(texts[3]), 'text 3')
+
+        with self.assertRaises(ValueError):
+            MultiLabelManifest(
+                OrderedDict([('character', join(save_path, 'a.csv'))]),
+                binary_save_path=join(save_path, 'a.npz'),
+                label_dtype=np.uint16).add(
+                    0, '/path/to/0.npy', [np.array([70000])])
+
+        # Float labels are not truncated into indices
+        manifest = MultiLabelManifest(
+            OrderedDict([('character', join(save_path, 'b.csv'))]),
+            binary_save_path=join(save_path, 'b.npz'))
+        for transcript in [np.array([1.5, 2.0]), [1, 2.7]]:
+            with self.assertRaises(ValueError):
+                manifest.add(0, '/path/to/0.npy', [transcript])
+        self.assertEqual(len(manifest), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
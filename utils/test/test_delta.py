@@ -0,0 +1,53 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test for delta features."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import sys
+import unittest
+import numpy as np
+
+sys.path.append('../../')
+from utils.inputs.delta import delta
+
+
+def _delta_loop(feat, N):
+    """Compute delta features frame by frame (reference)."""
+    denominator = 2 * sum([i**2 for i in range(1, N + 1)])
+    delta_feat = np.empty_like(feat)
+    padded = np.pad(feat, ((N, N), (0, 0)), mode='edge')
+    for t in range(len(feat)):
+        delta_feat[t] = np.dot(np.arange(-N, N + 1),
+                               padded[t: t + 2 * N + 1]) / denominator
+    return delta_feat
+
+
+class TestDelta(unittest.TestCase):
+
+    def test(self):
+
+        for dtype in [np.float64, np.float32]:
+            for frame_num in [1, 2, 3, 100]:
+                feat = (np.random.randn(frame_num, 123) * 10).astype(dtype)
+
+                # Same as the frame-by-frame computation
+                for N in [1, 2]:
+                    delta_feat = delta(feat, N=N)
+                    self.assertEqual(delta_feat.dtype, feat.dtype)
+                    self.assertTrue(np.array_equal(
+                        delta_feat, _delta_loop(feat, N)))
+
+                delta_feat = delta(feat, N=4)
+                self.assertTrue(np.allclose(
+                    delta_feat, _delta_loop(feat, 4), atol=1e-5))
+
+        with self.assertRaises(ValueError):
+            delta(feat, N=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
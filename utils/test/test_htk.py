@@ -0,0 +1,64 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test for reading & writing HTK files."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import sys
+import unittest
+import tempfile
+from os.path import join
+import numpy as np
+
+sys.path.append('../../')
+from utils.inputs.htk import read, read_header, write, write_many
+
+
+class TestHTK(unittest.TestCase):
+
+    def test(self):
+
+        input_data = np.random.randn(100, 123).astype(np.float32)
+        htk_path = join(tempfile.mkdtemp(), 'test.htk')
+        write(input_data, htk_path, sampPeriod=100000, parmKind=9)
+
+        self.assertEqual(read_header(htk_path), (100, 100000, 123 * 4, 9))
+
+        for mmap in [False, True]:
+            # Whole file
+            input_data_read, sampPeriod, parmKind = read(htk_path, mmap=mmap)
+            self.assertTrue(np.array_equal(input_data_read, input_data))
+            self.assertEqual(sampPeriod, 100000)
+            self.assertEqual(parmKind, 9)
+
+            # Slice
+            input_data_read, _, _ = read(htk_path, mmap=mmap,
+                                         start_frame=10, end_frame=20)
+            self.assertTrue(np.array_equal(input_data_read,
+                                           input_data[10:20]))
+            input_data_read, _, _ = read(htk_path, mmap=mmap,
+                                         start_frame=90, end_frame=200)
+            self.assertTrue(np.array_equal(input_data_read,
+                                           input_data[90:]))
+
+        # Many utterances in a file
+        input_data_list = [np.random.randn(frame_num, 40).astype(np.float64)
+                           for frame_num in [5, 1, 30]]
+        with open(htk_path, 'wb') as f:
+            offsets = write_many(input_data_list, f,
+                                 sampPeriod=100000, parmKind=9)
+        self.assertEqual(offsets, [0, 12 + 5 * 160, 24 + 6 * 160])
+        with open(htk_path, 'rb') as f:
+            for offset, input_data in zip(offsets, input_data_list):
+                f.seek(offset + 12)
+                input_data_read = np.fromfile(
+                    f, '>f4', count=input_data.size).reshape(-1, 40)
+                self.assertTrue(np.array_equal(
+                    input_data_read, input_data.astype(np.float32)))
+
+
+if __name__ == '__main__':
+    unittest.main()
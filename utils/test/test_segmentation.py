@@ -0,0 +1,131 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test for segmenting audio files into utterances."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import sys
+import unittest
+import tempfile
+from os.path import join
+from collections import OrderedDict
+import numpy as np
+import scipy.io.wavfile
+
+sys.path.append('../../')
+from utils.inputs.segmentation import segment, utterance_boundaries
+from utils.inputs.feature_io import extract_feature_channels
+from utils.test.test_sphere import _write_sphere
+
+CONFIG = {
+    'feature_type': 'fbank',
+    'channels': 40,
+    'sampling_rate': 16000,
+    'window': 0.025,
+    'slide': 0.01,
+    'energy': True,
+    'delta': True,
+    'deltadelta': True
+}
+
+
+class TestSegmentation(unittest.TestCase):
+
+    def test(self):
+
+        save_path = tempfile.mkdtemp()
+        audio = (np.random.randn(16000 * 5, 2) * 3000).astype(np.int16)
+        utterance_dict = OrderedDict()
+        utterance_dict['0000'] = [0, 50, 'a']
+        utterance_dict['0001'] = [60, 200, 'b']
+        utterance_dict['0002'] = [250, 420, 'c']
+        utterance_dict['0003'] = [450, 498, 'd']
+
+        wav_path = join(save_path, 'test.wav')
+        scipy.io.wavfile.write(wav_path, 16000, audio[:, 0])
+        for sil_duration in [0, 10, 100]:
+            input_data_dict, _, _, _, frame_num = segment(
+                wav_path, 'speaker', utterance_dict, is_training=False,
+                sil_duration=sil_duration, tool='numpy', config=CONFIG)
+            input_data_dict_limited, _, _, _, frame_num_limited = segment(
+                wav_path, 'speaker', utterance_dict, is_training=False,
+                sil_duration=sil_duration, tool='numpy', config=CONFIG,
+                window_limited=True)
+            self.assertEqual(frame_num, frame_num_limited)
+            for utt_index, input_utt in input_data_dict.items():
+                self.assertTrue(np.array_equal(
+                    input_utt, input_data_dict_limited[utt_index]))
+
+        # 2-channel SPHERE file
+        sph_path = join(save_path, 'test.sph')
+        _write_sphere(sph_path, audio.astype('<i2').tobytes(),
+                      [('sample_rate', 16000), ('channel_count', 2),
+                       ('sample_n_bytes', 2), ('sample_count', len(audio)),
+                       ('sample_byte_format', '01')])
+        input_data_list = extract_feature_channels(sph_path, 'numpy', CONFIG)
+        for channel, input_data in enumerate(input_data_list):
+            input_data_dict, _, _, _, _ = segment(
+                sph_path, 'speaker', utterance_dict, is_training=False,
+                sil_duration=10, tool='numpy', config=CONFIG,
+                input_data=input_data)
+            input_data_dict_limited, _, _, _, _ = segment(
+                sph_path, 'speaker', utterance_dict, is_training=False,
+                sil_duration=10, tool='numpy', config=CONFIG,
+                window_limited=True, channel=channel)
+            for utt_index, input_utt in input_data_dict.items():
+                self.assertTrue(np.array_equal(
+                    input_utt, input_data_dict_limited[utt_index]))
+
+    def test_default(self):
+
+        save_path = tempfile.mkdtemp()
+        audio = (np.random.randn(16000 * 2) * 3000).astype(np.int16)
+        wav_path = join(save_path, 'test.wav')
+        scipy.io.wavfile.write(wav_path, 16000, audio)
+        utterance_dict = OrderedDict()
+        utterance_dict['0000'] = [10, 80, 'a']
+        utterance_dict['0001'] = [100, 150, 'b']
+
+        # sil_duration is not given
+        input_data_dict, _, mean, _, total_frame_num = segment(
+            wav_path, 'speaker', utterance_dict, is_training=True,
+            tool='numpy', config=CONFIG)
+        self.assertEqual(input_data_dict['0000'].shape, (70, 123))
+        self.assertEqual(input_data_dict['0001'].shape, (50, 123))
+        self.assertEqual(total_frame_num, 120)
+        self.assertEqual(mean.shape, (123,))
+
+        # Float sil_duration
+        input_data_dict, _, _, _, _ = segment(
+            wav_path, 'speaker', utterance_dict, is_training=False,
+            sil_duration=5., tool='numpy', config=CONFIG)
+        self.assertEqual(input_data_dict['0000'].shape, (80, 123))
+        self.assertEqual(input_data_dict['0001'].shape, (60, 123))
+
+    def test_boundaries(self):
+
+        # The gap shorter than sil_duration * 2 is divided in half
+        boundaries = utterance_boundaries(
+            [5, 60, 250], [50, 200, 420], frame_num=430, sil_duration=10)
+        self.assertEqual(boundaries.tolist(),
+                         [[0, 55], [55, 210], [240, 430]])
+
+        # Overlapping utterances
+        boundaries = utterance_boundaries(
+            [0, 40], [50, 100], frame_num=100, sil_duration=0)
+        self.assertEqual(boundaries.tolist(), [[0, 45], [45, 100]])
+
+        # Single utterance is not clipped by the last frame
+        boundaries = utterance_boundaries(
+            [10], [100], frame_num=100, sil_duration=10)
+        self.assertEqual(boundaries.tolist(), [[0, 110]])
+
+        with self.assertRaises(ValueError):
+            utterance_boundaries([10, 60], [50, 55], frame_num=100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test for reading NIST SPHERE files."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import sys
+import unittest
+import tempfile
+from os.path import join
+import numpy as np
+import scipy.io.wavfile
+
+sys.path.append('../../')
+from utils.inputs.sphere import read_sphere, is_sphere
+from utils.inputs.wav2feature_numpy import wav2feature
+
+
+def _write_sphere(sph_path, data, fields):
+    header = 'NIST_1A\n   1024\n'
+    for name, value in fields:
+        if isinstance(value, int):
+            header += '%s -i %d\n' % (name, value)
+        else:
+            header += '%s -s%d %s\n' % (name, len(value), value)
+    header += 'end_head\n'
+    with open(sph_path, 'wb') as f:
+        f.write(header.encode('ascii').ljust(1024, b' '))
+        f.write(data)
+
+
+class TestSphere(unittest.TestCase):
+
+    def test(self):
+
+        save_path = tempfile.mkdtemp()
+        audio = (np.random.randn(8000, 2) * 3000).astype(np.int16)
+
+        # 16-bit PCM (TIMIT)
+        sph_path = join(save_path, 'pcm.sph')
+        _write_sphere(sph_path, audio[:, 0].astype('<i2').tobytes(),
+                      [('sample_rate', 16000), ('channel_count', 1),
+                       ('sample_n_bytes', 2), ('sample_count', 8000),
+                       ('sample_byte_format', '01'),
+                       ('sample_coding', 'pcm')])
+        self.assertTrue(is_sphere(sph_path))
+        fs, audio_sph = read_sphere(sph_path)
+        self.assertEqual(fs, 16000)
+        self.assertTrue(np.array_equal(audio_sph, audio[:, 0]))
+
+        # Compare features with those of the same WAV file
+        wav_path = join(save_path, 'pcm.wav')
+        scipy.io.wavfile.write(wav_path, 16000, audio[:, 0])
+        self.assertFalse(is_sphere(wav_path))
+        self.assertTrue(np.array_equal(wav2feature(sph_path),
+                                       wav2feature(wav_path)))
+
+        # 2-channel big-endian PCM
+        _write_sphere(sph_path, audio.astype('>i2').tobytes(),
+                      [('sample_rate', 8000), ('channel_count', 2),
+                       ('sample_n_bytes', 2), ('sample_count', 8000),
+                       ('sample_byte_format', '10')])
+        fs, audio_sph = read_sphere(sph_path)
+        self.assertTrue(np.array_equal(audio_sph, audio))
+
+        # 2-channel mu-law (Switchboard)
+        _write_sphere(sph_path, bytes(bytearray([0xff, 0x00, 0x80, 0x7f])),
+                      [('sample_rate', 8000), ('channel_count', 2),
+                       ('sample_n_bytes', 1), ('sample_count', 2),
+                       ('sample_coding', 'ulaw')])
+        fs, audio_sph = read_sphere(sph_path)
+        self.assertEqual(audio_sph.tolist(), [[0, -32124], [32124, 0]])
+
+        # Compressed file
+        _write_sphere(sph_path, b'',
+                      [('sample_rate', 8000),
+                       ('sample_coding', 'pcm,embedded-shorten-v2.00')])
+        with self.assertRaises(ValueError):
+            read_sphere(sph_path)
+
+        # 2-channel shorten-compressed mu-law (LDC97S62, eval2000)
+        _write_sphere(sph_path, b'ajkg' + bytes(bytearray(range(256))),
+                      [('sample_rate', 8000), ('channel_count', 2),
+                       ('sample_n_bytes', 1), ('sample_count', 4000),
+                       ('sample_coding', 'ulaw,embedded-shorten-v2.00'),
+                       ('sample_byte_format', '1')])
+        self.assertTrue(is_sphere(sph_path))
+        with self.assertRaises(ValueError):
+            read_sphere(sph_path)
+        with self.assertRaises(ValueError):
+            read_sphere(sph_path, start=100, end=200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test for the accumulator of mean & stddev."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import sys
+import unittest
+import tempfile
+from os.path import join
+import numpy as np
+
+sys.path.append('../../')
+from utils.inputs.statistics import Statistics
+
+
+class TestStatistics(unittest.TestCase):
+
+    def test(self):
+
+        input_data = np.random.randn(1000, 40) * 5 + 100
+
+        # Single accumulator
+        stats = Statistics()
+        for i in range(0, 1000, 100):
+            stats.add('M', input_data[i:i + 100])
+        self.check(stats, 'M', input_data)
+
+        # Merge partial statistics
+        stats_a, stats_b = Statistics(), Statistics()
+        stats_a.add('M', input_data[:123])
+        stats_b.add('M', input_data[123:])
+        stats_b.add('F', input_data[:10])
+        stats_a.merge(stats_b)
+        self.check(stats_a, 'M', input_data)
+        self.check(stats_a, 'F', input_data[:10])
+
+        # Save & load
+        save_path = join(tempfile.mkdtemp(), 'statistics.npz')
+        stats_a.save(save_path)
+        stats_load = Statistics.load(save_path)
+        self.assertEqual(stats_load.keys(), ['M', 'F'])
+        self.check(stats_load, 'M', input_data)
+
+        # Absent group & a single frame
+        stats = Statistics()
+        stats.add('M', input_data[:1])
+        self.assertEqual(stats.frame_num('F'), 0)
+        self.assertIsNone(stats.mean('F'))
+        self.assertIsNone(stats.std('F'))
+        self.assertTrue(np.allclose(stats.std('M', ddof=0), 0))
+        with self.assertRaises(ValueError):
+            stats.std('M')
+
+    def check(self, stats, key, input_data):
+        self.assertEqual(stats.frame_num(key), input_data.shape[0])
+        self.assertTrue(np.allclose(
+            stats.mean(key, dtype=np.float64), np.mean(input_data, axis=0)))
+        self.assertTrue(np.allclose(
+            stats.std(key, dtype=np.float64),
+            np.std(input_data, axis=0, ddof=1)))
+        self.assertTrue(np.allclose(
+            stats.std(key, ddof=0, dtype=np.float64),
+            np.std(input_data, axis=0)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test for making vocabularies."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import sys
+import unittest
+import tempfile
+from os.path import join
+from collections import OrderedDict
+
+sys.path.append('../../')
+from utils.labels.vocabulary import VocabularyBuilder
+
+
+class TestVocabularyBuilder(unittest.TestCase):
+
+    def test(self):
+
+        transcripts = ['a b c', 'a b', 'a', 'a d b', 'a']
+        word_count_dict = {}
+        for transcript in transcripts:
+            for word in transcript.split(' '):
+                if word not in word_count_dict.keys():
+                    word_count_dict[word] = 0
+                word_count_dict[word] += 1
+
+        vocab_builder = VocabularyBuilder()
+        for transcript in transcripts:
+            vocab_builder.add(transcript.split(' '))
+        self.assertEqual(len(vocab_builder), 4)
+
+        thresholds = [1, 2, 5]
+        vocab_list_dict = vocab_builder.vocab_lists(thresholds, oov='OOV')
+        self.assertEqual(list(vocab_list_dict.keys()), thresholds)
+        for threshold in thresholds:
+            self.assertEqual(
+                vocab_list_dict[threshold],
+                sorted([word for word, freq in word_count_dict.items()
+                        if freq >= threshold]) + ['OOV'])
+        self.assertEqual(vocab_builder.map_dicts([2])[2], {'a': 0, 'b': 1})
+
+        # Merge builders of 2 workers
+        vocab_builder_a = VocabularyBuilder()
+        vocab_builder_b = VocabularyBuilder()
+        for i, transcript in enumerate(transcripts):
+            (vocab_builder_a if i % 2 == 0 else vocab_builder_b).add(
+                transcript.split(' '))
+        vocab_builder_a.merge(vocab_builder_b)
+        self.assertEqual(vocab_builder_a.counter, vocab_builder.counter)
+
+        # Save vocabulary files
+        save_path = tempfile.mkdtemp()
+        vocab_file_path_dict = OrderedDict(
+            [(threshold, join(save_path, 'word_freq%d.txt' % threshold))
+             for threshold in thresholds])
+        vocab_builder.save(vocab_file_path_dict, oov='OOV')
+        for threshold, vocab_file_path in vocab_file_path_dict.items():
+            with open(vocab_file_path, 'r') as f:
+                self.assertEqual([line.strip() for line in f],
+                                 vocab_list_dict[threshold])
+
+        # Load word counts
+        count_file_path = join(save_path, 'word_count.txt')
+        vocab_builder.save_counts(count_file_path)
+        vocab_builder_load = VocabularyBuilder.load_counts(count_file_path)
+        self.assertEqual(vocab_builder_load.counter, vocab_builder.counter)
+
+        # OOV rates of test transcripts
+        test_transcripts = ['a e b', 'c c f', 'b']
+        oov_rate_dict = vocab_builder_load.oov_rates(
+            [transcript.split(' ') for transcript in test_transcripts],
+            thresholds)
+        for threshold in thresholds:
+            vocab_set = set(vocab_list_dict[threshold])
+            word_list = ' '.join(test_transcripts).split(' ')
+            oov_count = len([word for word in word_list
+                             if word not in vocab_set])
+            self.assertAlmostEqual(oov_rate_dict[threshold],
+                                   oov_count * 100 / len(word_list))
+
+        # Vocabulary files are used without word counts
+        vocab_builder_load = VocabularyBuilder.load_counts(
+            join(save_path, 'word_count_none.txt'), vocab_file_path_dict)
+        self.assertEqual(vocab_builder_load.oov_rates(
+            [transcript.split(' ') for transcript in test_transcripts],
+            thresholds), oov_rate_dict)
+        with self.assertRaises(ValueError):
+            VocabularyBuilder.load_counts(
+                join(save_path, 'word_count_none.txt'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test for the NumPy based feature extraction."""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import sys
+import unittest
+import numpy as np
+
+sys.path.append('../../')
+from utils.inputs.wav2feature_numpy import signal2feature
+from utils.inputs.wav2feature_numpy import _get_mel_filterbank, _get_dct
+
+
+def _logfbank_loop(audio, sampling_rate, channels, frame_length,
+                   frame_shift, n_fft):
+    """Compute log mel filterbank features frame by frame (reference)."""
+    mel_filterbank = _get_mel_filterbank(sampling_rate, n_fft, channels)
+    feat, energy = [], []
+    for start in range(0, len(audio) - frame_length + 1, frame_shift):
+        frame = audio[start:start + frame_length].astype(np.float64)
+        frame = frame - np.mean(frame)
+        energy.append(np.log(np.sum(frame ** 2)))
+        frame = np.append(frame[0] * (1 - 0.97), frame[1:] - 0.97 * frame[:-1])
+        frame = frame * np.hamming(frame_length)
+        spectrum = np.abs(np.fft.rfft(frame, n=n_fft))
+        feat.append(np.log(np.maximum(np.dot(spectrum, mel_filterbank), 1)))
+    return np.array(feat), np.array(energy)
+
+
+class TestWav2featureNumpy(unittest.TestCase):
+
+    def test(self):
+
+        audio = (np.random.randn(16000) * 3000).astype(np.int16)
+
+        feat_ref, energy_ref = _logfbank_loop(
+            audio, 16000, channels=40, frame_length=400, frame_shift=160,
+            n_fft=512)
+
+        # log mel filterbank
+        feat = signal2feature(audio, 16000, feature_type='fbank',
+                              feature_dim=40, use_energy=True,
+                              use_delta1=False, use_delta2=False)
+        self.assertEqual(feat.shape, (98, 41))
+        self.assertTrue(np.allclose(feat[:, :40], feat_ref))
+        self.assertTrue(np.allclose(feat[:, 40], energy_ref))
+
+        # + delta & delta delta
+        feat = signal2feature(audio, 16000, feature_type='fbank',
+                              feature_dim=40, use_energy=False,
+                              use_delta1=False, use_delta2=True)
+        self.assertEqual(feat.shape, (98, 120))
+        self.assertTrue(np.allclose(feat[:, :40], feat_ref))
+
+        # MFCC
+        feat = signal2feature(audio, 16000, feature_type='mfcc',
+                              feature_dim=40, use_energy=False,
+                              use_delta1=False, use_delta2=False)
+        self.assertEqual(feat.shape, (98, 12))
+        self.assertTrue(np.allclose(feat, np.dot(feat_ref, _get_dct(40, 12, 22))))
+
+        # Filterbanks are memoized
+        self.assertTrue(_get_mel_filterbank(16000, 512, 40) is
+                        _get_mel_filterbank(16000, 512, 40))
+
+        with self.assertRaises(ValueError):
+            signal2feature(audio, 16000, feature_type='spectrogram')
+
+
+if __name__ == '__main__':
+    unittest.main()